@@ -0,0 +1,263 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Time each stage of the phasing pipeline on the bundled examples
+and on synthetic datasets of increasing size.
+
+    python benchmarks/pipeline.py run -o baseline.json
+    python benchmarks/pipeline.py run -o current.json
+    python benchmarks/pipeline.py compare baseline.json current.json
+
+Comparison exits with status 1 if any stage got slower than allowed.
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import sys
+from argparse import ArgumentParser
+from datetime import datetime
+from pathlib import Path
+from random import Random
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from itaxotools.common.utility import AttrDict
+
+examples = Path(__file__).parents[1] / "examples"
+
+stages = ["parse", "scan", "phase", "ambiguity", "write", "get_info"]
+
+codes = {
+    frozenset("AG"): "R",
+    frozenset("CT"): "Y",
+    frozenset("GT"): "K",
+    frozenset("AC"): "M",
+    frozenset("CG"): "S",
+    frozenset("AT"): "W",
+}
+
+
+def write_synthetic_dataset(
+    path: Path,
+    individuals: int,
+    length: int = 500,
+    polymorphic_sites: int = 8,
+    haplotypes: int = 6,
+    species: int = 4,
+    seed: int = 0,
+):
+    """Diploid genotypes drawn from a small pool of haplotypes"""
+    random = Random(seed)
+    base = [random.choice("ACGT") for _ in range(length)]
+    sites = random.sample(range(length), polymorphic_sites)
+    alternatives = {
+        site: random.choice([x for x in "ACGT" if x != base[site]]) for site in sites
+    }
+
+    pool = []
+    for _ in range(haplotypes):
+        haplotype = list(base)
+        for site in sites:
+            if random.random() < 0.4:
+                haplotype[site] = alternatives[site]
+        pool.append(haplotype)
+
+    with open(path, "w") as file:
+        file.write("seqid\tspecies\tsequence\n")
+        for index in range(individuals):
+            a, b = random.choice(pool), random.choice(pool)
+            seq = "".join(
+                x if x == y else codes[frozenset(x + y)] for x, y in zip(a, b)
+            )
+            file.write(f"ind{index:05}\tspecies{index % species}\t{seq}\n")
+
+
+def get_datasets(work_dir: Path, sizes: list[int]) -> dict[str, Path]:
+    datasets = {path.name: path for path in sorted(examples.iterdir())}
+    for size in sizes:
+        path = work_dir / f"synthetic_{size}.tsv"
+        write_synthetic_dataset(path, size)
+        datasets[path.name] = path
+    return datasets
+
+
+def time_pipeline(path: Path, work_dir: Path) -> dict[str, float]:
+    """Same steps as `process.execute`, each stage fully consumed in turn"""
+    from itaxotools.convphase_gui.task.headless import (
+        get_input_sequences,
+        get_output_options,
+        get_parameters,
+    )
+    from itaxotools.convphase_gui.task.work import (
+        get_input_sequence_warnings,
+        get_output_file_handler,
+        get_output_file_name,
+        get_output_info_builder,
+        get_output_sequence_ambiguity,
+        get_phased_lines,
+        get_phased_sequences,
+        get_sequence_store,
+    )
+    from itaxotools.taxi2.files import get_info
+
+    times = {}
+
+    ts = perf_counter()
+    input_sequences = get_input_sequences(get_info(path))
+    sequences = get_sequence_store(input_sequences)
+    times["parse"] = perf_counter() - ts
+
+    ts = perf_counter()
+    get_input_sequence_warnings(sequences)
+    times["scan"] = perf_counter() - ts
+
+    ts = perf_counter()
+    phased = list(get_phased_lines(sequences, get_parameters()))
+    phased_sequences = list(get_phased_sequences(sequences, phased))
+    times["phase"] = perf_counter() - ts
+
+    ts = perf_counter()
+    get_output_sequence_ambiguity(phased_sequences)
+    times["ambiguity"] = perf_counter() - ts
+
+    output_options = get_output_options(input_sequences)
+    output_path = work_dir / get_output_file_name(output_options, input_sequences)
+    info = get_output_info_builder(output_path, output_options, input_sequences)
+    ts = perf_counter()
+    with get_output_file_handler(output_path, output_options, input_sequences) as file:
+        for sequence in phased_sequences:
+            file.write(sequence)
+            info.add(sequence)
+    times["write"] = perf_counter() - ts
+
+    ts = perf_counter()
+    info.get_info()
+    times["get_info"] = perf_counter() - ts
+
+    return times
+
+
+def run_benchmarks(sizes: list[int], repeat: int) -> dict:
+    from itaxotools.convphase.phase import set_progress_callback
+    from itaxotools.convphase_gui.task.cache import get_convphase_version
+
+    set_progress_callback(None)
+
+    results = {}
+    with TemporaryDirectory(prefix="convphase_bench_") as tmp:
+        work_dir = Path(tmp)
+        for name, path in get_datasets(work_dir, sizes).items():
+            runs = [time_pipeline(path, work_dir) for _ in range(repeat)]
+            results[name] = {
+                stage: AttrDict(
+                    min=min(run[stage] for run in runs),
+                    median=median(run[stage] for run in runs),
+                )
+                for stage in stages
+            }
+            total = sum(results[name][stage].median for stage in stages)
+            print(f"{name}: {total:.3f}s", file=sys.stderr)
+
+    return dict(
+        meta=dict(
+            timestamp=datetime.now().isoformat(timespec="seconds"),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            machine=platform.machine(),
+            convphase=get_convphase_version(),
+            repeat=repeat,
+            sizes=sizes,
+        ),
+        results=results,
+    )
+
+
+def compare_benchmarks(
+    baseline: dict, current: dict, tolerance: float, min_seconds: float
+) -> list[str]:
+    """Medians slower by more than `tolerance` and `min_seconds` are regressions"""
+    regressions = []
+    for name, baseline_stages in baseline["results"].items():
+        current_stages = current["results"].get(name)
+        if current_stages is None:
+            continue
+        for stage, baseline_times in baseline_stages.items():
+            if stage not in current_stages:
+                continue
+            before = baseline_times["median"]
+            after = current_stages[stage]["median"]
+            if after - before > max(before * tolerance, min_seconds):
+                change = (after / before - 1) * 100 if before else float("inf")
+                regressions.append(
+                    f"{name} {stage}: {before:.4f}s -> {after:.4f}s ({change:+.0f}%)"
+                )
+    return regressions
+
+
+def get_parser() -> ArgumentParser:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Time all stages and save the results")
+    run.add_argument(
+        "-o", "--output", type=Path, default=None, help="JSON results path"
+    )
+    run.add_argument(
+        "-r", "--repeat", type=int, default=3, help="Runs per dataset (default: 3)"
+    )
+    run.add_argument(
+        "--sizes",
+        type=lambda x: [int(size) for size in x.split(",")],
+        default=[100, 400, 1600],
+        help="Individuals in each synthetic dataset (default: 100,400,1600)",
+    )
+
+    compare = commands.add_parser("compare", help="Flag regressions between runs")
+    compare.add_argument("baseline", type=Path)
+    compare.add_argument("current", type=Path)
+    compare.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative slowdown of a stage (default: 0.2)",
+    )
+    compare.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.01,
+        help="Ignore slowdowns shorter than this (default: 0.01)",
+    )
+
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+
+    if args.command == "run":
+        results = run_benchmarks(args.sizes, args.repeat)
+        text = json.dumps(results, indent=2)
+        if args.output is None:
+            print(text)
+        else:
+            args.output.write_text(text + "\n")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    regressions = compare_benchmarks(
+        baseline, current, args.tolerance, args.min_seconds
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print("No regressions found")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
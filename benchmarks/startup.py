@@ -0,0 +1,235 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Time the cold start of the GUI and report what it spends on imports.
+
+    python benchmarks/startup.py run --budget 1.5
+    python benchmarks/startup.py run --bundle dist/ConvPhase --budget 3
+    python benchmarks/startup.py imports --top 20
+
+Timing exits with status 1 if the median startup exceeds the budget,
+the import report does the same if a module that should load lazily
+gets imported before the window is shown.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+from argparse import ArgumentParser
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import sleep, time
+
+# same imports as `itaxotools.convphase_gui.run` and the task loader of taxi_gui
+startup_code = """
+from itaxotools.taxi_gui.app import Application, skin
+from itaxotools.taxi_gui.main import Main
+from itaxotools.convphase_gui import config
+import itaxotools.convphase_gui.task.model
+import itaxotools.convphase_gui.task.view
+"""
+
+# only needed once phasing starts or results are viewed
+lazy_modules = [
+    "itaxotools.convphase.phase",
+    "itaxotools.taxi2.sequences",
+    "itaxotools.taxi2.handlers",
+    "Bio",
+    "numpy",
+    "openpyxl",
+]
+
+
+def get_source_command() -> list[str]:
+    return [sys.executable, "-c", "from itaxotools.convphase_gui import run; run()"]
+
+
+def kill_tree(process: subprocess.Popen):
+    # the window asks for confirmation before closing, and the
+    # worker processes of the GUI must not outlive the benchmark
+    if os.name == "nt":
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    process.wait()
+
+
+def time_startup(command: list[str], timeout: float) -> float:
+    """Seconds from launching the command until the window is shown"""
+    with TemporaryDirectory(prefix="convphase_startup_") as tmp:
+        report = Path(tmp) / "shown"
+        env = dict(os.environ, CONVPHASE_STARTUP_REPORT=str(report))
+        ts = time()
+        process = subprocess.Popen(
+            command,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        try:
+            while not report.exists() or not report.read_text().endswith("\n"):
+                if process.poll() is not None:
+                    raise Exception(f"Exited before showing the window: {command}")
+                if time() - ts > timeout:
+                    raise Exception(f"Timed out waiting for the window: {command}")
+                sleep(0.01)
+        finally:
+            kill_tree(process)
+        return float(report.read_text()) - ts
+
+
+def run_benchmarks(command: list[str], repeat: int, timeout: float) -> dict:
+    # the first launch fills the disk cache and compiles bytecode
+    time_startup(command, timeout)
+
+    runs = []
+    for _ in range(repeat):
+        runs.append(time_startup(command, timeout))
+        print(f"startup: {runs[-1]:.3f}s", file=sys.stderr)
+
+    return dict(
+        meta=dict(
+            timestamp=datetime.now().isoformat(timespec="seconds"),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            machine=platform.machine(),
+            command=command,
+            repeat=repeat,
+        ),
+        results=dict(min=min(runs), median=median(runs), runs=runs),
+    )
+
+
+def get_import_times() -> list[tuple[str, int, int]]:
+    """Name, self and cumulative microseconds of each module imported at startup"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", startup_code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.removeprefix("import time:").split("|")
+        if not fields[0].strip().isdigit():
+            continue
+        times.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return times
+
+
+def get_package(name: str) -> str:
+    parts = name.split(".")
+    if parts[0] == "itaxotools" and len(parts) > 1:
+        return ".".join(parts[:2])
+    return parts[0]
+
+
+def report_imports(top: int) -> list[str]:
+    times = get_import_times()
+    total = sum(self for _, self, _ in times)
+
+    packages = defaultdict(int)
+    for name, self, _ in times:
+        packages[get_package(name)] += self
+
+    print(f"{len(times)} modules imported in {total / 1e6:.3f}s\n")
+    print("By package:")
+    for package, micros in sorted(packages.items(), key=lambda x: -x[1])[:top]:
+        print(f"  {micros / 1e6:8.3f}s  {package}")
+    print("\nSlowest modules:")
+    for name, self, cumulative in sorted(times, key=lambda x: -x[1])[:top]:
+        print(f"  {self / 1e6:8.3f}s  {name} ({cumulative / 1e6:.3f}s cumulative)")
+
+    imported = {name for name, _, _ in times}
+    return [
+        module
+        for module in lazy_modules
+        if any(name == module or name.startswith(module + ".") for name in imported)
+    ]
+
+
+def get_parser() -> ArgumentParser:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Time how long the window takes to show")
+    run.add_argument(
+        "--bundle",
+        type=Path,
+        default=None,
+        help="Executable built by PyInstaller (default: the source install)",
+    )
+    run.add_argument(
+        "-o", "--output", type=Path, default=None, help="JSON results path"
+    )
+    run.add_argument(
+        "-r", "--repeat", type=int, default=5, help="Number of launches (default: 5)"
+    )
+    run.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="Maximum median startup in seconds (default: no limit)",
+    )
+    run.add_argument(
+        "--timeout",
+        type=float,
+        default=60,
+        help="Give up on a launch after this many seconds (default: 60)",
+    )
+
+    imports = commands.add_parser("imports", help="Report import times at startup")
+    imports.add_argument(
+        "--top", type=int, default=15, help="Number of entries to list (default: 15)"
+    )
+
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+
+    if args.command == "imports":
+        eager = report_imports(args.top)
+        for module in eager:
+            print(f"EAGER {module} is imported before the window is shown")
+        sys.exit(1 if eager else 0)
+
+    command = get_source_command()
+    if args.bundle is not None:
+        command = [str(args.bundle.resolve())]
+
+    results = run_benchmarks(command, args.repeat, args.timeout)
+    text = json.dumps(results, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        args.output.write_text(text + "\n")
+
+    startup = results["results"]["median"]
+    if args.budget is not None and startup > args.budget:
+        print(f"OVER BUDGET {startup:.3f}s > {args.budget:.3f}s", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
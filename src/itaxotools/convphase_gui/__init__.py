@@ -29,6 +29,14 @@ def find_task():
     return item.object
 
 
+def report_startup(path: str):
+    """Record when the window got shown, for benchmarks/startup.py"""
+    from time import time
+
+    with open(path, "w") as file:
+        file.write(f"{time()}\n")
+
+
 def run():
     """
     Show the Taxi2 window and enter the main event loop.
@@ -36,6 +44,7 @@ def run():
     """
 
     from argparse import ArgumentParser
+    from os import environ
     from pathlib import Path
 
     from itaxotools.taxi_gui.app import Application, skin
@@ -55,6 +64,12 @@ def run():
     main.widgets.header.toolLogo.setFixedWidth(192)
     main.show()
 
+    if report := environ.get("CONVPHASE_STARTUP_REPORT"):
+        from PySide6.QtCore import QTimer
+
+        # fires once the event loop has painted the window
+        QTimer.singleShot(0, lambda: report_startup(report))
+
     if args.input:
         model = find_task()
         model.open(Path(args.input))
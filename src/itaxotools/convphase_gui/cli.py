@@ -0,0 +1,375 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Console entry point"""
+
+from __future__ import annotations
+
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from pathlib import Path
+
+
+def get_cache_size(value: str) -> int:
+    try:
+        size = int(value)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid size: {value}")
+    if size < 0:
+        raise ArgumentTypeError(f"size cannot be negative: {value}")
+    return size
+
+
+def get_parser() -> ArgumentParser:
+    from .task.types import Compression, OutputFormat, Parameter
+
+    parser = ArgumentParser(
+        description="Convenient Phase - batch phasing without a display"
+    )
+    parser.add_argument(
+        "inputs", nargs="+", type=str, help="Paths or glob patterns of input files"
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        default=None,
+        help="Directory for phased files (default: next to each input)",
+    )
+    parser.add_argument(
+        "-m",
+        "--metrics",
+        type=str,
+        default="-",
+        help="Path for the JSON metrics summary (default: stdout)",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Proceed even if problems are detected with an input file",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of files to phase in parallel, 0 for all cores (default: 1)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Reuse phased results stored in this directory (default: no cache)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=get_cache_size,
+        default=512,
+        help="Maximum size of the cache in megabytes, 0 for no limit (default: 512)",
+    )
+    parser.add_argument(
+        "--quiet", action="store_true", help="Do not report progress on stderr"
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record memory use per stage in the metrics, slows down phasing",
+    )
+
+    group = parser.add_argument_group("parameters")
+    for param in Parameter:
+        group.add_argument(
+            "--" + param.key.replace("_", "-"),
+            dest=param.key,
+            type=param.type,
+            default=None,
+            help=f"{param.description} (default: {param.default})",
+        )
+
+    group.add_argument(
+        "--sweep",
+        action="append",
+        default=[],
+        metavar="PARAMETER=VALUES",
+        help=(
+            "Phase once for every combination of comma separated values, "
+            "e.g. --sweep burn-in=100,1000 (may be repeated)"
+        ),
+    )
+    group.add_argument(
+        "--partition-subsets",
+        action="store_true",
+        help="Phase each subset independently, in parallel processes",
+    )
+    group.add_argument(
+        "--chains",
+        type=int,
+        default=1,
+        help="Number of independent chains to run in parallel (default: 1)",
+    )
+    group.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the first chain, the rest follow in sequence (default: random)",
+    )
+
+    group = parser.add_argument_group("input")
+    group.add_argument("--index-column", type=str, help="Tabfile header of identifiers")
+    group.add_argument(
+        "--sequence-column", type=str, help="Tabfile header of sequences"
+    )
+    group.add_argument("--subset-column", type=str, help="Tabfile header of subsets")
+    group.add_argument(
+        "--parse-organism",
+        action="store_true",
+        default=None,
+        help='Parse fasta identifiers as "individual|organism"',
+    )
+    group.add_argument(
+        "--no-parse-organism",
+        action="store_false",
+        default=None,
+        dest="parse_organism",
+        help="Do not parse organisms from fasta identifiers",
+    )
+
+    formats = {format.name.lower(): format for format in OutputFormat}
+    group = parser.add_argument_group("output")
+    group.add_argument(
+        "--format",
+        choices=list(formats),
+        default=OutputFormat.Mimic.name.lower(),
+        help="Output format (default: same as input)",
+    )
+    group.add_argument(
+        "--fasta-separator",
+        choices=["|", "."],
+        default=None,
+        help="Subset separator for fasta output",
+    )
+    group.add_argument(
+        "--fasta-concatenate",
+        action="store_true",
+        help="Concatenate all extra fields into fasta identifier",
+    )
+    group.add_argument(
+        "--compression",
+        choices=[compression.label for compression in Compression],
+        default=None,
+        help="Compress phased files as they are written (default: no compression)",
+    )
+    group.add_argument(
+        "--compression-level",
+        type=int,
+        default=None,
+        help="Compression level, clamped to the range of the method",
+    )
+
+    return parser
+
+
+def expand_inputs(parser: ArgumentParser, patterns: list[str]) -> list[Path]:
+    from glob import glob
+
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob(pattern, recursive=True))
+        if not matches:
+            parser.error(f"No input files matched: {pattern}")
+        paths.extend(Path(match) for match in matches)
+    return paths
+
+
+def get_sweep_grid(
+    parser: ArgumentParser, specs: list[str]
+) -> dict[str, list[int | float]]:
+    from .task.types import Parameter
+
+    params = {param.key: param for param in Parameter}
+    grid = {}
+    for spec in specs:
+        key, _, values = spec.partition("=")
+        key = key.strip().replace("-", "_")
+        if key not in params or not values:
+            parser.error(f"Invalid sweep: {spec}")
+        try:
+            grid[key] = [params[key].type(value) for value in values.split(",")]
+        except ValueError:
+            parser.error(f"Invalid sweep values: {spec}")
+    return grid
+
+
+def get_options(args: Namespace) -> dict[str, dict]:
+    from .task.types import Compression, OutputFormat, Parameter
+
+    compressions = {compression.label: compression for compression in Compression}
+
+    return dict(
+        input_options=dict(
+            index_column=args.index_column,
+            sequence_column=args.sequence_column,
+            subset_column=args.subset_column,
+            parse_organism=args.parse_organism,
+        ),
+        output_options=dict(
+            format=OutputFormat[args.format.capitalize()],
+            fasta_separator=args.fasta_separator,
+            fasta_concatenate=args.fasta_concatenate,
+            compression=compressions.get(args.compression, None),
+            compression_level=args.compression_level,
+        ),
+        parameters={param.key: getattr(args, param.key) for param in Parameter},
+        phasing_options=dict(
+            partition_subsets=args.partition_subsets,
+            chains=args.chains,
+            seed=args.seed,
+        ),
+    )
+
+
+def write_metrics(path: str, metrics: dict):
+    import json
+    import sys
+
+    if path == "-":
+        json.dump(metrics, sys.stdout, indent=2)
+        print()
+        return
+    with open(path, "w") as file:
+        json.dump(metrics, file, indent=2)
+
+
+def run_sweep(args: Namespace, paths: list[Path], grid: dict, options: dict):
+    from sys import stderr
+
+    from .task.compression import get_stem
+    from .task.headless import sweep_path, write_sweep_table
+
+    sweeps = []
+    for path in paths:
+        try:
+            rows = sweep_path(
+                path,
+                grid,
+                args.output_dir,
+                input_options=options["input_options"],
+                output_options=options["output_options"],
+                parameters=options["parameters"],
+                jobs=args.jobs,
+            )
+        except Exception as exception:
+            print(f"Failed to sweep {path}: {exception}", file=stderr)
+            error = f"{type(exception).__name__}: {exception}"
+            sweeps.append(
+                dict(input=str(path), table=None, error=error, combinations=[])
+            )
+            continue
+        table = (args.output_dir or path.parent) / f"{get_stem(path)}_sweep.tsv"
+        write_sweep_table(table, rows)
+        sweeps.append(
+            dict(input=str(path), table=str(table), error=None, combinations=rows)
+        )
+    return sweeps
+
+
+def count_sweep_failures(sweeps: list[dict]) -> int:
+    """Inputs that could not be swept and combinations that failed"""
+    return sum(
+        1 if sweep["error"] else sum(1 for row in sweep["combinations"] if row["error"])
+        for sweep in sweeps
+    )
+
+
+def run():
+    """
+    Phase all given files without showing the GUI.
+    Imports are done locally to keep startup fast.
+    """
+
+    from os import cpu_count
+    from sys import exit
+    from time import perf_counter
+
+    from .task.headless import (
+        check_output_collisions,
+        configure_handlers,
+        execute_paths,
+        get_parameters,
+    )
+
+    ts = perf_counter()
+
+    parser = get_parser()
+    args = parser.parse_args()
+    paths = expand_inputs(parser, args.inputs)
+    options = get_options(args)
+
+    try:
+        check_output_collisions(paths, args.output_dir)
+    except Exception as exception:
+        parser.error(str(exception))
+
+    configure_handlers(force=args.force, quiet=args.quiet)
+
+    jobs = args.jobs or cpu_count()
+
+    if args.sweep:
+        if args.chains > 1 or args.partition_subsets:
+            parser.error("--sweep cannot be combined with --chains or subsets")
+        grid = get_sweep_grid(parser, args.sweep)
+        args.jobs = jobs
+        sweeps = run_sweep(args, paths, grid, options)
+        failed = count_sweep_failures(sweeps)
+        metrics = dict(
+            jobs=jobs,
+            grid=grid,
+            sweeps=sweeps,
+            failed=failed,
+            seconds_total=perf_counter() - ts,
+        )
+        write_metrics(args.metrics, metrics)
+        exit(1 if failed else 0)
+
+    files = execute_paths(
+        paths,
+        args.output_dir,
+        jobs=jobs,
+        force=args.force,
+        cache_dir=args.cache_dir,
+        cache_size=args.cache_size * 2**20,
+        trace_memory=args.trace_memory,
+        **options,
+    )
+    failed = sum(1 for file in files if not file["success"])
+
+    metrics = dict(
+        jobs=jobs,
+        parameters=get_parameters(**options["parameters"]),
+        files=files,
+        succeeded=len(files) - failed,
+        failed=failed,
+        seconds_total=perf_counter() - ts,
+    )
+    write_metrics(args.metrics, metrics)
+
+    exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,135 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Persistent cache of phased data, keyed by input and parameters"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import zlib
+from hashlib import sha256
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+from itaxotools.convphase.types import PhasedSequence
+from itaxotools.taxi2.sequences import Sequences
+
+
+def get_convphase_version() -> str:
+    try:
+        return version("itaxotools-convphase")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+class PhasedCache:
+    """
+    Phased lines are stored as compressed JSON arrays, one file per key,
+    so that identifiers may contain any character.
+    The least recently used files are evicted once the total size
+    exceeds `max_size` bytes, never if it is zero. Unreadable files
+    are removed and treated as missing.
+    """
+
+    suffix = ".tsv.gz"
+    default_max_size = 512 * 2**20
+
+    def __init__(self, root: Path, max_size: int | None = None):
+        self.root = Path(root)
+        self.max_size = self.default_max_size if max_size is None else max_size
+
+    def get_key(
+        self,
+        sequences: Sequences,
+        parameters: dict[str, int | float],
+        subset_key: str | None = None,
+    ) -> str:
+        hash = sha256()
+        header = dict(
+            convphase=get_convphase_version(),
+            parameters=dict(sorted(parameters.items())),
+            subset_key=subset_key,
+        )
+        hash.update(json.dumps(header).encode())
+        for sequence in sequences:
+            subset = sequence.extras.get(subset_key, None) if subset_key else None
+            record = json.dumps([sequence.id, sequence.seq, subset or ""])
+            hash.update(b"\n" + record.encode())
+        return hash.hexdigest()
+
+    def get_path(self, key: str) -> Path:
+        return self.root / key[:2] / (key + self.suffix)
+
+    def load(self, key: str) -> list[PhasedSequence] | None:
+        path = self.get_path(key)
+        try:
+            with gzip.open(
+                path, "rt", encoding="utf-8", errors="surrogateescape"
+            ) as file:
+                phased = [PhasedSequence(*json.loads(line)) for line in file]
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, TypeError, ValueError, zlib.error):
+            path.unlink(missing_ok=True)
+            return None
+        path.touch()
+        return phased
+
+    def store(self, key: str, phased: list[PhasedSequence]):
+        path = self.get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = NamedTemporaryFile(dir=path.parent, suffix=".part", delete=False)
+        try:
+            with (
+                temp,
+                gzip.open(
+                    temp,
+                    "wt",
+                    encoding="utf-8",
+                    errors="surrogateescape",
+                    compresslevel=1,
+                ) as file,
+            ):
+                for line in phased:
+                    file.write(json.dumps([line.id, line.data_a, line.data_b]) + "\n")
+            os.replace(temp.name, path)
+        except BaseException:
+            Path(temp.name).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def evict(self):
+        if not self.max_size:
+            return
+        entries = []
+        for path in self.root.glob("*/*" + self.suffix):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,348 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Read and write compressed sequence files as streams, without temporary files"""
+
+from __future__ import annotations
+
+import io
+from functools import partial
+from pathlib import Path
+from re import fullmatch
+
+from Bio.SeqIO.FastaIO import SimpleFastaParser
+
+from itaxotools.taxi2.file_types import FileFormat, FileInfo
+from itaxotools.taxi2.handlers import FileHandler
+from itaxotools.taxi2.partitions import PartitionHandler
+from itaxotools.taxi2.sequences import Sequence, SequenceHandler
+
+from .types import Compression
+
+
+def get_compression(path: Path) -> Compression | None:
+    """Identify compressed files by their leading bytes, not their extension"""
+    with open(path, "rb") as file:
+        head = file.read(6)
+    for compression in Compression:
+        if head.startswith(compression.magic):
+            return compression
+    return None
+
+
+def open_binary(path: Path, compression: Compression) -> io.BufferedIOBase:
+    match compression:
+        case Compression.Gzip:
+            import gzip
+
+            return gzip.open(path, "rb")
+        case Compression.Bzip2:
+            import bz2
+
+            return bz2.open(path, "rb")
+        case Compression.Xz:
+            import lzma
+
+            return lzma.open(path, "rb")
+        case Compression.Zstd:
+            try:
+                import zstandard
+            except ImportError:
+                raise Exception("Reading zstd files requires the zstandard package")
+            return zstandard.open(path, "rb")
+
+
+def open_text(path: Path, **kwargs) -> io.TextIOBase:
+    """Like `open(path, "r")`, but decompresses on the fly when needed"""
+    compression = get_compression(path)
+    if compression is None:
+        return open(path, "r", **kwargs)
+    return io.TextIOWrapper(open_binary(path, compression), **kwargs)
+
+
+def open_text_writer(
+    path: Path, compression: Compression | None = None, level: int | None = None
+) -> io.TextIOBase:
+    """Like `open(path, "w")`, but compresses on the fly if requested"""
+    if compression is None:
+        return open(path, "w")
+    if level is None:
+        level = compression.default_level
+    level = min(max(level, compression.min_level), compression.max_level)
+    match compression:
+        case Compression.Gzip:
+            import gzip
+
+            return gzip.open(path, "wt", compresslevel=level)
+        case Compression.Bzip2:
+            import bz2
+
+            return bz2.open(path, "wt", compresslevel=level)
+        case Compression.Xz:
+            import lzma
+
+            return lzma.open(path, "wt", preset=level)
+        case Compression.Zstd:
+            try:
+                import zstandard
+            except ImportError:
+                raise Exception("Writing zstd files requires the zstandard package")
+            compressor = zstandard.ZstdCompressor(level=level)
+            return zstandard.open(path, "wt", cctx=compressor)
+
+
+def is_compressed(path: Path) -> bool:
+    return get_compression(path) is not None
+
+
+def get_stem(path: Path) -> str:
+    """File name without its extension, or both extensions if compressed"""
+    path = Path(path)
+    for compression in Compression:
+        if path.suffix.lower() == compression.extension:
+            return Path(path.stem).stem
+    return path.stem
+
+
+def get_extension(path: Path) -> str:
+    """Extension of the file, including any compression extension"""
+    path = Path(path)
+    return path.name[len(get_stem(path)) :]
+
+
+class CompressedTabfileRows(FileHandler.Tabular.Tabfile):
+    """
+    Same as the taxi2 tabfile, but the file is opened by `_open_file`:
+    decompressed when read and compressed as requested when written.
+    """
+
+    def _open(self, path, mode="r", compression=None, level=None, *args, **kwargs):
+        self.compression = compression
+        self.level = level
+        super()._open(path, mode, *args, **kwargs)
+
+    def _open_file(self, mode: str = "r") -> io.TextIOBase:
+        if mode == "w":
+            return open_text_writer(self.path, self.compression, self.level)
+        return open_text(self.path, encoding="utf-8", errors="surrogateescape")
+
+    def _iter_read_rows(self):
+        with self._open_file() as file:
+            for line in file:
+                line = line[:-1]
+                if not line:
+                    continue
+                yield tuple(line.split("\t"))
+
+    def _iter_write_rows(self):
+        with self._open_file("w") as file:
+            try:
+                while True:
+                    row = yield
+                    file.write("\t".join(row) + "\n")
+            except GeneratorExit:
+                return
+
+
+class CompressedTabfile(SequenceHandler.Tabfile):
+    subhandler = CompressedTabfileRows
+
+    def _open(self, path, mode="r", compression=None, level=None, *args, **kwargs):
+        self.subhandler = partial(
+            CompressedTabfileRows, compression=compression, level=level
+        )
+        super()._open(path, mode, *args, **kwargs)
+
+
+class CompressedFasta(SequenceHandler.Fasta):
+    """Same as the taxi2 fasta handler, but the file is opened by `_open_file`"""
+
+    def _open(self, path, mode="r", compression=None, level=None, *args, **kwargs):
+        self.compression = compression
+        self.level = level
+        super()._open(path, mode, *args, **kwargs)
+
+    def _open_file(self, mode: str = "r") -> io.TextIOBase:
+        if mode == "w":
+            return open_text_writer(self.path, self.compression, self.level)
+        return open_text(self.path)
+
+    def _iter_read_organism(self):
+        with self._open_file() as handle:
+            yield self
+            separator = self.organism_separator
+            for title, sequence in SimpleFastaParser(handle):
+                try:
+                    id, organism = title.split(separator, 1)
+                except ValueError:
+                    id = title
+                    organism = None
+                yield Sequence(id, sequence, extras={self.organism_tag: organism})
+
+    def _iter_read_plain(self):
+        with self._open_file() as handle:
+            yield self
+            for data in SimpleFastaParser(handle):
+                yield Sequence(*data)
+
+    def _iter_write_organism(self, line_width):
+        separator = self.organism_separator
+        with self._open_file("w") as handle:
+            try:
+                while True:
+                    sequence = yield
+                    identifier = self._get_sequence_identifier(sequence)
+                    if organism := sequence.extras.get(self.organism_tag, None):
+                        identifier += separator + organism
+                    self._write_sequence(handle, identifier, sequence, line_width)
+            except GeneratorExit:
+                return
+
+    def _iter_write_plain(self, line_width):
+        with self._open_file("w") as handle:
+            try:
+                while True:
+                    sequence = yield
+                    identifier = self._get_sequence_identifier(sequence)
+                    self._write_sequence(handle, identifier, sequence, line_width)
+            except GeneratorExit:
+                return
+
+    @staticmethod
+    def _write_sequence(handle, identifier: str, sequence: Sequence, line_width):
+        handle.write(">" + identifier + "\n")
+        if line_width:
+            for i in range(0, len(sequence.seq), line_width):
+                handle.write(sequence.seq[i : i + line_width] + "\n")
+            handle.write("\n")
+        else:
+            handle.write(sequence.seq + "\n")
+
+
+class CompressedPartitions(PartitionHandler.Fasta):
+    """The subset guesses of taxi2 for fasta files, reading through `open_text`"""
+
+    @classmethod
+    def has_subsets(cls, path: Path, separator: str = "|") -> bool:
+        if not separator:
+            return False
+        with open_text(path) as handle:
+            for title, _ in SimpleFastaParser(handle):
+                data = title.split(separator, 1)
+                return len(data) == 2
+
+    @classmethod
+    def guess_subset_separator(cls, path: Path) -> str | None:
+        separators = "|."
+        with open_text(path) as handle:
+            for title, _ in SimpleFastaParser(handle):
+                for separator in separators:
+                    if separator in title:
+                        return separator
+            return None
+
+
+def _identify_format(path: Path) -> FileFormat:
+    # same tests as taxi2 for the two formats that can be phased
+    with open_text(path) as file:
+        first = file.readline()
+        line = first
+        while line:
+            if line.strip() and not line.startswith(";"):
+                if line.startswith(">"):
+                    return FileFormat.Fasta
+                break
+            line = file.readline()
+    if fullmatch(r"([^\t]+\t)+[^\t]+", first.rstrip("\n")):
+        return FileFormat.Tabfile
+    return FileFormat.Unknown
+
+
+def _get_compressed_fasta_info(path: Path, format: FileFormat) -> FileInfo:
+    # same as taxi2.files.get_fasta_info
+    subset_separator = CompressedPartitions.guess_subset_separator(path)
+    has_subsets = CompressedPartitions.has_subsets(path, subset_separator)
+    return FileInfo.Fasta(
+        path=path,
+        format=format,
+        size=path.stat().st_size,
+        has_subsets=has_subsets,
+        subset_separator=subset_separator,
+    )
+
+
+def _get_compressed_tabfile_info(path: Path, format: FileFormat) -> FileInfo:
+    # same as taxi2.files.get_tabfile_info
+    from itaxotools.taxi2.encoding import sanitize
+
+    headers = CompressedTabfileRows(path, has_headers=True).headers
+    headers = [sanitize(header) for header in headers]
+
+    header_individuals = "seqid" if "seqid" in headers else None
+    header_sequences = "sequence" if "sequence" in headers else None
+    header_organism = "organism" if "organism" in headers else None
+    header_species = "species" if "species" in headers else None
+    header_genus = "genus" if "genus" in headers else None
+
+    species_is_binomen = False
+    if "species" in headers:
+        index = headers.index("species")
+        with CompressedTabfileRows(path, columns=[index], has_headers=True) as file:
+            first = file.read()
+            if first is not None:
+                species_is_binomen = len(first[0].split(" ")) > 1
+
+    if species_is_binomen:
+        if "organism" not in headers and "genus" not in headers:
+            header_organism = "species"
+            header_species = None
+            header_genus = None
+
+    return FileInfo.Tabfile(
+        path=path,
+        format=format,
+        size=path.stat().st_size,
+        headers=headers,
+        header_individuals=header_individuals,
+        header_sequences=header_sequences,
+        header_organism=header_organism,
+        header_species=header_species,
+        header_genus=header_genus,
+    )
+
+
+def _get_compressed_info(path: Path) -> FileInfo:
+    from itaxotools.taxi2.files import get_general_info
+
+    format = _identify_format(path)
+    match format:
+        case FileFormat.Tabfile:
+            return _get_compressed_tabfile_info(path, format)
+        case FileFormat.Fasta:
+            return _get_compressed_fasta_info(path, format)
+    return get_general_info(path, format)
+
+
+def get_file_info(path: Path) -> FileInfo:
+    """Same as `taxi2.files.get_info`, also for compressed tabfiles and fasta"""
+    from itaxotools.taxi2.files import get_info
+
+    path = Path(path)
+    if not is_compressed(path):
+        return get_info(path)
+    return _get_compressed_info(path)
@@ -0,0 +1,598 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Execute tasks without a display, Qt is never imported"""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from itertools import product
+from pathlib import Path
+from sys import stderr
+from time import monotonic, perf_counter
+from typing import Callable
+
+from itaxotools.common.utility import AttrDict
+from itaxotools.taxi2.file_types import FileFormat, FileInfo
+
+from .progress import RateTracker
+from .store import SequenceStore
+from .types import Compression, OutputFormat, Parameter, Results
+
+
+class Aborted(Exception):
+    pass
+
+
+def configure_handlers(
+    force: bool = False, quiet: bool = False, report_interval: float = 5.0
+):
+    """
+    Stand in for the worker loop hooks used by `process.execute`.
+    Progress is printed with its throughput when a stage starts or ends,
+    and in between once `report_interval` seconds passed since the last.
+    """
+    import itaxotools
+
+    last_text = None
+    last_print = 0.0
+    trackers: dict[object, RateTracker] = {}
+
+    def progress_handler(text, value=0, minimum=0, maximum=0):
+        nonlocal last_text, last_print
+        if quiet:
+            return
+        tracker = trackers.setdefault(text, RateTracker())
+        tracker.update(value, maximum)
+        now = monotonic()
+        final = maximum and value >= maximum
+        if text != last_text or final or now - last_print >= report_interval:
+            summary = tracker.summary()
+            summary = f" ({summary})" if summary else ""
+            print(f"{text}: {value}/{maximum}{summary}", file=stderr)
+            last_print = now
+        last_text = text
+
+    def get_feedback(warns: list[str]):
+        for warn in warns:
+            print(f"WARNING: {warn}", file=stderr)
+        return force
+
+    def abort():
+        raise Aborted("Problems detected with input file, use --force to proceed")
+
+    itaxotools.progress_handler = progress_handler
+    itaxotools.get_feedback = get_feedback
+    itaxotools.abort = abort
+
+
+def _header_get(headers: list[str], field: str | None):
+    try:
+        return headers.index(field)
+    except ValueError:
+        return -1
+
+
+def get_input_sequences(
+    info: FileInfo,
+    index_column: str | None = None,
+    sequence_column: str | None = None,
+    subset_column: str | None = None,
+    parse_organism: bool | None = None,
+) -> AttrDict:
+    """Mirrors the defaults of the matching `InputModel`"""
+    match info.format:
+        case FileFormat.Tabfile:
+            return _get_tabfile_input_sequences(
+                info, index_column, sequence_column, subset_column
+            )
+        case FileFormat.Fasta:
+            return _get_fasta_input_sequences(info, parse_organism)
+    raise Exception(f"Unsupported input format: {info.format.label}")
+
+
+def _get_tabfile_input_sequences(
+    info: FileInfo.Tabfile,
+    index_header: str | None,
+    sequence_header: str | None,
+    subset_header: str | None,
+) -> AttrDict:
+    headers = info.headers
+    index_column = _header_get(headers, index_header or info.header_individuals)
+    sequence_column = _header_get(headers, sequence_header or info.header_sequences)
+    if subset_header is not None:
+        subset_column = _header_get(headers, subset_header)
+    else:
+        species_column = _header_get(headers, "species")
+        genera_column = _header_get(headers, "genera")
+        subset_column = species_column if species_column >= 0 else genera_column
+
+    if index_column < 0 or sequence_column < 0:
+        raise Exception(f"Cannot determine identifier and sequence columns: {headers}")
+    if len(set([index_column, sequence_column, subset_column])) < 3:
+        raise Exception("Identifier, sequence and subset columns must be distinct")
+
+    columns = set(range(len(headers)))
+    columns -= {index_column, sequence_column, subset_column}
+
+    return AttrDict(
+        name=f"Sequences from {info.path.name}",
+        info=info,
+        has_subsets=subset_column >= 0,
+        has_extras=bool(columns),
+        index_column=index_column,
+        sequence_column=sequence_column,
+        subset_column=subset_column,
+    )
+
+
+def _get_fasta_input_sequences(
+    info: FileInfo.Fasta,
+    parse_organism: bool | None,
+) -> AttrDict:
+    if parse_organism is None:
+        parse_organism = info.has_subsets
+
+    return AttrDict(
+        name=f"Sequences from {info.path.name}",
+        info=info,
+        has_subsets=parse_organism,
+        has_extras=False,
+        file_has_subsets=info.has_subsets,
+        parse_organism=parse_organism,
+        subset_separator=info.subset_separator,
+    )
+
+
+def get_output_options(
+    input_sequences: AttrDict,
+    format: OutputFormat = OutputFormat.Mimic,
+    fasta_separator: str | None = None,
+    fasta_concatenate: bool = False,
+    compression: Compression | None = None,
+    compression_level: int | None = None,
+) -> AttrDict:
+    """Mirrors the defaults of `OutputOptionsModel`"""
+    info = input_sequences.info
+    if fasta_separator is None:
+        fasta_separator = "|"
+        if info.format == FileFormat.Fasta and info.subset_separator in ["|", "."]:
+            fasta_separator = info.subset_separator
+
+    if compression is not None and compression_level is None:
+        compression_level = compression.default_level
+
+    return AttrDict(
+        format=format,
+        fasta_separator=fasta_separator,
+        fasta_concatenate=fasta_concatenate,
+        compression=compression,
+        compression_level=compression_level,
+    )
+
+
+def get_phasing_options(
+    input_sequences: AttrDict,
+    partition_subsets: bool = False,
+    chains: int = 1,
+    seed: int | None = None,
+) -> AttrDict:
+    """Mirrors `PhasingOptionsModel.as_dict`"""
+    return AttrDict(
+        partition_subsets=partition_subsets and input_sequences.has_subsets,
+        chains=chains,
+        seed=seed,
+    )
+
+
+def get_parameters(**kwargs) -> AttrDict:
+    """Mirrors `Parameters.as_dict`, missing values fall back to defaults"""
+    parameters = AttrDict()
+    for param in Parameter:
+        value = kwargs.get(param.key, None)
+        parameters[param.key] = param.default if value is None else value
+    return parameters
+
+
+def execute_path(
+    path: Path,
+    output_dir: Path | None = None,
+    input_options: dict | None = None,
+    output_options: dict | None = None,
+    parameters: dict | None = None,
+    phasing_options: dict | None = None,
+    cache_dir: Path | None = None,
+    cache_size: int | None = None,
+    trace_memory: bool = False,
+) -> Results:
+    from . import process
+    from .compression import get_file_info
+
+    info = get_file_info(path)
+    input_sequences = get_input_sequences(info, **(input_options or {}))
+    work_dir = output_dir or path.parent
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    return process.execute(
+        work_dir=work_dir,
+        input_sequences=input_sequences,
+        output_options=get_output_options(input_sequences, **(output_options or {})),
+        parameters=get_parameters(**(parameters or {})),
+        phasing_options=get_phasing_options(input_sequences, **(phasing_options or {})),
+        cache_dir=cache_dir,
+        cache_size=cache_size,
+        trace_memory=trace_memory,
+    )
+
+
+def get_sweep_combinations(
+    parameters: dict, grid: dict[str, list[int | float]]
+) -> list[AttrDict]:
+    """All parameter sets of the grid, later keys vary fastest"""
+    keys = list(grid.keys())
+    return [
+        AttrDict(parameters, **dict(zip(keys, values)))
+        for values in product(*grid.values())
+    ]
+
+
+def _execute_sweep_combination(
+    output_path: Path,
+    sequences: SequenceStore,
+    input_sequences: AttrDict,
+    output_options: AttrDict,
+    parameters: AttrDict,
+) -> tuple[float, int]:
+    from .work import (
+        get_output_file_handler,
+        get_output_sequence_ambiguity_count,
+        get_phased_lines,
+        get_phased_sequences,
+        iter_written_sequences,
+    )
+
+    ts = perf_counter()
+    phased = get_phased_lines(sequences, parameters)
+    phased_sequences = get_phased_sequences(sequences, phased)
+    with get_output_file_handler(output_path, output_options, input_sequences) as file:
+        written_sequences = iter_written_sequences(file, phased_sequences)
+        ambiguous = get_output_sequence_ambiguity_count(written_sequences)
+    return perf_counter() - ts, ambiguous
+
+
+def _get_sweep_row(
+    index: int,
+    parameters: AttrDict,
+    output_path: Path,
+    outcome: tuple[float, int] | None,
+    error: Exception | None,
+) -> dict:
+    row = dict(index=index)
+    row.update(parameters)
+    row.update(
+        seconds_taken=None,
+        ambiguous=None,
+        output=None,
+        error=None if error is None else f"{type(error).__name__}: {error}",
+    )
+    if outcome is not None:
+        seconds_taken, ambiguous = outcome
+        row.update(
+            seconds_taken=seconds_taken,
+            ambiguous=ambiguous,
+            output=str(output_path),
+        )
+    return row
+
+
+def sweep_path(
+    path: Path,
+    grid: dict[str, list[int | float]],
+    output_dir: Path | None = None,
+    input_options: dict | None = None,
+    output_options: dict | None = None,
+    parameters: dict | None = None,
+    jobs: int = 1,
+) -> list[dict]:
+    """
+    Phase the same input once for every combination of the parameter grid.
+    The input is parsed and scanned only once, then shared by all runs.
+    """
+    import itaxotools
+
+    from .compression import get_extension, get_file_info, get_stem
+    from .work import (
+        _initialize_partition_worker,
+        get_input_sequence_warnings,
+        get_output_file_name,
+        get_sequence_store,
+    )
+
+    info = get_file_info(path)
+    input_sequences = get_input_sequences(info, **(input_options or {}))
+    output_options = get_output_options(input_sequences, **(output_options or {}))
+    work_dir = output_dir or path.parent
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    sequences = get_sequence_store(input_sequences)
+    warns = get_input_sequence_warnings(sequences)
+    if warns and not itaxotools.get_feedback(warns):
+        itaxotools.abort()
+
+    combinations = get_sweep_combinations(get_parameters(**(parameters or {})), grid)
+    name = Path(get_output_file_name(output_options, input_sequences))
+    output_paths = [
+        work_dir / f"{get_stem(name)}_{index:03}{get_extension(name)}"
+        for index in range(len(combinations))
+    ]
+    common = (sequences, input_sequences, output_options)
+
+    tasks = list(enumerate(zip(output_paths, combinations)))
+    done = 0
+
+    def report(index: int, outcome, exception: Exception | None):
+        nonlocal done
+        if exception is not None:
+            print(f"Failed combination {index}: {exception}", file=stderr)
+        done += 1
+        itaxotools.progress_handler("Sweeping parameters", done, maximum=len(tasks))
+
+    # even a single job runs apart, as the backend may exit on bad parameters
+    itaxotools.progress_handler("Sweeping parameters", 0, maximum=len(tasks))
+    calls = [
+        (_execute_sweep_combination, (output_path, *common, combination), {})
+        for _, (output_path, combination) in tasks
+    ]
+    outcomes = execute_isolating_crashes(
+        calls, max(jobs, 1), _initialize_partition_worker, (), report
+    )
+
+    return [
+        _get_sweep_row(index, combination, output_path, *outcome)
+        for (index, (output_path, combination)), outcome in zip(tasks, outcomes)
+    ]
+
+
+_started_calls = None
+
+
+def _initialize_tracked_worker(started, initializer, initargs):
+    global _started_calls
+    _started_calls = started
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _execute_tracked(index: int, function: Callable, args: tuple, kwargs: dict):
+    _started_calls.put(index)
+    return function(*args, **kwargs)
+
+
+def execute_isolating_crashes(
+    calls: list[tuple[Callable, tuple, dict]],
+    jobs: int,
+    initializer: Callable | None = None,
+    initargs: tuple = (),
+    report: Callable[[int, object, Exception | None], None] | None = None,
+) -> list[tuple[object, Exception | None]]:
+    """
+    Run each `(function, args, kwargs)` on a pool of `jobs` processes and
+    return `(result, exception)` pairs in order. A process that dies, for
+    example killed for memory, breaks the whole pool: calls that had not
+    started yet are then resubmitted to a fresh pool, while those that had
+    started are retried one at a time until the one that crashed is found.
+    Only that call fails. `report` is called as each call finishes.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+
+    context = multiprocessing.get_context()
+    outcomes: list[tuple[object, Exception | None]] = [(None, None)] * len(calls)
+
+    def finish(index: int, outcome: tuple[object, Exception | None]):
+        outcomes[index] = outcome
+        if report is not None:
+            report(index, *outcome)
+
+    pending = list(range(len(calls)))
+    suspects = []
+    while pending or suspects:
+        if pending:
+            batch, workers, pending = pending, jobs, []
+        else:
+            batch, workers = [suspects.pop(0)], 1
+
+        # written directly to a pipe, so it is not lost if the process dies
+        started = context.SimpleQueue()
+        broken = None
+        unfinished = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_initialize_tracked_worker,
+            initargs=(started, initializer, initargs),
+        ) as executor:
+            futures = {
+                executor.submit(_execute_tracked, index, *calls[index]): index
+                for index in batch
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    finish(index, (future.result(), None))
+                except BrokenProcessPool as exception:
+                    broken = exception
+                    unfinished.append(index)
+                except Exception as exception:
+                    finish(index, (None, exception))
+        if broken is None:
+            continue
+
+        indexes = set()
+        while not started.empty():
+            indexes.add(started.get())
+        crashed = [index for index in unfinished if index in indexes]
+        waiting = [index for index in unfinished if index not in indexes]
+        if not crashed:
+            # the pool broke before anything started, retrying would not help
+            for index in waiting:
+                finish(index, (None, broken))
+        elif len(crashed) == 1:
+            finish(crashed[0], (None, broken))
+            pending.extend(waiting)
+        else:
+            suspects.extend(crashed)
+            pending.extend(waiting)
+    return outcomes
+
+
+def write_sweep_table(path: Path, rows: list[dict]):
+    import csv
+
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]), delimiter="\t")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def get_metrics(
+    path: Path,
+    results: Results | None,
+    error: Exception | None,
+    seconds_total: float | None,
+) -> dict:
+    metrics = dict(
+        input=str(path),
+        output=None,
+        success=results is not None,
+        ambiguous=None,
+        warning=None,
+        seconds_taken=None,
+        seconds_total=seconds_total,
+        error=None if error is None else f"{type(error).__name__}: {error}",
+    )
+    if results is not None:
+        metrics.update(
+            output=str(results.output_info.path),
+            output_size=results.output_info.size,
+            ambiguous=results.ambiguous,
+            warning=results.warning,
+            seconds_taken=results.seconds_taken,
+            cached=results.cached,
+            timings=results.timings,
+            memory=results.memory,
+        )
+    if results is not None and results.agreement is not None:
+        metrics.update(agreement=asdict(results.agreement))
+    return metrics
+
+
+def _execute_path_safely(
+    path: Path, *args, **kwargs
+) -> tuple[Results | None, Exception | None, float]:
+    ts = perf_counter()
+    try:
+        results = execute_path(path, *args, **kwargs)
+    except Exception as exception:
+        print(f"Failed to phase {path}: {exception}", file=stderr)
+        return None, exception, perf_counter() - ts
+    return results, None, perf_counter() - ts
+
+
+def _execute_paths_serial(paths: list[Path], args, kwargs) -> list[tuple]:
+    import itaxotools
+
+    outcomes = []
+    for index, path in enumerate(paths):
+        itaxotools.progress_handler("Phasing files", index, maximum=len(paths))
+        outcomes.append(_execute_path_safely(path, *args, **kwargs))
+    itaxotools.progress_handler("Phasing files", len(paths), maximum=len(paths))
+    return outcomes
+
+
+def _execute_paths_parallel(
+    paths: list[Path], jobs: int, force: bool, args, kwargs
+) -> list[tuple]:
+    import itaxotools
+
+    done = 0
+
+    def report(index: int, outcome, exception: Exception | None):
+        nonlocal done
+        if exception is not None:
+            print(f"Failed to phase {paths[index]}: {exception}", file=stderr)
+        done += 1
+        itaxotools.progress_handler("Phasing files", done, maximum=len(paths))
+
+    itaxotools.progress_handler("Phasing files", 0, maximum=len(paths))
+    calls = [(_execute_path_safely, (path, *args), kwargs) for path in paths]
+    outcomes = execute_isolating_crashes(
+        calls, jobs, configure_handlers, (force, True), report
+    )
+    return [
+        outcome if exception is None else (None, exception, None)
+        for outcome, exception in outcomes
+    ]
+
+
+def get_output_collisions(
+    paths: list[Path], output_dir: Path | None = None
+) -> list[list[Path]]:
+    """
+    Group the inputs that would write to the same output files. Outputs and
+    logs are named after the stem, which leaves out the directory, the format
+    and the compression of the input.
+    """
+    from .compression import get_stem
+
+    outputs: dict[tuple[Path, str], list[Path]] = {}
+    for path in paths:
+        key = ((output_dir or path.parent).resolve(), get_stem(path))
+        outputs.setdefault(key, []).append(path)
+    return [group for group in outputs.values() if len(group) > 1]
+
+
+def check_output_collisions(paths: list[Path], output_dir: Path | None = None):
+    if collisions := get_output_collisions(paths, output_dir):
+        groups = "; ".join(
+            ", ".join(str(path) for path in group) for group in collisions
+        )
+        raise Exception(f"Inputs would overwrite each other's output: {groups}")
+
+
+def execute_paths(
+    paths: list[Path],
+    output_dir: Path | None = None,
+    *args,
+    jobs: int = 1,
+    force: bool = False,
+    **kwargs,
+) -> list[dict]:
+    """
+    Phase all paths, using a pool of `jobs` processes if more than one.
+    Failures are recorded in the summary and do not stop the batch,
+    inputs that would overwrite each other are refused before it starts.
+    """
+    check_output_collisions(paths, output_dir)
+    args = (output_dir, *args)
+    if jobs > 1 and len(paths) > 1:
+        outcomes = _execute_paths_parallel(paths, jobs, force, args, kwargs)
+    else:
+        outcomes = _execute_paths_serial(paths, args, kwargs)
+    return [get_metrics(path, *outcome) for path, outcome in zip(paths, outcomes)]
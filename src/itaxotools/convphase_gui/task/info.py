@@ -0,0 +1,148 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Build output file info from the written records, without reading it back"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from itaxotools.common.types import Type
+from itaxotools.taxi2.encoding import sanitize
+from itaxotools.taxi2.file_types import FileFormat, FileInfo
+from itaxotools.taxi2.sequences import Sequence
+
+
+class OutputInfoBuilder(Type):
+    """
+    Observes each record as it is written and gives the same result
+    as `taxi2.files.get_info` would for the finished file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def add(self, sequence: Sequence):
+        raise NotImplementedError()
+
+    def get_info(self) -> FileInfo:
+        raise NotImplementedError()
+
+
+class Tabfile(OutputInfoBuilder):
+    def __init__(self, path: Path, idHeader: str, seqHeader: str):
+        super().__init__(path)
+        self.id_header = idHeader
+        self.seq_header = seqHeader
+        self.headers = None
+        self.first_row = None
+
+    def add(self, sequence: Sequence):
+        if self.headers is not None:
+            return
+        self.headers = [self.id_header, *sequence.extras.keys(), self.seq_header]
+        self.first_row = [sequence.id, *sequence.extras.values(), sequence.seq]
+
+    def get_info(self) -> FileInfo:
+        headers = self.headers or [self.id_header, self.seq_header]
+        headers = [sanitize(header) for header in headers]
+
+        header_individuals = "seqid" if "seqid" in headers else None
+        header_sequences = "sequence" if "sequence" in headers else None
+        header_organism = "organism" if "organism" in headers else None
+        header_species = "species" if "species" in headers else None
+        header_genus = "genus" if "genus" in headers else None
+
+        species_is_binomen = False
+        if "species" in headers and self.first_row is not None:
+            species = self.first_row[headers.index("species")] or ""
+            species_is_binomen = len(species.split(" ")) > 1
+
+        if species_is_binomen:
+            if "organism" not in headers and "genus" not in headers:
+                header_organism = "species"
+                header_species = None
+                header_genus = None
+
+        return FileInfo.Tabfile(
+            path=self.path,
+            format=FileFormat.Tabfile,
+            size=self.path.stat().st_size,
+            headers=headers,
+            header_individuals=header_individuals,
+            header_sequences=header_sequences,
+            header_organism=header_organism,
+            header_species=header_species,
+            header_genus=header_genus,
+        )
+
+
+class Fasta(OutputInfoBuilder):
+    separators = "|."
+
+    def __init__(
+        self,
+        path: Path,
+        write_organism: bool = False,
+        concatenate_extras: list[str] = [],
+        organism_separator: str = "|",
+        organism_tag: str = "organism",
+    ):
+        super().__init__(path)
+        self.write_organism = write_organism
+        self.concatenate_extras = concatenate_extras
+        self.organism_separator = organism_separator
+        self.organism_tag = organism_tag
+        self.first_title = None
+        self.subset_separator = None
+
+    def get_title(self, sequence: Sequence) -> str:
+        extras = (sequence.extras[tag] for tag in self.concatenate_extras)
+        title = "_".join((sequence.id, *extras))
+        if self.write_organism:
+            if organism := sequence.extras.get(self.organism_tag, None):
+                title += self.organism_separator + organism
+        return title
+
+    def add(self, sequence: Sequence):
+        if self.first_title is not None and self.subset_separator is not None:
+            return
+        title = self.get_title(sequence)
+        if self.first_title is None:
+            self.first_title = title
+        for separator in self.separators:
+            if separator in title:
+                self.subset_separator = separator
+                break
+
+    def get_info(self) -> FileInfo:
+        size = self.path.stat().st_size
+        if self.first_title is None:
+            # an empty file is not recognized as fasta
+            return FileInfo(path=self.path, format=FileFormat.Unknown, size=size)
+
+        separator = self.subset_separator
+        has_subsets = bool(separator) and len(self.first_title.split(separator, 1)) == 2
+
+        return FileInfo.Fasta(
+            path=self.path,
+            format=FileFormat.Fasta,
+            size=size,
+            has_subsets=has_subsets,
+            subset_separator=separator,
+        )
@@ -0,0 +1,151 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Random access to the lines of a large text file without reading it all"""
+
+from __future__ import annotations
+
+import mmap
+from pathlib import Path
+
+import numpy as np
+
+
+class LineIndex:
+    """
+    Maps the file into memory and records where each line starts.
+    Lines are only decoded when requested, and searches run on the raw
+    bytes, so memory use does not grow with the size of the file.
+    """
+
+    encoding = "utf-8"
+    chunk_size = 1 << 24
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = self._open(path)
+        self.size = self.file.seek(0, 2)
+        self.data = b""
+        if self.size:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.starts = self._get_line_starts()
+
+    @staticmethod
+    def _open(path: Path):
+        # compressed results are unpacked to an anonymous file that can be mapped
+        from .compression import get_compression, open_binary
+
+        compression = get_compression(path)
+        if compression is None:
+            return open(path, "rb")
+
+        from shutil import copyfileobj
+        from tempfile import TemporaryFile
+
+        file = TemporaryFile()
+        with open_binary(path, compression) as source:
+            copyfileobj(source, file)
+        file.flush()
+        return file
+
+    def _get_line_starts(self) -> np.ndarray:
+        # newlines are located one chunk at a time to bound temporary memory
+        chunks = [np.zeros(1, dtype=np.int64)]
+        for offset in range(0, self.size, self.chunk_size):
+            chunk = np.frombuffer(
+                self.data,
+                dtype=np.uint8,
+                count=min(self.chunk_size, self.size - offset),
+                offset=offset,
+            )
+            chunks.append(np.flatnonzero(chunk == ord("\n")) + offset + 1)
+        starts = np.concatenate(chunks)
+        if starts[-1] == self.size:
+            starts = starts[:-1]
+        return starts
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def get_line_span(self, index: int) -> tuple[int, int]:
+        start = int(self.starts[index])
+        end = int(self.starts[index + 1]) if index + 1 < len(self.starts) else self.size
+        while end > start and self.data[end - 1 : end] in (b"\n", b"\r"):
+            end -= 1
+        return start, end
+
+    def get_line(self, index: int) -> str:
+        start, end = self.get_line_span(index)
+        return self.data[start:end].decode(self.encoding, errors="replace")
+
+    def get_line_at(self, position: int) -> int:
+        """Index of the line containing the given byte position"""
+        return int(np.searchsorted(self.starts, position, side="right")) - 1
+
+    def find(self, text: str, line: int = 0) -> int | None:
+        """First line from the given one that contains the text, wrapping around"""
+        if not len(self) or not text:
+            return None
+        pattern = text.encode(self.encoding)
+        line = min(max(line, 0), len(self) - 1)
+        start = int(self.starts[line])
+        position = self.data.find(pattern, start)
+        if position < 0:
+            position = self.data.find(pattern, 0, start + len(pattern) - 1)
+        if position < 0:
+            return None
+        return self.get_line_at(position)
+
+    def find_id(self, id: str) -> int | None:
+        """First line of the record with the given identifier, for tabfile or fasta"""
+        if not len(self) or not id:
+            return None
+        first = None
+        for prefix, separators in [("", "\t"), (">", "\n\r|_.")]:
+            pattern = (prefix + id).encode(self.encoding)
+            position = self._find_line_prefix(pattern, separators.encode())
+            if position is not None and (first is None or position < first):
+                first = position
+        return None if first is None else self.get_line_at(first)
+
+    def _find_line_prefix(self, pattern: bytes, separators: bytes) -> int | None:
+        position = 0 if self.data[: len(pattern)] == pattern else None
+        start = 0
+        while True:
+            if position is not None:
+                end = position + len(pattern)
+                after = self.data[end : end + 1]
+                if not after or after in separators:
+                    return position
+            found = self.data.find(b"\n" + pattern, start)
+            if found < 0:
+                return None
+            position = found + 1
+            start = found + 1
@@ -18,9 +18,9 @@
 
 from PySide6 import QtCore
 
-from datetime import datetime
+from dataclasses import replace
+from itertools import count
 from pathlib import Path
-from shutil import copyfile
 
 from itaxotools.common.bindings import (
     Binder,
@@ -30,18 +30,37 @@ from itaxotools.common.bindings import (
     PropertyObject,
 )
 from itaxotools.common.utility import AttrDict
-from itaxotools.taxi_gui.loop import DataQuery
+from itaxotools.taxi_gui.loop import (
+    DataQuery,
+    ReportDone,
+    ReportExit,
+    ReportFail,
+    ReportProgress,
+    ReportStop,
+)
 from itaxotools.taxi_gui.model.tasks import SubtaskModel, TaskModel
 from itaxotools.taxi_gui.tasks.common.model import (
     FileInfoSubtaskModel,
     ImportedInputModel,
 )
+from itaxotools.taxi_gui.threading import Worker
 from itaxotools.taxi_gui.types import FileFormat, FileInfo, Notification
 from itaxotools.taxi_gui.utility import human_readable_seconds
 
-from . import process
+from . import process, strings
 from .input import InputModel
-from .types import OutputFormat, Parameter
+from .pool import WarmWorker
+from .progress import RateTracker
+from .storage import WorkStorage
+from .transfer import transfer_file
+from .types import (
+    AmbiguityIndex,
+    Compression,
+    JobStatus,
+    OutputFormat,
+    Parameter,
+    ProgressStage,
+)
 
 
 class Parameters(EnumObject):
@@ -63,6 +82,9 @@ class OutputOptionsModel(PropertyObject):
     fasta_separator = Property(str, "|")
     fasta_concatenate = Property(bool, False)
 
+    compression = Property(Compression, None)
+    compression_level = Property(int, 6)
+
     fasta_config_visible = Property(bool, False)
     fasta_separator_visible = Property(bool, False)
     fasta_concatenate_visible = Property(bool, False)
@@ -79,6 +101,7 @@ class OutputOptionsModel(PropertyObject):
         self.object = object
 
         self.binder.bind(self.properties.format, self._update_fasta_config_visible)
+        self.binder.bind(self.properties.compression, self._update_compression_level)
 
         if object is None:
             return
@@ -119,10 +142,404 @@ class OutputOptionsModel(PropertyObject):
         visible = self._check_fasta_config_visible()
         self.fasta_config_visible = visible
 
+    def _update_compression_level(self, compression: Compression | None):
+        if compression is not None:
+            self.compression_level = compression.default_level
+
     def as_dict(self):
         return AttrDict({p.key: p.value for p in self.properties})
 
 
+class PhasingOptionsModel(PropertyObject):
+    partition_subsets = Property(bool, False)
+    partition_subsets_visible = Property(bool, False)
+    chains = Property(int, 1)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.binder = Binder()
+
+    def set_input_object(self, object):
+        self.binder.unbind_all()
+        if object is None:
+            self.partition_subsets_visible = False
+            return
+        self.binder.bind(
+            object.properties.has_subsets, self.properties.partition_subsets_visible
+        )
+
+    def as_dict(self):
+        return AttrDict(
+            partition_subsets=self.partition_subsets and self.partition_subsets_visible,
+            chains=self.chains,
+            seed=None,
+        )
+
+
+class CompressedFileInfoSubtaskModel(FileInfoSubtaskModel):
+    """Also recognizes tabfiles and fasta files that are compressed"""
+
+    def start(self, path: Path):
+        SubtaskModel.start(self, process.get_file_info, path)
+
+
+class JobModel(PropertyObject):
+    """
+    A single input of the queue, with its own copy of the options.
+    Without `input_sequences`, the columns are detected when it runs.
+    """
+
+    status = Property(JobStatus, JobStatus.Pending)
+    progress = Property(str, "")
+    message = Property(str, "")
+
+    parameters = Property(Parameters, Instance)
+    output_options = Property(OutputOptionsModel, Instance)
+    phasing_options = Property(PhasingOptionsModel, Instance)
+
+    phased_path = Property(Path, None)
+    phased_info = Property(FileInfo, None)
+    seconds_taken = Property(float, None)
+    timings = Property(dict, None)
+    saved_path = Property(Path, None)
+
+    def __init__(self, path: Path, input_sequences: AttrDict | None = None):
+        super().__init__()
+        self.path = Path(path)
+        self.input_sequences = input_sequences
+        self.number = 0
+        self.work_dir = None
+        self.result_name = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({repr(self.name)})"
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    def copy_options(self, task: "Model"):
+        """Take over the current options of the task"""
+        for source, destination in [
+            (task.parameters, self.parameters),
+            (task.output_options, self.output_options),
+            (task.phasing_options, self.phasing_options),
+        ]:
+            for property in source.properties:
+                destination.properties[property.key].value = property.value
+
+    def get_options(self) -> dict:
+        # partitioning is decided once the input is known
+        return dict(
+            output_options=self.output_options.as_dict(),
+            parameters=self.parameters.as_dict(),
+            phasing_options=AttrDict(
+                partition_subsets=self.phasing_options.partition_subsets,
+                chains=self.phasing_options.chains,
+            ),
+        )
+
+    def reset(self):
+        self.status = JobStatus.Pending
+        self.progress = ""
+        self.message = ""
+        self.phased_path = None
+        self.phased_info = None
+        self.seconds_taken = None
+        self.timings = None
+        self.saved_path = None
+
+    @property
+    def saved(self) -> bool:
+        return self.saved_path is not None
+
+    @property
+    def suggested_results(self) -> Path:
+        return self.path.parent / self.result_name
+
+    def save(self, destination: Path):
+        # same as for the task, the first save moves the file out
+        destination = Path(destination)
+        move = self.phased_path.is_relative_to(self.work_dir)
+        method = transfer_file(self.phased_path, destination, move=move)
+        if method == "rename":
+            self.phased_info = replace(self.phased_info, path=destination)
+            self.phased_path = destination
+        self.saved_path = destination
+
+
+class JobQueueModel(PropertyObject):
+    """
+    Runs jobs on up to `max_workers` worker processes at once, in the
+    order they were added. Each worker keeps its process between jobs.
+    Input warnings are accepted without asking and noted on the job,
+    as nobody may be around to answer while the queue runs.
+    """
+
+    notification = QtCore.Signal(Notification)
+    jobs_changed = QtCore.Signal()
+    job_changed = QtCore.Signal(int)
+
+    max_workers = Property(int, 1)
+    running = Property(bool, False)
+    summary = Property(str, "")
+
+    def __init__(self, task: "Model"):
+        super().__init__()
+        self.task = task
+        self.jobs: list[JobModel] = []
+        self.workers: list[Worker] = []
+        self.active: dict[int, tuple[JobModel, Worker]] = {}
+        self.stopping: set[Worker] = set()
+        self.counter = count(1)
+        self.binder = Binder()
+        self.binder.bind(self.properties.max_workers, self.schedule)
+        self.update_summary()
+
+    def _matches_active_id(self, report) -> bool:
+        return getattr(report, "id", None) in self.active
+
+    def add(self, job: JobModel):
+        job.number = next(self.counter)
+        self.jobs.append(job)
+        self.jobs_changed.emit()
+        self.update_summary()
+        self.schedule()
+
+    def remove(self, jobs: list[JobModel]):
+        """Running jobs are left alone, stop the queue first"""
+        for job in jobs:
+            if job in self.jobs and job.status != JobStatus.Running:
+                self.jobs.remove(job)
+        self.jobs_changed.emit()
+        self.update_summary()
+
+    def retry(self, jobs: list[JobModel]):
+        for job in jobs:
+            if job.status in [
+                JobStatus.Failed,
+                JobStatus.Cancelled,
+                JobStatus.Discarded,
+            ]:
+                job.reset()
+                self._notify_changed(job)
+        self.update_summary()
+        self.schedule()
+
+    def start(self):
+        if not self.get_jobs(JobStatus.Pending):
+            return
+        self.running = True
+        self.schedule()
+
+    def stop(self):
+        """Cancel running jobs, pending jobs stay in the queue"""
+        self.running = False
+        for _, worker in list(self.active.values()):
+            # a process that is still starting is stopped once it started
+            self.stopping.add(worker)
+            worker.reset()
+
+    def close(self):
+        self.stop()
+        for worker in self.workers:
+            worker.quit()
+        self.workers.clear()
+
+    def get_jobs(self, *statuses: JobStatus) -> list[JobModel]:
+        return [job for job in self.jobs if job.status in statuses]
+
+    def schedule(self):
+        """Start pending jobs on idle workers, as far as the limit allows"""
+        self._trim_workers()
+        if not self.running:
+            return
+        for job in self.get_jobs(JobStatus.Pending):
+            if len(self.active) >= self.max_workers:
+                break
+            self._run(job, self._get_idle_worker())
+        if not self.active:
+            self.running = False
+            self._notify_finished()
+
+    def _get_idle_worker(self) -> Worker:
+        busy = [worker for _, worker in self.active.values()]
+        for worker in self.workers:
+            if worker not in busy:
+                return worker
+
+        # daemons cannot have children, which phasing subsets needs
+        worker = Worker(
+            name=f"{self.task.name} queue #{len(self.workers) + 1}",
+            eager=False,
+            daemon=False,
+            log_path=self.task.temporary_path,
+        )
+        condition = self._matches_active_id
+        self.binder.bind(worker.done, self.onDone, condition=condition)
+        self.binder.bind(worker.fail, self.onFail, condition=condition)
+        self.binder.bind(worker.error, self.onError, condition=condition)
+        self.binder.bind(worker.stop, self.onStop, condition=condition)
+        self.binder.bind(worker.query, self.onQuery, condition=condition)
+        self.binder.bind(
+            worker.progress, lambda report: self.onProgress(worker, report)
+        )
+        self.binder.bind(worker.process_started, lambda: self.onProcessStarted(worker))
+        self.workers.append(worker)
+        return worker
+
+    def _trim_workers(self):
+        # idle processes beyond the limit only hold on to memory
+        busy = [worker for _, worker in self.active.values()]
+        for worker in list(self.workers):
+            if len(self.workers) <= self.max_workers:
+                break
+            if worker not in busy:
+                self.workers.remove(worker)
+                worker.quit()
+
+    def _run(self, job: JobModel, worker: Worker):
+        # retried jobs get a new directory, the old one may be evicted
+        self.task.storage.unpin(job.work_dir)
+        job.work_dir = self.task.storage.create(f"job{job.number:03}")
+        job.reset()
+        job.status = JobStatus.Running
+        self.active[id(job)] = (job, worker)
+        self._notify_changed(job)
+        self.update_summary()
+
+        worker.exec(
+            id(job),
+            process.execute_job,
+            work_dir=job.work_dir,
+            path=job.path,
+            input_sequences=job.input_sequences,
+            cache_dir=self.task.cache_path,
+            progress_rate=self.task.progress_rate,
+            **job.get_options(),
+        )
+
+    def _finish(self, report, status: JobStatus, message: str = ""):
+        job, worker = self.active.pop(report.id)
+        self.stopping.discard(worker)
+        self.task.storage.unpin(job.work_dir)
+        job.status = status
+        job.progress = ""
+        if message:
+            job.message = message
+        self._notify_changed(job)
+        self.update_summary()
+        self.schedule()
+        return job
+
+    def _notify_changed(self, job: JobModel):
+        if job in self.jobs:
+            self.job_changed.emit(self.jobs.index(job))
+
+    def _notify_finished(self):
+        done = len(self.get_jobs(JobStatus.Done, JobStatus.Warned))
+        failed = len(self.get_jobs(JobStatus.Failed))
+        if not done and not failed:
+            return
+        text = f"Job queue finished: {done} done, {failed} failed."
+        if failed or self.get_jobs(JobStatus.Warned):
+            self.notification.emit(Notification.Warn(text))
+        else:
+            self.notification.emit(Notification.Info(text))
+
+    def update_summary(self):
+        counts = [
+            (status, len(self.get_jobs(status)))
+            for status in JobStatus
+            if self.get_jobs(status)
+        ]
+        if not counts:
+            self.summary = "No jobs in the queue"
+            return
+        self.summary = ", ".join(
+            f"{number} {status.label.lower()}" for status, number in counts
+        )
+
+    def discard(self, work_dir: Path):
+        """Forget unsaved results that were evicted from storage"""
+        for job in self.jobs:
+            if job.work_dir != work_dir or job.phased_path is None:
+                continue
+            if not job.phased_path.is_relative_to(work_dir):
+                continue
+            if job.saved:
+                # saved copies are still there to be saved again
+                job.phased_info = replace(job.phased_info, path=job.saved_path)
+                job.phased_path = job.saved_path
+                self._notify_changed(job)
+                continue
+            job.phased_path = None
+            job.phased_info = None
+            job.status = JobStatus.Discarded
+            job.message = "Unsaved results were removed to free temporary space"
+            self._notify_changed(job)
+        self.update_summary()
+
+    def onDone(self, report: ReportDone):
+        job, _ = self.active[report.id]
+        result = report.result
+        job.phased_path = result.output_info.path
+        job.phased_info = result.output_info
+        job.result_name = result.output_info.path.name
+        job.seconds_taken = result.seconds_taken
+        job.timings = result.timings
+        message = result.warning
+        if result.cached:
+            message = message or "Reused cached results"
+        status = JobStatus.Warned if result.ambiguous else JobStatus.Done
+        self._finish(report, status, message)
+
+    def onFail(self, report: ReportFail):
+        self._finish(report, JobStatus.Failed, str(report.exception))
+
+    def onError(self, report: ReportExit):
+        message = f"Process failed with exit code: {report.exit_code}"
+        self._finish(report, JobStatus.Failed, message)
+
+    def onStop(self, report: ReportStop):
+        self._finish(report, JobStatus.Cancelled, "Cancelled by user.")
+
+    def onQuery(self, query: DataQuery):
+        job, worker = self.active[query.id]
+        job.message = "Proceeded despite input problems: " + "; ".join(query.data)
+        self._notify_changed(job)
+        worker.answer(True)
+
+    def onProcessStarted(self, worker: Worker):
+        if worker in self.stopping:
+            worker.reset()
+
+    def onProgress(self, worker: Worker, report: ReportProgress):
+        for job, active_worker in self.active.values():
+            if active_worker is worker and isinstance(report.text, ProgressStage):
+                job.progress = f"{report.text.label} {report.value}/{report.maximum}"
+                self._notify_changed(job)
+
+    def save(self, job: JobModel, destination: Path):
+        job.save(destination)
+        self._notify_changed(job)
+
+    def save_many(self, jobs: list[JobModel], directory: Path) -> int:
+        """Save the results of the given jobs in a folder, returns how many"""
+        names = set()
+        saved = 0
+        for job in jobs:
+            if not job.status.has_results:
+                continue
+            name = job.result_name
+            if name in names:
+                name = f"{job.number:03}_{name}"
+            names.add(name)
+            self.save(job, Path(directory) / name)
+            saved += 1
+        return saved
+
+
 class Model(TaskModel):
     task_name = "ConvPhase"
 
@@ -132,6 +549,7 @@ class Model(TaskModel):
     parameters = Property(Parameters, Instance)
 
     output_options = Property(OutputOptionsModel, Instance)
+    phasing_options = Property(PhasingOptionsModel, Instance)
 
     phased_path = Property(Path, None)
     phased_info = Property(FileInfo, None)
@@ -139,20 +557,51 @@ class Model(TaskModel):
 
     phased_ambiguous = Property(bool, False)
     phased_warning = Property(str, "")
+    phased_ambiguity = Property(AmbiguityIndex, None)
+    phased_timings = Property(dict, None)
+    phased_memory = Property(dict, None)
+
+    trace_memory = Property(bool, False)
 
     def __init__(self, name=None):
-        super().__init__(name)
+        super().__init__(name, daemon=False)
+        # subsets may be phased on child processes of the worker,
+        # which keeps warm spares from the start instead of being replaced
+        self.replace_worker(
+            WarmWorker(
+                name=self.name,
+                eager=True,
+                daemon=False,
+                log_path=self.temporary_path,
+                initializer=process.initialize,
+            )
+        )
         self.can_open = True
         self.can_save = True
 
+        self.cache_path = self._get_cache_path()
+        self.progress_rate = 10.0
+        self.progress_trackers = {"matrix": RateTracker(), "mcmc": RateTracker()}
+
+        self.queue = JobQueueModel(self)
+        self.binder.bind(self.queue.notification, self.notification)
+
+        self.storage = WorkStorage(self.temporary_path, on_evict=self.queue.discard)
+        self.work_dir = None
+        self.result_name = None
+
         self.subtask_init = SubtaskModel(self, bind_busy=False)
 
-        self.subtask_sequences = FileInfoSubtaskModel(self)
+        self.subtask_sequences = CompressedFileInfoSubtaskModel(self)
         self.binder.bind(self.subtask_sequences.done, self.input_sequences.add_info)
 
         self.binder.bind(
             self.input_sequences.properties.object, self.output_options.set_input_object
         )
+        self.binder.bind(
+            self.input_sequences.properties.object,
+            self.phasing_options.set_input_object,
+        )
         self.binder.bind(self.input_sequences.notification, self.notification)
 
         self.binder.bind(self.query, self.on_query)
@@ -162,6 +611,46 @@ class Model(TaskModel):
 
         self.subtask_init.start(process.initialize)
 
+    def replace_worker(self, worker: Worker):
+        """Quit the worker created by the base class and bind the given one"""
+        slots = [
+            ("done", self.onDone),
+            ("fail", self.onFail),
+            ("error", self.onError),
+            ("stop", self.onStop),
+            ("query", self.query.emit),
+        ]
+        for signal, slot in slots:
+            self.binder.unbind(getattr(self.worker, signal), slot)
+        self.binder.unbind(self.worker.progress, self.progression.emit)
+        QtCore.QCoreApplication.instance().aboutToQuit.disconnect(self.worker.quit)
+        self.worker.quit()
+        # the thread may only start its process after being told to quit
+        self.worker.reset()
+        if self.worker.process is not None:
+            self.worker.process.join()
+
+        self.worker = worker
+        for signal, slot in slots:
+            self.binder.bind(
+                getattr(worker, signal), slot, condition=self._matches_report_id
+            )
+        self.binder.bind(worker.progress, self.onProgress)
+
+    def onProgress(self, report):
+        # trackers are updated first, the view reads them for each report
+        if isinstance(report.text, ProgressStage):
+            tracker = self.progress_trackers[report.text.step]
+            tracker.update(report.value, report.maximum)
+        self.progression.emit(report)
+
+    @staticmethod
+    def _get_cache_path() -> Path:
+        location = QtCore.QStandardPaths.writableLocation(
+            QtCore.QStandardPaths.GenericCacheLocation
+        )
+        return Path(location) / "itaxotools" / "convphase"
+
     def isReady(self):
         if not self.input_sequences.is_valid():
             return False
@@ -169,16 +658,21 @@ class Model(TaskModel):
 
     def start(self):
         super().start()
-        timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
-        work_dir = self.temporary_path / timestamp
-        work_dir.mkdir()
+        for tracker in self.progress_trackers.values():
+            tracker.reset()
+        self.storage.unpin(self.work_dir)
+        self.work_dir = self.storage.create("run")
 
         self.exec(
             process.execute,
-            work_dir=work_dir,
+            work_dir=self.work_dir,
             input_sequences=self.input_sequences.as_dict(),
             output_options=self.output_options.as_dict(),
             parameters=self.parameters.as_dict(),
+            phasing_options=self.phasing_options.as_dict(),
+            cache_dir=self.cache_path,
+            progress_rate=self.progress_rate,
+            trace_memory=self.trace_memory,
         )
 
     def on_query(self, query: DataQuery):
@@ -194,6 +688,12 @@ class Model(TaskModel):
 
     def onDone(self, report):
         time_taken = human_readable_seconds(report.result.seconds_taken)
+        if report.result.cached:
+            time_taken += " (reused cached results)"
+        if report.result.timings:
+            time_taken += f".\n{self.get_timing_summary(report.result.timings)}"
+        if report.result.agreement is not None:
+            time_taken += f".\n{report.result.agreement.summary()}"
         if report.result.ambiguous:
             self.notification.emit(
                 Notification.Warn(
@@ -208,26 +708,76 @@ class Model(TaskModel):
             )
         self.phased_info = report.result.output_info
         self.phased_path = report.result.output_info.path
+        self.result_name = report.result.output_info.path.name
         self.phased_time = report.result.seconds_taken
         self.phased_ambiguous = report.result.ambiguous
         self.phased_warning = report.result.warning
+        self.phased_ambiguity = report.result.ambiguity
+        self.phased_timings = report.result.timings
+        self.phased_memory = report.result.memory
         self.busy = False
         self.done = True
 
+    @staticmethod
+    def get_timing_summary(timings: dict[str, float], count: int = 3) -> str:
+        ordered = sorted(timings.items(), key=lambda item: item[1], reverse=True)
+        return "Slowest stages: " + ", ".join(
+            f"{strings.stage_labels.get(stage, stage)} {seconds:.2f}s"
+            for stage, seconds in ordered[:count]
+        )
+
     def clear(self):
+        # results that are no longer shown may be evicted
+        self.storage.unpin(self.work_dir)
         self.phased_info = None
         self.phased_path = None
         self.phased_time = None
         self.phased_ambiguous = False
         self.phased_warning = ""
+        self.phased_ambiguity = None
+        self.phased_timings = None
+        self.phased_memory = None
         self.done = False
 
     def open(self, path):
         self.clear()
         self.subtask_sequences.start(path)
 
+    def close(self):
+        self.queue.close()
+        super().close()
+
+    def add_job(self):
+        """Queue the current input with a copy of the current options"""
+        object = self.input_sequences.object
+        job = JobModel(object.info.path, self.input_sequences.as_dict())
+        job.copy_options(self)
+        self.queue.add(job)
+
+    def add_job_files(self, paths: list[Path]):
+        """Queue each file with a copy of the current options"""
+        for path in paths:
+            job = JobModel(path)
+            job.copy_options(self)
+            self.queue.add(job)
+
+    def save_job(self, job: JobModel, destination: Path):
+        self.queue.save(job, destination)
+        self.notification.emit(Notification.Info("Saved file successfully!"))
+
+    def save_jobs(self, jobs: list[JobModel], directory: Path):
+        saved = self.queue.save_many(jobs, directory)
+        self.notification.emit(Notification.Info(f"Saved {saved} files successfully!"))
+
     def save(self, destination: Path):
-        copyfile(self.phased_path, destination)
+        # the first save moves the result out of the work directory,
+        # later saves must leave the previous destination in place
+        destination = Path(destination)
+        move = self.phased_path.is_relative_to(self.temporary_path)
+        method = transfer_file(self.phased_path, destination, move=move)
+        if method == "rename":
+            self.phased_info = replace(self.phased_info, path=destination)
+            self.phased_path = destination
         self.notification.emit(Notification.Info("Saved file successfully!"))
 
     def get_output_format(self):
@@ -241,6 +791,6 @@ class Model(TaskModel):
 
     @property
     def suggested_results(self):
-        format = self.get_output_format()
+        # named after the file that was written, options may have changed since
         path = self.input_sequences.object.info.path
-        return path.parent / f"{path.stem}_phased{format.extension}"
+        return path.parent / self.result_name
@@ -0,0 +1,211 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Keep worker processes initialized in advance, so runs never wait for imports"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from queue import Empty
+from time import monotonic
+from typing import Callable
+
+from itaxotools.common.utility import override
+from itaxotools.taxi_gui.loop import Command, ReportDone, loop
+from itaxotools.taxi_gui.threading import Worker
+
+
+@dataclass
+class WarmProcess:
+    process: mp.Process
+    pipe_out: Connection
+    commands: Connection
+    results: Connection
+    reports: Connection
+    queries: Connection
+    started: float
+    warm: bool = False
+
+    def drain(self):
+        # progress and output of the warm-up are not shown anywhere
+        for connection in [self.reports, self.pipe_out]:
+            try:
+                while connection.poll():
+                    connection.recv()
+            except (EOFError, OSError):
+                pass
+
+    def close(self):
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        for connection in [
+            self.pipe_out,
+            self.commands,
+            self.results,
+            self.reports,
+            self.queries,
+        ]:
+            connection.close()
+
+
+class WarmWorker(Worker):
+    """
+    Same as the taxi_gui worker, but also keeps spare processes that
+    already ran `initializer`. Whenever the active process has to be
+    replaced, for example after the user stops a run, a healthy spare
+    takes over at once and a new spare starts warming up.
+
+    Spares are checked every `check_interval` seconds while the worker
+    is idle. Those that died, failed to initialize or took longer than
+    `warm_timeout` seconds are discarded and replaced.
+    """
+
+    def __init__(
+        self,
+        *args,
+        initializer: Callable,
+        spares: int = 1,
+        check_interval: float = 5.0,
+        warm_timeout: float = 120.0,
+        **kwargs,
+    ):
+        # the thread starts from within the parent constructor
+        self.initializer = initializer
+        self.spare_count = spares
+        self.check_interval = check_interval
+        self.warm_timeout = warm_timeout
+        self.spares: deque[WarmProcess] = deque()
+        super().__init__(*args, **kwargs)
+
+    @override
+    def run(self):
+        with self.open_log("all.log"):
+            if self.eager:
+                self.process_start()
+            while not self.quitting:
+                try:
+                    task = self.queue.get(timeout=self.check_interval)
+                except Empty:
+                    self.check_spares()
+                    continue
+                if task is None:
+                    break
+                if self.process is None or not self.process.is_alive():
+                    self.process_start()
+                with self.open_log(f"{str(task.id)}.log"):
+                    self.commands.send(task)
+                    report = self.loop(task)
+                    self.handle_report(report)
+
+    @override
+    def process_start(self):
+        """Internal. Take over a warm process and start warming a spare"""
+        self.resetting = False
+        warm = self.take_spare()
+        self.process = warm.process
+        self.pipe_out = warm.pipe_out
+        self.commands = warm.commands
+        self.results = warm.results
+        self.reports = warm.reports
+        self.queries = warm.queries
+        self.check_spares()
+        self.process_started.emit()
+
+    @override
+    def quit(self):
+        """Also kills the spare processes"""
+        super().quit()
+        # the thread may have taken over a process after being told to quit
+        self.reset()
+        while self.spares:
+            self.spares.popleft().close()
+
+    def spawn(self, warm_up: bool = True) -> WarmProcess:
+        pipe_out_read, pipe_out = mp.Pipe(duplex=False)
+        commands, commands_write = mp.Pipe(duplex=False)
+        results_read, results = mp.Pipe(duplex=False)
+        reports_read, reports = mp.Pipe(duplex=False)
+        queries_parent, queries = mp.Pipe(duplex=True)
+        process = mp.Process(
+            target=loop,
+            daemon=self.daemon,
+            name=self.name,
+            args=(commands, results, reports, queries, pipe_out),
+        )
+        process.start()
+        warm = WarmProcess(
+            process=process,
+            pipe_out=pipe_out_read,
+            commands=commands_write,
+            results=results_read,
+            reports=reports_read,
+            queries=queries_parent,
+            started=monotonic(),
+            warm=not warm_up,
+        )
+        if warm_up:
+            warm.commands.send(Command(0, self.initializer, [], {}))
+        return warm
+
+    def check_warm(self, warm: WarmProcess, timeout: float = 0) -> bool:
+        """Whether the process is alive and done initializing within `timeout`"""
+        if not warm.warm:
+            remaining = warm.started + self.warm_timeout - monotonic()
+            ready = wait(
+                [warm.results, warm.process.sentinel],
+                max(0, min(timeout, remaining)),
+            )
+            if warm.results not in ready:
+                # still warming up is only healthy when not waiting for it
+                warming = not ready and remaining > 0
+                return warming and timeout == 0
+            try:
+                report = warm.results.recv()
+            except EOFError:
+                return False
+            if not isinstance(report, ReportDone):
+                return False
+            warm.warm = True
+        warm.drain()
+        return warm.process.is_alive()
+
+    def check_spares(self):
+        """Internal. Replace spares that are no longer healthy"""
+        for spare in list(self.spares):
+            if not self.check_warm(spare):
+                self.spares.remove(spare)
+                spare.close()
+        while len(self.spares) < self.spare_count:
+            self.spares.append(self.spawn())
+
+    def take_spare(self) -> WarmProcess:
+        # a spare still warming up is waited for, it is ahead of a new one
+        while self.spares:
+            spare = self.spares.popleft()
+            if self.check_warm(spare, self.warm_timeout):
+                return spare
+            spare.close()
+        spare = self.spawn()
+        if self.check_warm(spare, self.warm_timeout):
+            return spare
+        spare.close()
+        return self.spawn(warm_up=False)
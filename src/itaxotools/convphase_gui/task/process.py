@@ -24,6 +24,7 @@ from time import perf_counter, sleep
 
 from itaxotools.common.utility import AttrDict
 
+from .timing import StageTimer
 from .types import Results
 
 
@@ -34,28 +35,228 @@ def initialize():
     from . import work  # noqa
 
 
+def get_file_info(path: Path):
+    from .compression import get_file_info
+
+    return get_file_info(path)
+
+
+def _get_phased_lines(
+    sequences: iter,
+    parameters: AttrDict,
+    subset_key: str | None,
+    cache_dir: Path | None,
+    cache_size: int | None,
+    timer: StageTimer,
+) -> tuple[iter, bool]:
+    from .cache import PhasedCache
+    from .work import get_phased_lines, get_phased_lines_by_subset
+
+    cache = None
+    if cache_dir is not None:
+        with timer.stage("cache"):
+            cache = PhasedCache(cache_dir, cache_size)
+            cache_key = cache.get_key(sequences, parameters, subset_key)
+            phased = cache.load(cache_key)
+        if phased is not None:
+            print("Using cached phased data, skipping MCMC", file=stderr)
+            return phased, True
+
+    if subset_key is not None:
+        with timer.stage("phase"):
+            phased = get_phased_lines_by_subset(sequences, parameters, subset_key)
+    else:
+        # progress callbacks switch this to "mcmc" once the matrix is done,
+        # the backend runs eagerly, only the lines it yields are left lazy
+        with timer.stage("matrix"):
+            phased = get_phased_lines(sequences, parameters)
+
+    if cache is not None:
+        # the cache needs every line, so only then are they all kept
+        phased = list(phased)
+        with timer.stage("cache"):
+            try:
+                cache.store(cache_key, phased)
+            except OSError as e:
+                print(f"Could not cache phased data: {e}", file=stderr)
+
+    return phased, False
+
+
+def get_partial_run_log(
+    output_path: Path,
+    parameters: AttrDict,
+    timer: StageTimer,
+    stage: str | None,
+    error: str | None = None,
+) -> dict:
+    """What is known so far of a run that has not completed (yet)"""
+    from .timing import get_peak_rss
+
+    return dict(
+        output=str(output_path),
+        parameters=dict(parameters),
+        completed=False,
+        last_stage=stage,
+        error=error,
+        timings=timer.as_dict(),
+        memory=timer.memory_as_dict(),
+        peak_rss=get_peak_rss(),
+        peak_rss_children=get_peak_rss(children=True),
+    )
+
+
+def get_run_log(results: Results, parameters: AttrDict) -> dict:
+    from dataclasses import asdict
+
+    from .timing import get_peak_rss
+
+    return dict(
+        output=str(results.output_info.path),
+        parameters=dict(parameters),
+        completed=True,
+        seconds_taken=results.seconds_taken,
+        cached=results.cached,
+        timings=results.timings,
+        memory=results.memory,
+        peak_rss=get_peak_rss(),
+        peak_rss_children=get_peak_rss(children=True),
+        agreement=None if results.agreement is None else asdict(results.agreement),
+        input_scan=results.input_scan,
+        ambiguity=None if results.ambiguity is None else asdict(results.ambiguity),
+    )
+
+
+def write_run_log(path: Path, log: dict):
+    import json
+    import os
+
+    # replaced as a whole, a crash while writing keeps the previous log
+    temporary = path.with_name(path.name + ".tmp")
+    try:
+        with open(temporary, "w") as file:
+            json.dump(log, file, indent=2)
+        os.replace(temporary, path)
+    except OSError as e:
+        print(f"Could not write run log: {e}", file=stderr)
+
+
 def execute(
     work_dir: Path,
     input_sequences: AttrDict,
     output_options: AttrDict,
     parameters: AttrDict,
-) -> tuple[Path, float]:
+    phasing_options: AttrDict | None = None,
+    cache_dir: Path | None = None,
+    cache_size: int | None = None,
+    progress_rate: float | None = 10.0,
+    trace_memory: bool = False,
+) -> Results:
+    from .compression import get_stem
+    from .work import get_output_file_name
+
+    # the log is rewritten after every stage, so that a run that gets
+    # killed, for example when out of memory, still leaves a record
+    output_path = work_dir / get_output_file_name(output_options, input_sequences)
+    log_path = output_path.with_name(get_stem(output_path) + ".log.json")
+    last_stage = None
+
+    def checkpoint(stage: str):
+        nonlocal last_stage
+        last_stage = stage
+        log = get_partial_run_log(output_path, parameters, timer, stage)
+        write_run_log(log_path, log)
+
+    timer = StageTimer(trace_memory=trace_memory, on_exit=checkpoint)
+    try:
+        results = _execute(
+            timer,
+            work_dir,
+            input_sequences,
+            output_options,
+            parameters,
+            phasing_options,
+            cache_dir,
+            cache_size,
+            progress_rate,
+        )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        log = get_partial_run_log(output_path, parameters, timer, last_stage, error)
+        write_run_log(log_path, log)
+        raise
+    finally:
+        timer.close()
+
+    write_run_log(log_path, get_run_log(results, parameters))
+
+    return results
+
+
+def execute_job(
+    work_dir: Path,
+    path: Path,
+    input_sequences: AttrDict | None,
+    output_options: AttrDict,
+    parameters: AttrDict,
+    phasing_options: AttrDict,
+    cache_dir: Path | None = None,
+    progress_rate: float | None = 10.0,
+) -> Results:
+    """
+    Same as `execute` for a job of the queue. Jobs added as files
+    have no input configuration yet, columns are detected like for
+    headless batches and subset partitioning applies if available.
+    """
+    from .headless import get_input_sequences, get_phasing_options
+
+    if input_sequences is None:
+        input_sequences = get_input_sequences(get_file_info(path))
+
+    return execute(
+        work_dir=work_dir,
+        input_sequences=input_sequences,
+        output_options=output_options,
+        parameters=parameters,
+        phasing_options=get_phasing_options(input_sequences, **phasing_options),
+        cache_dir=cache_dir,
+        progress_rate=progress_rate,
+    )
+
+
+def _execute(
+    timer: StageTimer,
+    work_dir: Path,
+    input_sequences: AttrDict,
+    output_options: AttrDict,
+    parameters: AttrDict,
+    phasing_options: AttrDict | None,
+    cache_dir: Path | None,
+    cache_size: int | None,
+    progress_rate: float | None,
+) -> Results:
     from itaxotools import abort, get_feedback
 
     from .work import (
         configure_progress_callbacks,
-        get_file_info,
-        get_input_sequence_warnings,
+        get_chain_seeds,
+        get_input_scan,
+        get_output_ambiguity_index,
+        get_output_ambiguity_warning,
         get_output_file_handler,
         get_output_file_name,
-        get_output_sequence_ambiguity,
+        get_output_info_builder,
+        get_phased_chains,
         get_phased_sequences,
-        get_sequences_from_model,
+        get_sequence_store,
+        get_subset_key,
+        iter_written_sequences,
+        merge_phased_chains,
     )
 
     ts = perf_counter()
 
-    configure_progress_callbacks()
+    configure_progress_callbacks(timer, progress_rate)
 
     output_path = work_dir / "out"
 
@@ -69,8 +270,13 @@ def execute(
     # which results in garbled error messages. just sleep for now...
     sleep(0.1)
 
-    sequences = get_sequences_from_model(input_sequences)
-    warns = get_input_sequence_warnings(sequences)
+    # the input file is parsed once, every later stage reads from the store
+    with timer.stage("parse"):
+        sequences = get_sequence_store(input_sequences)
+    with timer.stage("scan"):
+        scan = get_input_scan(sequences)
+        warns = [str(w) for w in scan.get_warnings()]
+    print(f"Input: {scan.summary()}", file=stderr)
 
     tm = perf_counter()
 
@@ -81,24 +287,65 @@ def execute(
 
     tx = perf_counter()
 
-    phased_sequences = get_phased_sequences(sequences, parameters)
+    subset_key = None
+    if phasing_options and phasing_options.partition_subsets:
+        subset_key = get_subset_key(input_sequences)
+        print(f"Phasing each subset of {subset_key!r} independently", file=stderr)
+
+    chains = phasing_options.chains if phasing_options else 1
 
-    ambiguous, warning = get_output_sequence_ambiguity(phased_sequences)
+    cached = False
+    agreement = None
+    if chains > 1:
+        # independent chains are the point, never reuse a previous run
+        seeds = get_chain_seeds(chains, phasing_options.seed)
+        print(f"Running {chains} chains with seeds: {seeds}", file=stderr)
+        with timer.stage("phase"):
+            phased_chains = get_phased_chains(sequences, parameters, seeds, subset_key)
+        with timer.stage("merge"):
+            phased, agreement = merge_phased_chains(phased_chains, seeds)
+        print(f"Consensus phasing: {agreement.summary()}", file=stderr)
+    else:
+        phased, cached = _get_phased_lines(
+            sequences, parameters, subset_key, cache_dir, cache_size, timer
+        )
+
+    phased_sequences = timer.iter("join", get_phased_sequences(sequences, phased))
 
     output_path = work_dir / get_output_file_name(output_options, input_sequences)
 
     write_handler = get_output_file_handler(
         output_path, output_options, input_sequences
     )
+    # output info is gathered while writing, no need to read the file back
+    info = get_output_info_builder(output_path, output_options, input_sequences)
 
+    # each sequence is written as it streams into the chunked ambiguity scan
     with write_handler as file:
-        for sequence in phased_sequences:
-            file.write(sequence)
+        written_sequences = iter_written_sequences(file, phased_sequences, info)
+        written_sequences = timer.iter("write", written_sequences)
+        with timer.stage("ambiguity"):
+            ambiguity = get_output_ambiguity_index(written_sequences)
+    ambiguous = bool(ambiguity)
+    warning = get_output_ambiguity_warning(ambiguity)
+    if ambiguous:
+        print(f"Output: {ambiguity.summary()}", file=stderr)
 
-    output_info = get_file_info(output_path)
+    output_info = info.get_info()
 
     tf = perf_counter()
 
     print("Phasing completed successfully!", file=stderr)
 
-    return Results(output_info, ambiguous, warning, tm - ts + tf - tx)
+    return Results(
+        output_info,
+        ambiguous,
+        warning,
+        tm - ts + tf - tx,
+        cached,
+        agreement,
+        timer.as_dict(),
+        timer.memory_as_dict(),
+        scan.as_dict(),
+        ambiguity,
+    )
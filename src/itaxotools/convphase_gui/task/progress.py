@@ -0,0 +1,133 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Keep progress reports from flooding the pipe and estimate when stages finish"""
+
+from __future__ import annotations
+
+from collections import deque
+from time import monotonic
+from typing import Callable
+
+from .types import ProgressStage
+
+
+class ProgressThrottle:
+    """
+    Forwards progress reports to `handler`, but no more than `rate`
+    per second for each stage. The first report of a stage, a changed
+    maximum and the final value always go through, so the bars never
+    stay short of complete.
+    A `rate` of None or zero forwards everything.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[ProgressStage, int, int], None],
+        rate: float | None = 10.0,
+    ):
+        self.handler = handler
+        self.interval = 1 / rate if rate else 0.0
+        self._sent: dict[ProgressStage, tuple[float, int]] = {}
+
+    def __call__(self, stage: ProgressStage, value: int, maximum: int):
+        now = monotonic()
+        if value >= maximum:
+            # the stage may start over, e.g. for the next subset
+            self._sent.pop(stage, None)
+            self.handler(stage, value, maximum)
+            return
+        if stage in self._sent:
+            sent, sent_maximum = self._sent[stage]
+            if maximum == sent_maximum and now - sent < self.interval:
+                return
+        self._sent[stage] = (now, maximum)
+        self.handler(stage, value, maximum)
+
+
+def format_duration(seconds: float) -> str:
+    """Compact clock format, e.g. 42s, 3:07 or 1:02:07"""
+    seconds = round(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    m, s = divmod(seconds, 60)
+    h, m = divmod(m, 60)
+    if h:
+        return f"{h}:{m:02}:{s:02}"
+    return f"{m}:{s:02}"
+
+
+class RateTracker:
+    """
+    Follows the reports of a single stage and measures its throughput
+    over the last `window` seconds, which adapts to stages that speed up
+    or slow down better than an average since the start. Starts over
+    when the maximum changes or the value goes back.
+    """
+
+    def __init__(self, window: float = 10.0):
+        self.window = window
+        self.samples: deque[tuple[float, int]] = deque()
+        self.maximum = 0
+
+    def reset(self):
+        self.samples.clear()
+        self.maximum = 0
+
+    def update(self, value: int, maximum: int, now: float | None = None):
+        now = monotonic() if now is None else now
+        if maximum != self.maximum or (self.samples and value < self.value):
+            self.reset()
+        self.maximum = maximum
+        self.samples.append((now, value))
+        # keep one sample at or beyond the window edge to span all of it
+        while len(self.samples) > 2 and now - self.samples[1][0] >= self.window:
+            self.samples.popleft()
+
+    @property
+    def value(self) -> int:
+        return self.samples[-1][1] if self.samples else 0
+
+    @property
+    def rate(self) -> float | None:
+        """Items per second, None until there are two reports to compare"""
+        if len(self.samples) < 2:
+            return None
+        (first, start), (last, end) = self.samples[0], self.samples[-1]
+        if last <= first:
+            return None
+        return (end - start) / (last - first)
+
+    @property
+    def remaining(self) -> float | None:
+        """Estimated seconds until the maximum is reached"""
+        rate = self.rate
+        if not rate or rate < 0:
+            return None
+        return max(0, self.maximum - self.value) / rate
+
+    def summary(self) -> str:
+        """Throughput and time left, empty until there is some progress"""
+        rate = self.rate
+        if not rate:
+            return ""
+        speed = f"{rate:.3g} it/s" if rate < 1000 else f"{rate:.0f} it/s"
+        remaining = self.remaining
+        if remaining is None or self.value >= self.maximum:
+            return speed
+        return f"{speed}, {format_duration(remaining)} left"
@@ -0,0 +1,243 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Vectorized sequence scans over the bytes of a sequence store"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import IntEnum
+
+import numpy as np
+
+from itaxotools.convphase.types import PhaseWarning
+from itaxotools.taxi2.sequences import Sequence
+
+from .store import SequenceStore, missing
+from .types import AmbiguityIndex, AmbiguousSequence
+
+
+class Symbol(IntEnum):
+    Nucleotide = 0
+    Ambiguity = 1
+    Missing = 2
+    Illegal = 3
+
+
+def _get_symbol_table() -> np.ndarray:
+    table = np.full(256, Symbol.Illegal, dtype=np.uint8)
+    for symbols, kind in [
+        ("ACGT", Symbol.Nucleotide),
+        ("RYKMSWBDHV", Symbol.Ambiguity),
+        ("N?-", Symbol.Missing),
+    ]:
+        for symbol in symbols + symbols.lower():
+            table[ord(symbol)] = kind
+    return table
+
+
+symbol_table = _get_symbol_table()
+
+
+def _get_ambiguity_table() -> np.ndarray:
+    # same test as convphase's output scan: anything other than ACGT-
+    table = np.ones(256, dtype=bool)
+    for symbol in "ACGT-":
+        table[ord(symbol)] = False
+    return table
+
+
+ambiguity_table = _get_ambiguity_table()
+
+
+def get_symbol_classes(store: SequenceStore) -> np.ndarray:
+    """Symbol class of every byte in the store buffer"""
+    data = np.frombuffer(store.data, dtype=np.uint8)
+    return symbol_table[data]
+
+
+def _count_per_sample(classes: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # bincount over (sample, class) pairs also handles empty sequences
+    samples = np.repeat(np.arange(len(lengths), dtype=np.intp), lengths)
+    counts = np.bincount(
+        samples * len(Symbol) + classes, minlength=len(lengths) * len(Symbol)
+    )
+    return counts.reshape(len(lengths), len(Symbol))
+
+
+@dataclass
+class InputScan:
+    """Counts of ambiguity codes, missing data and illegal symbols"""
+
+    ids: list[str]
+    lengths: np.ndarray
+    sample_counts: dict[Symbol, np.ndarray]
+    column_counts: dict[Symbol, np.ndarray] | None
+    illegal_symbols: str
+    has_duplicates: bool
+    is_phased: bool
+
+    @property
+    def is_uniform(self) -> bool:
+        return self.column_counts is not None
+
+    def get_warnings(self) -> list[PhaseWarning]:
+        """Same warnings as `convphase.scan.scan_input_sequences`"""
+        if not self.ids:
+            return [PhaseWarning.Empty()]
+        warns = []
+        if len(set(self.lengths.tolist())) > 1:
+            warns.append(PhaseWarning.Length())
+        if self.sample_counts[Symbol.Missing].any():
+            warns.append(PhaseWarning.Missing())
+        if self.has_duplicates:
+            warns.append(PhaseWarning.Duplicate())
+        if self.is_phased:
+            warns.append(PhaseWarning.Phased())
+        return warns
+
+    def as_dict(self) -> dict:
+        totals = {
+            symbol.name.lower(): int(counts.sum())
+            for symbol, counts in self.sample_counts.items()
+        }
+        per_sample = {
+            symbol.name.lower(): counts.tolist()
+            for symbol, counts in self.sample_counts.items()
+            if symbol != Symbol.Nucleotide
+        }
+        per_column = None
+        if self.column_counts is not None:
+            per_column = {
+                symbol.name.lower(): counts.tolist()
+                for symbol, counts in self.column_counts.items()
+                if symbol != Symbol.Nucleotide
+            }
+        return dict(
+            samples=len(self.ids),
+            min_length=int(self.lengths.min()) if len(self.lengths) else 0,
+            max_length=int(self.lengths.max()) if len(self.lengths) else 0,
+            totals=totals,
+            illegal_symbols=self.illegal_symbols,
+            per_sample=per_sample,
+            per_column=per_column,
+        )
+
+    def summary(self) -> str:
+        totals = self.as_dict()["totals"]
+        text = (
+            f"{len(self.ids)} samples, "
+            f"{totals['ambiguity']} ambiguity codes, "
+            f"{totals['missing']} missing or gaps"
+        )
+        if self.illegal_symbols:
+            text += f", illegal symbols: {self.illegal_symbols}"
+        return text
+
+
+def scan_input_store(store: SequenceStore) -> InputScan:
+    lengths = np.diff(np.asarray(store.offsets))
+    classes = get_symbol_classes(store)
+
+    column_counts = None
+    if len(lengths) and np.all(lengths == lengths[0]):
+        # aligned input: one boolean matrix per symbol gives both axes
+        matrix = classes.reshape(len(lengths), int(lengths[0]))
+        sample_counts = {}
+        column_counts = {}
+        for symbol in Symbol:
+            mask = matrix == symbol
+            sample_counts[symbol] = np.count_nonzero(mask, axis=1)
+            column_counts[symbol] = np.count_nonzero(mask, axis=0)
+    else:
+        counts = _count_per_sample(classes, lengths)
+        sample_counts = {symbol: counts[:, symbol] for symbol in Symbol}
+
+    illegal = np.frombuffer(store.data, dtype=np.uint8)[classes == Symbol.Illegal]
+    illegal_symbols = "".join(chr(x) for x in np.unique(illegal))
+
+    # like convphase, the first record is not checked for an allele
+    alleles = store.extras.get("allele", [])[1:]
+
+    return InputScan(
+        ids=store.ids,
+        lengths=lengths,
+        sample_counts=sample_counts,
+        column_counts=column_counts,
+        illegal_symbols=illegal_symbols,
+        has_duplicates=len(set(store.ids)) != len(store.ids),
+        is_phased=any(value is not missing for value in alleles),
+    )
+
+
+class OutputAmbiguityScanner:
+    """
+    Collects output sequences in chunks and locates every ambiguous
+    position of each chunk at once, so the output can still be streamed.
+    """
+
+    def __init__(self, chunk_size: int = 1024):
+        self.chunk_size = chunk_size
+        self.chunk = SequenceStore()
+        self.index = AmbiguityIndex()
+
+    def add(self, sequence: Sequence):
+        self.chunk.append(sequence)
+        if len(self.chunk) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        chunk, self.chunk = self.chunk, SequenceStore()
+        data = np.frombuffer(chunk.data, dtype=np.uint8)
+        positions = np.flatnonzero(ambiguity_table[data])
+        if not len(positions):
+            return
+
+        offsets = np.asarray(chunk.offsets)
+        samples = np.searchsorted(offsets, positions, side="right") - 1
+        sites = positions - offsets[samples]
+        characters = data[positions].tobytes().decode("latin-1")
+
+        alleles = chunk.extras.get("allele", [])
+        boundaries = np.flatnonzero(np.diff(samples)) + 1
+        starts = [0, *boundaries.tolist()]
+        ends = [*boundaries.tolist(), len(positions)]
+        for start, end in zip(starts, ends):
+            sample = int(samples[start])
+            allele = alleles[sample] if alleles else None
+            self.index.sequences.append(
+                AmbiguousSequence(
+                    id=chunk.ids[sample],
+                    allele=None if allele is missing else allele,
+                    sites=sites[start:end].tolist(),
+                    characters=characters[start:end],
+                )
+            )
+
+    def get_index(self) -> AmbiguityIndex:
+        self.flush()
+        return self.index
+
+
+def scan_output_ambiguity(
+    sequences: iter[Sequence], chunk_size: int = 1024
+) -> AmbiguityIndex:
+    scanner = OutputAmbiguityScanner(chunk_size)
+    for sequence in sequences:
+        scanner.add(sequence)
+    return scanner.get_index()
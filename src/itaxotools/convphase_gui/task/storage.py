@@ -0,0 +1,112 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Work directories for each run, within a size and age budget"""
+
+from __future__ import annotations
+
+import shutil
+from datetime import datetime
+from pathlib import Path
+from tempfile import mkdtemp
+from time import time
+from typing import Callable
+
+
+def get_size(path: Path) -> int:
+    total = 0
+    for file in path.rglob("*"):
+        try:
+            if file.is_file():
+                total += file.stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+class WorkStorage:
+    """
+    Every run gets its own directory under `root`, unique even when
+    several start within the same second. Before a new one is made,
+    directories older than `max_age` seconds are removed, then the
+    oldest ones until all of them fit in `max_size` bytes.
+
+    Pinned directories are never removed: they belong to running jobs
+    or to the results currently shown. Results that were saved have
+    already been moved out, so what gets evicted is mostly old results
+    that nobody saved. `on_evict` is called with each removed path.
+    """
+
+    suffix = ".work"
+    default_max_size = 2 * 2**30
+    default_max_age = 24 * 3600
+
+    def __init__(
+        self,
+        root: Path,
+        max_size: int | None = None,
+        max_age: float | None = None,
+        on_evict: Callable[[Path], None] | None = None,
+    ):
+        self.root = Path(root)
+        self.max_size = max_size or self.default_max_size
+        self.max_age = max_age or self.default_max_age
+        self.on_evict = on_evict
+        self.pinned: set[Path] = set()
+
+    def create(self, name: str) -> Path:
+        """Make a new pinned directory, after making room for it"""
+        self.evict()
+        self.root.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        path = Path(
+            mkdtemp(prefix=f"{name}_{timestamp}_", suffix=self.suffix, dir=self.root)
+        )
+        self.pin(path)
+        return path
+
+    def pin(self, path: Path):
+        self.pinned.add(Path(path))
+
+    def unpin(self, path: Path | None):
+        if path is not None:
+            self.pinned.discard(Path(path))
+
+    def evict(self) -> list[Path]:
+        entries = []
+        for path in self.root.glob("*" + self.suffix):
+            try:
+                modified = path.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((modified, get_size(path), path))
+
+        total = sum(size for _, size, _ in entries)
+        now = time()
+        evicted = []
+        for modified, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if path in self.pinned:
+                continue
+            if total <= self.max_size and now - modified <= self.max_age:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            evicted.append(path)
+            if self.on_evict is not None:
+                self.on_evict(path)
+        return evicted
@@ -0,0 +1,96 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Compact in-memory storage for input sequences, parsed only once"""
+
+from __future__ import annotations
+
+from array import array
+
+from itaxotools.taxi2.sequences import Sequence
+
+
+class _Missing:
+    def __repr__(self):
+        return "<missing>"
+
+
+missing = _Missing()
+
+
+class SequenceStore:
+    """
+    Records are kept in columns instead of one object each:
+    identifiers in a list, all sequences in one contiguous byte buffer
+    indexed by offsets, and one list per extra field. Iterating yields
+    the original `Sequence` records again, as often as needed.
+    """
+
+    encoding = "utf-8"
+    errors = "surrogateescape"
+
+    def __init__(self):
+        self.ids: list[str] = []
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+        self.extras: dict[str, list[str | None | _Missing]] = {}
+
+    @classmethod
+    def from_sequences(cls, sequences: iter[Sequence]) -> SequenceStore:
+        store = cls()
+        for sequence in sequences:
+            store.append(sequence)
+        return store
+
+    def append(self, sequence: Sequence):
+        count = len(self.ids)
+        for key in sequence.extras:
+            if key not in self.extras:
+                self.extras[key] = [missing] * count
+        for key, column in self.extras.items():
+            column.append(sequence.extras.get(key, missing))
+
+        self.ids.append(sequence.id)
+        self.data += sequence.seq.encode(self.encoding, self.errors)
+        self.offsets.append(len(self.data))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get_seq(self, index: int) -> str:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.data[start:end].decode(self.encoding, self.errors)
+
+    def get_extras(self, index: int) -> dict[str, str | None]:
+        extras = {}
+        for key, column in self.extras.items():
+            value = column[index]
+            if value is not missing:
+                extras[key] = value
+        return extras
+
+    def __getitem__(self, index: int) -> Sequence:
+        return Sequence(self.ids[index], self.get_seq(index), self.get_extras(index))
+
+    def __iter__(self) -> iter[Sequence]:
+        for index in range(len(self.ids)):
+            yield self[index]
+
+    def iter_seqs(self) -> iter[str]:
+        for index in range(len(self.ids)):
+            yield self.get_seq(index)
@@ -13,3 +13,16 @@ citations = phase_citation_1 + "\n\n" + phase_citation_2 + "\n\n" + seqphase_cit
 
 homepage_url = "https://github.com/iTaxoTools/ConvPhaseGui"
 itaxotools_url = "http://itaxotools.org/"
+
+stage_labels = {
+    "scan": "Input scan",
+    "parse": "Parsing input",
+    "cache": "Result cache",
+    "matrix": "Computing matrix Q",
+    "mcmc": "MCMC resolution",
+    "phase": "Phasing in parallel",
+    "merge": "Merging chains",
+    "join": "Joining phased data",
+    "write": "Writing output",
+    "ambiguity": "Ambiguity scan",
+}
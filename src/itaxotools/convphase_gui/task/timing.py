@@ -0,0 +1,155 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Measure where time and memory go in a pipeline of interleaved generators"""
+
+from __future__ import annotations
+
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable
+
+
+def get_peak_rss(children: bool = False) -> int | None:
+    """High-water mark of resident memory in bytes, None if unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageTimer:
+    """
+    Accumulates exclusive time per stage: while a nested stage runs,
+    the enclosing stage is paused. This lets streamed stages that pull
+    from each other (parse, join, write, scan) be measured separately.
+
+    With `trace_memory`, each stage also records the peak of Python heap
+    allocations while it was running, the process RSS high-water mark
+    and how much that mark grew during the stage. Memory is sampled
+    whenever a stage is entered or left, including around every item of
+    `iter`, so that streamed stages are not charged to their consumer.
+    Tracing slows down every allocation, so it is off by default.
+
+    If given, `on_exit` is called with the name of each stage that ended,
+    except for those of `iter`.
+    """
+
+    def __init__(
+        self,
+        trace_memory: bool = False,
+        on_exit: Callable[[str], None] | None = None,
+    ):
+        self.stages: dict[str, float] = {}
+        self.memory: dict[str, dict[str, int | None]] = {}
+        self._stack: list[str] = []
+        self._tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._trace_memory = trace_memory
+        self._on_exit = on_exit
+        self._rss = get_peak_rss()
+        self._resumed = perf_counter()
+
+    def _charge(self, now: float):
+        if self._stack:
+            name = self._stack[-1]
+            self.stages[name] = self.stages.get(name, 0.0) + now - self._resumed
+        if self._trace_memory:
+            self._charge_memory()
+        self._resumed = now
+
+    def _charge_memory(self):
+        _, heap = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        rss = get_peak_rss()
+        if self._stack:
+            record = self.memory.setdefault(
+                self._stack[-1], dict(heap_peak=0, rss_peak=rss, rss_growth=0)
+            )
+            record["heap_peak"] = max(record["heap_peak"], heap)
+            if rss is not None:
+                record["rss_peak"] = rss
+                record["rss_growth"] += rss - self._rss
+        self._rss = rss
+
+    def close(self):
+        """Stop tracing memory allocations if this timer started it"""
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def enter(self, name: str):
+        self._charge(perf_counter())
+        self._stack.append(name)
+
+    def exit(self):
+        self._charge(perf_counter())
+        self._ended(self._stack.pop())
+
+    def switch(self, name: str):
+        """Replace the innermost stage, e.g. when a progress callback moves on"""
+        self._charge(perf_counter())
+        ended = self._stack[-1]
+        self._stack[-1] = name
+        self._ended(ended)
+
+    def _ended(self, name: str):
+        if self._on_exit is not None:
+            self._on_exit(name)
+            # not charged to any stage
+            self._resumed = perf_counter()
+
+    @property
+    def current(self) -> str | None:
+        return self._stack[-1] if self._stack else None
+
+    @contextmanager
+    def stage(self, name: str):
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def iter(self, name: str, iterable: iter) -> iter:
+        """Charge the time taken to produce each item to the given stage"""
+        iterator = iter(iterable)
+        while True:
+            self._charge(perf_counter())
+            self._stack.append(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._charge(perf_counter())
+                self._stack.pop()
+            yield item
+
+    def as_dict(self) -> dict[str, float]:
+        return dict(self.stages)
+
+    def memory_as_dict(self) -> dict[str, dict[str, int | None]]:
+        return {name: dict(record) for name, record in self.memory.items()}
@@ -0,0 +1,101 @@
+# -----------------------------------------------------------------------------
+# TaxiGui - GUI for Taxi2
+# Copyright (C) 2022-2023  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Place result files at their destination with as little copying as possible"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from shutil import copyfile
+from typing import Callable
+
+# from linux/fs.h, clone all extents of one file into another
+FICLONE = 0x40049409
+
+
+def _replace(destination: Path, write: Callable[[Path], None]):
+    # write next to the destination first, so an existing file is only
+    # replaced once the new one is complete and never lost on failure
+    temporary = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+    try:
+        write(temporary)
+        os.replace(temporary, destination)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+
+
+def _rename(source: Path, destination: Path):
+    os.replace(source, destination)
+
+
+def _reflink(source: Path, destination: Path):
+    import fcntl
+
+    def write(temporary: Path):
+        with open(source, "rb") as src, open(temporary, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+    _replace(destination, write)
+
+
+def _copy(source: Path, destination: Path):
+    _replace(destination, lambda temporary: copyfile(source, temporary))
+
+
+def transfer_file(source: Path, destination: Path, move: bool = False) -> str:
+    """
+    Try each method from cheapest to most expensive and return the name
+    of the one that worked. Reflinks need both paths on the same filesystem
+    and silently fall through otherwise. Hardlinks are never made, as two
+    saved files would then share their contents.
+
+    Set `move` only when the source is a private file that can be given
+    away: it may then be renamed. Otherwise the source is left untouched
+    and independent.
+
+    Returns "same" without doing anything if both paths are the same file,
+    as happens when a result that was moved out is saved there again.
+    """
+    source = Path(source)
+    destination = Path(destination)
+    if destination.exists() and os.path.samefile(source, destination):
+        return "same"
+    methods = [
+        ("rename", _rename),
+        ("reflink", _reflink),
+        ("copy", _copy),
+    ]
+    skipped = set()
+    if not move:
+        skipped |= {"rename"}
+    if os.name != "posix":
+        skipped |= {"reflink"}
+    methods = [(name, method) for name, method in methods if name not in skipped]
+
+    for name, method in methods[:-1]:
+        try:
+            method(source, destination)
+        except (OSError, NotImplementedError):
+            continue
+        return name
+
+    name, method = methods[-1]
+    method(source, destination)
+    return name
@@ -16,18 +16,95 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
 
 from itaxotools.taxi_gui.types import FileInfo
 
 
+@dataclass
+class ChainAgreement:
+    """Fraction of chains that agree with the consensus phasing"""
+
+    seeds: list[int]
+    individuals: dict[str, float]
+    sites: list[float]
+
+    @property
+    def disputed_individuals(self) -> list[str]:
+        return [id for id, value in self.individuals.items() if value < 1.0]
+
+    @property
+    def disputed_sites(self) -> list[int]:
+        return [site for site, value in enumerate(self.sites) if value < 1.0]
+
+    def summary(self) -> str:
+        return (
+            f"Across {len(self.seeds)} chains, phasing differs for "
+            f"{len(self.disputed_individuals)} of {len(self.individuals)} individuals "
+            f"and {len(self.disputed_sites)} of {len(self.sites)} sites"
+        )
+
+
+@dataclass
+class AmbiguousSequence:
+    """An output sequence with the zero-based sites that are still ambiguous"""
+
+    id: str
+    allele: str | None
+    sites: list[int]
+    characters: str
+
+    @property
+    def label(self) -> str:
+        if self.allele is None:
+            return self.id
+        return f"{self.id} ({self.allele})"
+
+
+@dataclass
+class AmbiguityIndex:
+    """Every position left ambiguous after phasing, in output order"""
+
+    sequences: list[AmbiguousSequence] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.sequences)
+
+    @property
+    def identifiers(self) -> list[str]:
+        return list(dict.fromkeys(sequence.id for sequence in self.sequences))
+
+    @property
+    def characters(self) -> str:
+        return "".join(sorted(set("".join(x.characters for x in self.sequences))))
+
+    @property
+    def sites(self) -> list[int]:
+        return sorted({site for sequence in self.sequences for site in sequence.sites})
+
+    def count(self) -> int:
+        return sum(len(sequence.sites) for sequence in self.sequences)
+
+    def summary(self) -> str:
+        return (
+            f"{self.count()} ambiguous positions remain in "
+            f"{len(self.sequences)} sequences across {len(self.sites)} sites"
+        )
+
+
 @dataclass
 class Results:
     output_info: FileInfo
     ambiguous: bool
     warning: str
     seconds_taken: float
+    cached: bool = False
+    agreement: ChainAgreement | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    memory: dict[str, dict[str, int | None]] = field(default_factory=dict)
+    input_scan: dict | None = None
+    ambiguity: AmbiguityIndex | None = None
 
 
 class Parameter(Enum):
@@ -76,3 +153,67 @@ class OutputFormat(Enum):
     Tabfile = auto()
     Fasta = auto()
     Mimic = auto()
+
+
+class Compression(Enum):
+    Gzip = ("gzip", b"\x1f\x8b", ".gz", (1, 9, 6))
+    Bzip2 = ("bzip2", b"BZh", ".bz2", (1, 9, 9))
+    Xz = ("xz", b"\xfd7zXZ\x00", ".xz", (0, 9, 6))
+    Zstd = ("zstd", b"\x28\xb5\x2f\xfd", ".zst", (1, 22, 3))
+
+    def __init__(
+        self, label: str, magic: bytes, extension: str, levels: tuple[int, int, int]
+    ):
+        self.label = label
+        self.magic = magic
+        self.extension = extension
+        self.min_level, self.max_level, self.default_level = levels
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}.{self._name_}>"
+
+
+class ProgressStage(Enum):
+    Matrix = ("Computing matrix Q", "matrix")
+    Mcmc = ("MCMC resolution", "mcmc")
+    Subsets = ("MCMC resolution (subsets)", "mcmc")
+    Chains = ("MCMC resolution (chains)", "mcmc")
+
+    def __init__(self, label: str, step: str):
+        self.label = label
+        # the stage timed by StageTimer, also picks the progress card
+        self.step = step
+
+    def __str__(self):
+        return self.label
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}.{self._name_}>"
+
+    @classmethod
+    def from_text(cls, text: str) -> "ProgressStage":
+        """Identify a progress report of the convphase extension"""
+        for stage in cls:
+            if stage.label == text:
+                return stage
+        return cls.Mcmc if "MCMC" in text else cls.Matrix
+
+
+class JobStatus(Enum):
+    Pending = "Pending"
+    Running = "Running"
+    Done = "Done"
+    Warned = "Done with warnings"
+    Failed = "Failed"
+    Cancelled = "Cancelled"
+    Discarded = "Discarded"
+
+    def __init__(self, label: str):
+        self.label = label
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}.{self._name_}>"
+
+    @property
+    def has_results(self) -> bool:
+        return self in [JobStatus.Done, JobStatus.Warned]
@@ -24,7 +24,7 @@ from itaxotools.common.utility import AttrDict
 from itaxotools.common.widgets import VLineSeparator
 from itaxotools.taxi_gui import app
 from itaxotools.taxi_gui.tasks.common.view import InputSelector, ProgressCard
-from itaxotools.taxi_gui.types import FileFormat
+from itaxotools.taxi_gui.types import FileFormat, FileInfo
 from itaxotools.taxi_gui.utility import human_readable_size
 from itaxotools.taxi_gui.view.animations import VerticalRollAnimation
 from itaxotools.taxi_gui.view.cards import Card
@@ -40,7 +40,21 @@ from itaxotools.taxi_gui.view.widgets import (
 )
 
 from . import strings
-from .types import OutputFormat, Parameter
+from .types import (
+    AmbiguityIndex,
+    Compression,
+    JobStatus,
+    OutputFormat,
+    Parameter,
+    ProgressStage,
+)
+
+
+def get_results_filter(info: FileInfo, name: str) -> str:
+    """File dialog filter for the format and compression a result was written in"""
+    from .compression import get_extension
+
+    return f"{info.format.label} (*{get_extension(Path(name))})"
 
 
 class TitleCard(Card):
@@ -204,6 +218,16 @@ class WarningViewer(Card):
         warning = LongLabel("WARNING GOES HERE")
         explanation = LongLabel(strings.ambiguity)
 
+        locations_title = CategoryButton("Affected locations")
+        locations_title.toggled.connect(self.handleToggled)
+
+        locations = QtWidgets.QPlainTextEdit()
+        locations.setReadOnly(True)
+        locations.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        locations.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        locations.setFixedHeight(160)
+        locations.setVisible(False)
+
         title_layout = QtWidgets.QHBoxLayout()
         title_layout.setSpacing(4)
         title_layout.addLayout(arrow_layout)
@@ -214,10 +238,125 @@ class WarningViewer(Card):
         layout.setSpacing(12)
         layout.addLayout(title_layout)
         layout.addWidget(explanation)
+        layout.addWidget(locations_title)
+        layout.addWidget(locations)
 
         self.addLayout(layout)
 
         self.warning = warning
+        self.controls.locations_title = locations_title
+        self.controls.locations = locations
+
+    def setAmbiguity(self, index: AmbiguityIndex | None):
+        self.controls.locations_title.setVisible(bool(index))
+        if not index:
+            self.controls.locations.setPlainText("")
+            return
+        lines = [index.summary() + ", positions are 1-based:"]
+        for sequence in index.sequences:
+            positions = ", ".join(
+                f"{site + 1} {x}"
+                for site, x in zip(sequence.sites, sequence.characters)
+            )
+            lines.append(f"{sequence.label}: {positions}")
+        self.controls.locations.setPlainText("\n".join(lines))
+
+    def handleToggled(self, checked):
+        self.controls.locations.setVisible(checked)
+        self.update()
+
+
+class TimingViewer(Card):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setContentsMargins(6, 2, 6, 2)
+
+        title = CategoryButton("Time per stage")
+        title.setStyleSheet("font-size: 16px;")
+        title.toggled.connect(self.handleToggled)
+
+        grid = QtWidgets.QGridLayout()
+        grid.setContentsMargins(0, 4, 0, 4)
+        grid.setHorizontalSpacing(16)
+        grid.setVerticalSpacing(4)
+        grid.setColumnMinimumWidth(0, 168)
+        grid.setColumnStretch(4, 1)
+
+        contents = QtWidgets.QWidget()
+        contents.setLayout(grid)
+        contents.setVisible(False)
+
+        self.addWidget(title)
+        self.addWidget(contents)
+
+        self.controls.title = title
+        self.controls.contents = contents
+        self.controls.grid = grid
+
+        self.timings = None
+        self.memory = None
+
+    def setTimings(self, timings: dict[str, float] | None):
+        self.timings = timings
+        self.draw_rows()
+
+    def setMemory(self, memory: dict[str, dict[str, int | None]] | None):
+        self.memory = memory
+        self.draw_rows()
+
+    def draw_rows(self):
+        grid = self.controls.grid
+        while grid.count():
+            grid.takeAt(0).widget().deleteLater()
+
+        timings = self.timings
+        memory = self.memory or {}
+        self.setVisible(bool(timings))
+        if not timings:
+            return
+
+        total = sum(timings.values()) or 1.0
+        ordered = sorted(timings.items(), key=lambda item: item[1], reverse=True)
+        for row, (stage, seconds) in enumerate(ordered):
+            label = QtWidgets.QLabel(strings.stage_labels.get(stage, stage) + ":")
+            value = QtWidgets.QLabel(f"{seconds:.3f} s")
+            value.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+            share = QtWidgets.QLabel(f"{seconds / total:.1%}")
+            share.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+            share.setStyleSheet("QLabel { font-style: italic; color: Palette(Shadow);}")
+            grid.addWidget(label, row, 0)
+            grid.addWidget(value, row, 1)
+            grid.addWidget(share, row, 2)
+            if stage in memory:
+                heap = human_readable_size(memory[stage]["heap_peak"])
+                peak = QtWidgets.QLabel(f"heap peak {heap}")
+                peak.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                peak.setStyleSheet(
+                    "QLabel { font-style: italic; color: Palette(Shadow);}"
+                )
+                grid.addWidget(peak, row, 3)
+
+    def handleToggled(self, checked):
+        self.controls.contents.setVisible(checked)
+        self.update()
+
+
+class LineIndexModel(QtCore.QAbstractListModel):
+    """Lines are only decoded when the view asks for them"""
+
+    def __init__(self, lines, parent=None):
+        super().__init__(parent)
+        self.lines = lines
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.lines)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and index.isValid():
+            return self.lines.get_line(index.row())
+        return None
 
 
 class ResultDialog(QtWidgets.QDialog):
@@ -233,14 +372,46 @@ class ResultDialog(QtWidgets.QDialog):
         self.resize(520, 680)
         self.setModal(True)
 
-        viewer = QtWidgets.QPlainTextEdit()
-        viewer.setReadOnly(True)
+        from .lines import LineIndex
+
+        # only the visible rows are read from the memory mapped file
+        self.lines = LineIndex(path)
+
         font = QtGui.QFont("monospace")
         font.setStyleHint(QtGui.QFont.Monospace)
-        viewer.setFont(font)
+        metrics = QtGui.QFontMetrics(font)
 
-        with open(path) as file:
-            viewer.setPlainText(file.read())
+        # fixed row heights let the view skip measuring every line
+        viewer = QtWidgets.QTableView()
+        viewer.setFont(font)
+        viewer.setShowGrid(False)
+        viewer.setWordWrap(False)
+        viewer.horizontalHeader().hide()
+        viewer.verticalHeader().hide()
+        viewer.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        viewer.verticalHeader().setDefaultSectionSize(metrics.height() + 2)
+        viewer.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        viewer.setModel(LineIndexModel(self.lines, viewer))
+        viewer.setColumnWidth(0, self.get_column_width(metrics))
+
+        search = QtWidgets.QLineEdit()
+        search.setPlaceholderText("Search text or sequence ID")
+        search.returnPressed.connect(self.handleFind)
+
+        find = QtWidgets.QPushButton("Find next")
+        find.clicked.connect(self.handleFind)
+
+        jump = QtWidgets.QPushButton("Jump to ID")
+        jump.clicked.connect(self.handleJump)
+
+        status = QtWidgets.QLabel(f"{len(self.lines)} lines")
+        status.setStyleSheet("QLabel { font-style: italic; color: Palette(Shadow);}")
+
+        search_layout = QtWidgets.QHBoxLayout()
+        search_layout.setSpacing(6)
+        search_layout.addWidget(search, 1)
+        search_layout.addWidget(find)
+        search_layout.addWidget(jump)
 
         save = QtWidgets.QPushButton("Save")
         save.clicked.connect(self.handleSave)
@@ -250,6 +421,7 @@ class ResultDialog(QtWidgets.QDialog):
         close.setDefault(True)
 
         buttons = QtWidgets.QHBoxLayout()
+        buttons.addWidget(status)
         buttons.addStretch(1)
         buttons.addWidget(save)
         buttons.addWidget(close)
@@ -257,14 +429,45 @@ class ResultDialog(QtWidgets.QDialog):
         layout = QtWidgets.QVBoxLayout()
         layout.setContentsMargins(12, 12, 12, 12)
         layout.setSpacing(12)
+        layout.addLayout(search_layout)
         layout.addWidget(viewer)
         layout.addLayout(buttons)
 
         self.setLayout(layout)
 
+        self.viewer = viewer
+        self.search = search
+        self.status = status
+
+    def get_column_width(self, metrics: QtGui.QFontMetrics, sample: int = 100) -> int:
+        lines = (self.lines.get_line(i) for i in range(min(sample, len(self.lines))))
+        return max((metrics.horizontalAdvance(line) for line in lines), default=0) + 16
+
     def handleSave(self):
         self.save.emit(self.path)
 
+    def handleFind(self):
+        current = self.viewer.currentIndex()
+        start = current.row() + 1 if current.isValid() else 0
+        self.showLine(self.lines.find(self.search.text(), start))
+
+    def handleJump(self):
+        self.showLine(self.lines.find_id(self.search.text().strip()))
+
+    def showLine(self, line: int | None):
+        if line is None:
+            self.status.setText(f"Not found: {self.search.text()!r}")
+            return
+        self.status.setText(f"Line {line + 1} of {len(self.lines)}")
+        index = self.viewer.model().index(line)
+        self.viewer.setCurrentIndex(index)
+        self.viewer.scrollTo(index, QtWidgets.QAbstractItemView.PositionAtCenter)
+
+    def done(self, result):
+        self.viewer.setModel(None)
+        self.lines.close()
+        super().done(result)
+
 
 class InputSequencesSelector(InputSelector):
     def __init__(self, *args, **kwargs):
@@ -477,6 +680,7 @@ class OutputFormatCard(Card):
         self.setContentsMargins(6, 2, 6, 2)
         self.draw_title()
         self.draw_fasta_config()
+        self.draw_compression()
 
     def draw_title(self):
         title = QtWidgets.QLabel("Output format:")
@@ -553,6 +757,49 @@ class OutputFormatCard(Card):
 
         self.addWidget(widget)
 
+    def draw_compression(self):
+        label = QtWidgets.QLabel("Compression:")
+        label.setFixedWidth(178)
+
+        methods = [None, *Compression]
+
+        combo = NoWheelComboBox()
+        for method in methods:
+            combo.addItem(method.label if method else "None")
+
+        level_label = QtWidgets.QLabel("Level:")
+
+        level = UnscrollableSpinBox()
+        level.setMinimumWidth(80)
+        level.setRange(0, max(method.max_level for method in Compression))
+
+        layout = QtWidgets.QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 4)
+        layout.addWidget(label)
+        layout.addWidget(combo)
+        layout.addSpacing(16)
+        layout.addWidget(level_label)
+        layout.addWidget(level)
+        layout.addStretch(1)
+
+        self.controls.compression = combo
+        self.controls.compression_methods = methods
+        self.controls.compression_level = level
+        self.controls.compression_level_label = level_label
+
+        self.addLayout(layout)
+
+    def setCompression(self, compression: Compression | None):
+        self.controls.compression.setCurrentIndex(
+            self.controls.compression_methods.index(compression)
+        )
+        self.controls.compression_level.setEnabled(compression is not None)
+        self.controls.compression_level_label.setEnabled(compression is not None)
+        if compression is not None:
+            self.controls.compression_level.setRange(
+                compression.min_level, compression.max_level
+            )
+
 
 class ParameterCard(Card):
     def __init__(self, parent=None):
@@ -600,12 +847,43 @@ class ParameterCard(Card):
             layout.addWidget(description, row, 2)
             row += 1
 
+        label = QtWidgets.QLabel("Independent chains:")
+        description = QtWidgets.QLabel(
+            "Run chains with different seeds in parallel and keep the consensus."
+        )
+        description.setStyleSheet(
+            "QLabel { font-style: italic; color: Palette(Shadow);}"
+        )
+        chains = self.get_int_entry()
+        chains.setMinimum(1)
+        chains.setMaximum(64)
+
+        layout.addWidget(label, row, 0)
+        layout.addWidget(chains, row, 1)
+        layout.addWidget(description, row, 2)
+        row += 1
+
+        partition = QtWidgets.QCheckBox(
+            "  Phase each subset independently, in parallel processes"
+        )
+        partition.roll = VerticalRollAnimation(partition)
+        layout.addWidget(partition, row, 0, 1, 3)
+        row += 1
+
+        memory = QtWidgets.QCheckBox(
+            "  Trace memory use of each stage, which slows down phasing"
+        )
+        layout.addWidget(memory, row, 0, 1, 3)
+
         widget = QtWidgets.QWidget()
         widget.setLayout(layout)
         self.addWidget(widget)
 
         self.controls.contents = widget
         self.controls.entries = entries
+        self.controls.chains = chains
+        self.controls.partition = partition
+        self.controls.memory = memory
 
     def get_int_entry(self):
         entry = UnscrollableSpinBox()
@@ -643,6 +921,239 @@ class ParameterCard(Card):
         self.controls.title.setStyleSheet(f"font-size: 16px; color: Palette({color});")
 
 
+class JobTableModel(QtCore.QAbstractTableModel):
+    """Presents the jobs of the queue, one per row"""
+
+    headers = ["File", "Status", "Time", "Details"]
+
+    def __init__(self, queue, parent=None):
+        super().__init__(parent)
+        self.queue = queue
+        queue.jobs_changed.connect(self.handleJobsChanged)
+        queue.job_changed.connect(self.handleJobChanged)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.queue.jobs)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        job = self.queue.jobs[index.row()]
+        column = index.column()
+        if role == QtCore.Qt.DisplayRole:
+            return self.getText(job, column)
+        if role == QtCore.Qt.ToolTipRole:
+            return self.getToolTip(job, column)
+        return None
+
+    @staticmethod
+    def getText(job, column: int) -> str:
+        if column == 0:
+            return job.name
+        if column == 1:
+            return job.status.label
+        if column == 2:
+            if job.seconds_taken is None:
+                return ""
+            return f"{job.seconds_taken:.1f} s"
+        if job.status == JobStatus.Running:
+            return job.progress
+        if job.phased_path is not None and not job.message:
+            return job.phased_path.name
+        return job.message
+
+    @staticmethod
+    def getToolTip(job, column: int) -> str:
+        if column == 0:
+            return str(job.path)
+        if column == 2 and job.timings:
+            ordered = sorted(job.timings.items(), key=lambda x: x[1], reverse=True)
+            return "\n".join(
+                f"{strings.stage_labels.get(stage, stage)}: {seconds:.3f} s"
+                for stage, seconds in ordered
+            )
+        if column == 3:
+            lines = [job.message] if job.message else []
+            if job.phased_path is not None:
+                lines.append(str(job.phased_path))
+            return "\n".join(lines)
+        return ""
+
+    def handleJobsChanged(self):
+        self.beginResetModel()
+        self.endResetModel()
+
+    def handleJobChanged(self, row: int):
+        first = self.index(row, 0)
+        last = self.index(row, len(self.headers) - 1)
+        self.dataChanged.emit(first, last)
+
+
+class JobQueueCard(Card):
+    add_current = QtCore.Signal()
+    add_files = QtCore.Signal()
+    remove = QtCore.Signal(list)
+    retry = QtCore.Signal(list)
+    save = QtCore.Signal(list)
+    save_all = QtCore.Signal()
+    run = QtCore.Signal()
+    stop = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setContentsMargins(6, 2, 6, 2)
+        self.queue = None
+        self.draw_title()
+        self.draw_contents()
+
+        self.controls.title.toggled.connect(self.handleToggled)
+        self.setExpanded(False)
+
+    def draw_title(self):
+        title = CategoryButton("Job queue")
+        title.setStyleSheet("font-size: 16px;")
+
+        summary = QtWidgets.QLabel("No jobs in the queue")
+        summary.setStyleSheet("QLabel { font-style: italic; color: Palette(Shadow);}")
+
+        layout = QtWidgets.QHBoxLayout()
+        layout.setSpacing(16)
+        layout.addWidget(title)
+        layout.addWidget(summary, 1)
+        self.addLayout(layout)
+
+        self.controls.title = title
+        self.controls.summary = summary
+
+    def draw_contents(self):
+        add_current = QtWidgets.QPushButton("Add current input")
+        add_current.clicked.connect(self.add_current)
+
+        add_files = QtWidgets.QPushButton("Add files")
+        add_files.clicked.connect(self.add_files)
+
+        remove = QtWidgets.QPushButton("Remove")
+        remove.clicked.connect(lambda: self.remove.emit(self.getSelectedJobs()))
+
+        retry = QtWidgets.QPushButton("Retry")
+        retry.clicked.connect(lambda: self.retry.emit(self.getSelectedJobs()))
+
+        workers_label = QtWidgets.QLabel("Concurrent jobs:")
+        workers = UnscrollableSpinBox()
+        workers.setMinimum(1)
+        workers.setMaximum(64)
+
+        run = QtWidgets.QPushButton("Run queue")
+        run.clicked.connect(self.handleRun)
+
+        top = QtWidgets.QHBoxLayout()
+        top.setSpacing(8)
+        top.addWidget(add_current)
+        top.addWidget(add_files)
+        top.addWidget(remove)
+        top.addWidget(retry)
+        top.addStretch(1)
+        top.addWidget(workers_label)
+        top.addWidget(workers)
+        top.addSpacing(16)
+        top.addWidget(run)
+
+        table = QtWidgets.QTableView()
+        table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setStretchLastSection(True)
+        table.setFixedHeight(200)
+
+        save = QtWidgets.QPushButton("Save selected")
+        save.clicked.connect(lambda: self.save.emit(self.getSelectedJobs()))
+
+        save_all = QtWidgets.QPushButton("Save all")
+        save_all.clicked.connect(self.save_all)
+
+        bottom = QtWidgets.QHBoxLayout()
+        bottom.setSpacing(8)
+        bottom.addStretch(1)
+        bottom.addWidget(save)
+        bottom.addWidget(save_all)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 4, 0, 4)
+        layout.setSpacing(8)
+        layout.addLayout(top)
+        layout.addWidget(table)
+        layout.addLayout(bottom)
+
+        widget = QtWidgets.QWidget()
+        widget.setLayout(layout)
+        self.addWidget(widget)
+
+        self.controls.contents = widget
+        self.controls.add_current = add_current
+        self.controls.workers = workers
+        self.controls.run = run
+        self.controls.table = table
+
+    def setQueue(self, queue):
+        self.queue = queue
+        self.controls.table.setModel(JobTableModel(queue, self))
+        header = self.controls.table.horizontalHeader()
+        header.setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(2, QtWidgets.QHeaderView.ResizeToContents)
+
+    def getSelectedJobs(self) -> list:
+        rows = self.controls.table.selectionModel().selectedRows()
+        return [self.queue.jobs[index.row()] for index in sorted(rows)]
+
+    def setRunning(self, running: bool):
+        self.controls.run.setText("Stop queue" if running else "Run queue")
+
+    def handleRun(self):
+        if self.queue is not None and self.queue.running:
+            self.stop.emit()
+        else:
+            self.run.emit()
+
+    def setExpanded(self, expanded):
+        self.controls.title.setChecked(expanded)
+        self.controls.contents.setVisible(expanded)
+
+    def handleToggled(self, checked):
+        self.controls.contents.setVisible(checked)
+        self.update()
+
+
+class StageProgressCard(ProgressCard):
+    """Also shows the throughput and time left, as tracked by the model"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tracker = None
+
+    def setTracker(self, tracker):
+        self.tracker = tracker
+        self.setFormat("%p%")
+
+    def showProgress(self, report):
+        super().showProgress(report)
+        summary = self.tracker.summary() if self.tracker is not None else ""
+        self.setFormat(f"%p% ({summary})" if summary else "%p%")
+
+
 class View(ScrollTaskView):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -658,11 +1169,13 @@ class View(ScrollTaskView):
         )
         self.cards.results = ResultViewer("Phased sequences", self)
         self.cards.warnings = WarningViewer(self)
-        self.cards.progress_matrix = ProgressCard(self)
-        self.cards.progress_mcmc = ProgressCard(self)
+        self.cards.timings = TimingViewer(self)
+        self.cards.progress_matrix = StageProgressCard(self)
+        self.cards.progress_mcmc = StageProgressCard(self)
         self.cards.input_sequences = InputSequencesSelector("Input sequences", self)
         self.cards.output_format = OutputFormatCard(self)
         self.cards.parameters = ParameterCard(self)
+        self.cards.queue = JobQueueCard(self)
 
         layout = QtWidgets.QVBoxLayout()
         for card in self.cards:
@@ -678,15 +1191,21 @@ class View(ScrollTaskView):
 
         self.binder.bind(object.notification, self.showNotification)
         self.binder.bind(object.request_confirmation, self.requestConfirmation)
+        self.cards.progress_matrix.setTracker(object.progress_trackers["matrix"])
+        self.cards.progress_mcmc.setTracker(object.progress_trackers["mcmc"])
         self.binder.bind(
             object.progression,
             self.cards.progress_matrix.showProgress,
-            condition=lambda x: "matrix" in x.text,
+            condition=lambda x: (
+                isinstance(x.text, ProgressStage) and x.text.step == "matrix"
+            ),
         )
         self.binder.bind(
             object.progression,
             self.cards.progress_mcmc.showProgress,
-            condition=lambda x: "MCMC" in x.text,
+            condition=lambda x: (
+                isinstance(x.text, ProgressStage) and x.text.step == "mcmc"
+            ),
         )
         self.binder.bind(object.properties.busy, self.cards.progress_matrix.setEnabled)
         self.binder.bind(object.properties.busy, self.cards.progress_matrix.setVisible)
@@ -728,6 +1247,13 @@ class View(ScrollTaskView):
         self.binder.bind(
             object.properties.phased_warning, self.cards.warnings.warning.setText
         )
+        self.binder.bind(
+            object.properties.phased_ambiguity, self.cards.warnings.setAmbiguity
+        )
+        self.binder.bind(
+            object.properties.phased_timings, self.cards.timings.setTimings
+        )
+        self.binder.bind(object.properties.phased_memory, self.cards.timings.setMemory)
 
         self.binder.bind(
             object.output_options.properties.format,
@@ -754,6 +1280,24 @@ class View(ScrollTaskView):
             object.output_options.properties.fasta_concatenate,
         )
 
+        self.binder.bind(
+            object.output_options.properties.compression,
+            self.cards.output_format.setCompression,
+        )
+        self.binder.bind(
+            self.cards.output_format.controls.compression.currentIndexChanged,
+            object.output_options.properties.compression,
+            lambda index: self.cards.output_format.controls.compression_methods[index],
+        )
+        self.binder.bind(
+            object.output_options.properties.compression_level,
+            self.cards.output_format.controls.compression_level.setValue,
+        )
+        self.binder.bind(
+            self.cards.output_format.controls.compression_level.valueChanged,
+            object.output_options.properties.compression_level,
+        )
+
         self.binder.bind(
             object.output_options.properties.fasta_separator_visible,
             self.cards.output_format.controls.separators.roll.setAnimatedVisible,
@@ -773,6 +1317,60 @@ class View(ScrollTaskView):
         for param in Parameter:
             self._bind_param_field(param, object)
 
+        self.binder.bind(
+            object.phasing_options.properties.partition_subsets,
+            self.cards.parameters.controls.partition.setChecked,
+        )
+        self.binder.bind(
+            self.cards.parameters.controls.partition.toggled,
+            object.phasing_options.properties.partition_subsets,
+        )
+        self.binder.bind(
+            object.phasing_options.properties.chains,
+            self.cards.parameters.controls.chains.setValue,
+        )
+        self.binder.bind(
+            self.cards.parameters.controls.chains.valueChanged,
+            object.phasing_options.properties.chains,
+        )
+        self.binder.bind(
+            object.phasing_options.properties.partition_subsets_visible,
+            self.cards.parameters.controls.partition.roll.setAnimatedVisible,
+        )
+        self.binder.bind(
+            object.properties.trace_memory,
+            self.cards.parameters.controls.memory.setChecked,
+        )
+        self.binder.bind(
+            self.cards.parameters.controls.memory.toggled,
+            object.properties.trace_memory,
+        )
+
+        self.cards.queue.setQueue(object.queue)
+        self.binder.bind(self.cards.queue.add_current, object.add_job)
+        self.binder.bind(self.cards.queue.add_files, self.add_job_files)
+        self.binder.bind(self.cards.queue.remove, object.queue.remove)
+        self.binder.bind(self.cards.queue.retry, object.queue.retry)
+        self.binder.bind(self.cards.queue.save, self.save_jobs)
+        self.binder.bind(self.cards.queue.save_all, self.save_all_jobs)
+        self.binder.bind(self.cards.queue.run, object.queue.start)
+        self.binder.bind(self.cards.queue.stop, object.queue.stop)
+        self.binder.bind(
+            object.properties.ready, self.cards.queue.controls.add_current.setEnabled
+        )
+        self.binder.bind(
+            object.queue.properties.max_workers,
+            self.cards.queue.controls.workers.setValue,
+        )
+        self.binder.bind(
+            self.cards.queue.controls.workers.valueChanged,
+            object.queue.properties.max_workers,
+        )
+        self.binder.bind(object.queue.properties.running, self.cards.queue.setRunning)
+        self.binder.bind(
+            object.queue.properties.summary, self.cards.queue.controls.summary.setText
+        )
+
         # defined last to override `set_busy` calls
         self.binder.bind(object.properties.editable, self.setEditable)
 
@@ -829,11 +1427,36 @@ class View(ScrollTaskView):
 
     def save_results(self):
         dir = str(self.object.suggested_results)
-        format = self.object.get_output_format()
-        filter = f"{format.label} (*{format.extension})"
+        filter = get_results_filter(self.object.phased_info, self.object.result_name)
         path = self.getSavePath("Save phased sequences", dir=dir, filter=filter)
         if path:
             self.object.save(path)
 
+    def add_job_files(self):
+        filenames, _ = QtWidgets.QFileDialog.getOpenFileNames(
+            self.window(), f"{app.config.title} - Add files to the queue"
+        )
+        if filenames:
+            self.object.add_job_files([Path(filename) for filename in filenames])
+
+    def save_jobs(self, jobs):
+        jobs = [job for job in jobs if job.status.has_results]
+        if len(jobs) == 1:
+            job = jobs[0]
+            path = self.getSavePath(
+                "Save phased sequences",
+                dir=str(job.suggested_results),
+                filter=get_results_filter(job.phased_info, job.result_name),
+            )
+            if path:
+                self.object.save_job(job, path)
+        elif jobs:
+            path = self.getExistingDirectory("Save phased sequences")
+            if path:
+                self.object.save_jobs(jobs, path)
+
+    def save_all_jobs(self):
+        self.save_jobs(self.object.queue.jobs)
+
     def save(self):
         self.save_results()
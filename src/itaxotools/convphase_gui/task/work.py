@@ -18,36 +18,62 @@
 
 from __future__ import annotations
 
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from random import randrange
 
 from itaxotools.common.utility import AttrDict
 from itaxotools.convphase.phase import iter_phase, set_progress_callback
-from itaxotools.convphase.scan import scan_input_sequences, scan_output_sequences
 from itaxotools.convphase.types import PhasedSequence, PhaseWarning, UnphasedSequence
 from itaxotools.taxi2.file_types import FileFormat
-from itaxotools.taxi2.files import get_info
 from itaxotools.taxi2.sequences import Sequence, SequenceHandler, Sequences
 from itaxotools.taxi_gui.tasks.common.process import progress_handler
 
-from .types import OutputFormat
+from .compression import CompressedFasta, CompressedTabfile, get_stem, is_compressed
+from .info import OutputInfoBuilder
+from .progress import ProgressThrottle
+from .scan import InputScan, scan_input_store, scan_output_ambiguity
+from .store import SequenceStore
+from .timing import StageTimer
+from .types import AmbiguityIndex, ChainAgreement, OutputFormat, ProgressStage
 
+report_progress = ProgressThrottle(progress_handler)
 
-def configure_progress_callbacks() -> None:
-    set_progress_callback(lambda v, m, t: progress_handler(t, v, m))
-    progress_handler("Computing matrix Q", 0, 1)
-    progress_handler("MCMC resolution", 0, 1)
 
+def configure_progress_callbacks(
+    timer: StageTimer | None = None, rate: float | None = 10.0
+) -> None:
+    """Send at most `rate` reports per second and stage to the GUI"""
+    global report_progress
+    report_progress = ProgressThrottle(progress_handler, rate)
 
-def get_input_sequence_warnings(sequences: Sequences) -> list[str]:
-    return [str(w) for w in scan_input_sequences(sequences)]
+    def callback(value, maximum, text):
+        stage = ProgressStage.from_text(text)
+        if timer is not None and timer.current == "matrix" and stage.step == "mcmc":
+            timer.switch("mcmc")
+        report_progress(stage, value, maximum)
+
+    set_progress_callback(callback)
+    report_progress(ProgressStage.Matrix, 0, 1)
+    report_progress(ProgressStage.Mcmc, 0, 1)
+
+
+def get_input_scan(sequences: SequenceStore) -> InputScan:
+    return scan_input_store(sequences)
+
+
+def get_input_sequence_warnings(sequences: SequenceStore) -> list[str]:
+    return [str(w) for w in get_input_scan(sequences).get_warnings()]
 
 
 def get_sequences_from_model(input: AttrDict):
+    compressed = is_compressed(input.info.path)
     match input.info.format:
         case FileFormat.Tabfile:
             return Sequences.fromPath(
                 input.info.path,
-                SequenceHandler.Tabfile,
+                CompressedTabfile if compressed else SequenceHandler.Tabfile,
                 hasHeader=True,
                 idColumn=input.index_column,
                 seqColumn=input.sequence_column,
@@ -55,7 +81,7 @@ def get_sequences_from_model(input: AttrDict):
         case FileFormat.Fasta:
             return Sequences.fromPath(
                 input.info.path,
-                SequenceHandler.Fasta,
+                CompressedFasta if compressed else SequenceHandler.Fasta,
                 parse_organism=input.parse_organism,
                 organism_separator=input.subset_separator,
                 organism_tag="organism",
@@ -63,20 +89,63 @@ def get_sequences_from_model(input: AttrDict):
     raise Exception(f"Cannot create sequences from input: {input}")
 
 
+def get_sequence_store(input: AttrDict) -> SequenceStore:
+    return SequenceStore.from_sequences(get_sequences_from_model(input))
+
+
+def _get_phased_id(id: str) -> str:
+    # SeqPhase automatically replaces spaces...
+    phased_id = id.replace(" ", "_")
+    # and cuts everything after a bar...
+    phased_id = id.split("|")[0]
+    return phased_id
+
+
+def _find_phased_line(
+    phased_id: str,
+    phased: iter[PhasedSequence],
+    lookaside: dict[str, PhasedSequence],
+    lookaside_limit: int,
+) -> PhasedSequence | None:
+    if phased_id in lookaside:
+        return lookaside.pop(phased_id)
+
+    for line in phased:
+        if line.id == phased_id:
+            return line
+        lookaside[line.id] = line
+        if len(lookaside) > lookaside_limit:
+            raise Exception(
+                f"Phased data is too far out of input order: "
+                f'more than {lookaside_limit} lines ahead of "{phased_id}"'
+            )
+
+    return lookaside.pop(phased_id, None)
+
+
 def _get_sequences_from_phased_data(
     sequences: Sequences,
     phased: iter[PhasedSequence],
+    lookaside_limit: int = 1024,
 ) -> iter[Sequence]:
-    phased_dict = {line.id: line for line in phased}
+    """
+    Join phased lines to their input sequences, preserving input order.
+    Lines are expected in input order and yielded as soon as they match,
+    out of order lines are kept aside until their sequence comes up,
+    as long as they are no more than `lookaside_limit` lines ahead.
+    Lines that are already all in memory are looked up directly.
+    """
+    if isinstance(phased, list):
+        lookaside = {line.id: line for line in phased}
+        phased = iter(())
+    else:
+        phased = iter(phased)
+        lookaside = {}
 
     for sequence in sequences:
-        try:
-            # SeqPhase automatically replaces spaces...
-            phased_id = sequence.id.replace(" ", "_")
-            # and cuts everything after a bar...
-            phased_id = sequence.id.split("|")[0]
-            line = phased_dict[phased_id]
-        except KeyError:
+        phased_id = _get_phased_id(sequence.id)
+        line = _find_phased_line(phased_id, phased, lookaside, lookaside_limit)
+        if line is None:
             raise Exception(
                 f'Sequence identifier not found in phased data: "{sequence.id}"'
             )
@@ -89,27 +158,228 @@ def _get_sequences_from_phased_data(
         yield Sequence(sequence.id, line.data_b, sequence.extras | {"allele": "b"})
 
 
-def get_phased_sequences(
+def get_phased_lines(
     sequences: Sequences, parameters: dict[str, int | float]
-) -> Sequences:
+) -> iter[PhasedSequence]:
     unphased = (UnphasedSequence(sequence.id, sequence.seq) for sequence in sequences)
-    phased = iter_phase(unphased, **parameters)
+    return iter_phase(unphased, **parameters)
+
 
-    return Sequences(list(_get_sequences_from_phased_data(sequences, phased)))
+def get_phased_sequences(
+    sequences: Sequences, phased: iter[PhasedSequence]
+) -> iter[Sequence]:
+    return _get_sequences_from_phased_data(sequences, phased)
 
 
-def get_output_file_handler(
-    output_path: Path,
+def get_subset_key(input: AttrDict) -> str | None:
+    match input.info.format:
+        case FileFormat.Tabfile:
+            if input.subset_column < 0:
+                return None
+            return input.info.headers[input.subset_column]
+        case FileFormat.Fasta:
+            if not input.parse_organism:
+                return None
+            return "organism"
+    return None
+
+
+def _initialize_partition_worker():
+    # progress is reported by the parent process instead
+    set_progress_callback(None)
+
+
+def _is_monomorphic(unphased: list[UnphasedSequence]) -> bool:
+    first = unphased[0].data
+    if any(sequence.data != first for sequence in unphased):
+        return False
+    return not set(first.upper()) - set("ACGTN?-")
+
+
+def iter_phase_with_seed(
+    input: iter[UnphasedSequence],
+    seed: int,
+    number_of_iterations: int = 100,
+    thinning_interval: int = 1,
+    burn_in: int = 100,
+    phase_threshold: float = 0.9,
+    allele_threshold: float = 0.9,
+) -> iter[PhasedSequence]:
+    """Same as `iter_phase`, but with a fixed seed for the PHASE random generator"""
+    from itaxotools._convphase import iterPhase
+
+    args = []
+
+    args.append(f"-p{phase_threshold}")
+    args.append(f"-q{allele_threshold}")
+    # the seed is only picked up as a separate argument
+    args.extend(["-S", str(seed)])
+
+    args.append(str(number_of_iterations))
+    args.append(str(thinning_interval))
+    args.append(str(burn_in))
+
+    output = iterPhase(input, args)
+    return (PhasedSequence(*x) for x in output)
+
+
+def _phase_partition(
+    unphased: list[UnphasedSequence],
+    parameters: dict[str, int | float],
+    seed: int | None = None,
+) -> list[PhasedSequence]:
+    # SeqPhase fails when there are no variable sites, nothing to phase anyway
+    if _is_monomorphic(unphased):
+        return [PhasedSequence(x.id, x.data, x.data) for x in unphased]
+    if seed is not None:
+        return list(iter_phase_with_seed(unphased, seed, **parameters))
+    return list(iter_phase(unphased, **parameters))
+
+
+def _get_partitions(
+    sequences: Sequences, subset_key: str | None
+) -> list[list[UnphasedSequence]]:
+    partitions: dict[str, list[UnphasedSequence]] = {}
+    for sequence in sequences:
+        subset = sequence.extras.get(subset_key, None) if subset_key else None
+        unphased = UnphasedSequence(sequence.id, sequence.seq)
+        partitions.setdefault(subset or "", []).append(unphased)
+    return list(partitions.values())
+
+
+def get_phased_lines_by_subset(
+    sequences: Sequences,
+    parameters: dict[str, int | float],
+    subset_key: str,
+    max_workers: int | None = None,
+) -> list[PhasedSequence]:
+    """Phase each subset independently and in parallel, order is not preserved"""
+    partitions = _get_partitions(sequences, subset_key)
+
+    phased = []
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_initialize_partition_worker,
+    ) as executor:
+        futures = [
+            executor.submit(_phase_partition, partition, dict(parameters))
+            for partition in partitions
+        ]
+        report_progress(ProgressStage.Subsets, 0, len(futures))
+        for done, future in enumerate(as_completed(futures), 1):
+            phased.extend(future.result())
+            report_progress(ProgressStage.Subsets, done, len(futures))
+
+    return phased
+
+
+def get_phased_chains(
+    sequences: Sequences,
+    parameters: dict[str, int | float],
+    seeds: list[int],
+    subset_key: str | None = None,
+    max_workers: int | None = None,
+) -> list[list[PhasedSequence]]:
+    """Run one independent chain per seed in parallel, subsets are optional"""
+    partitions = _get_partitions(sequences, subset_key)
+
+    chains = [[] for _ in seeds]
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_initialize_partition_worker,
+    ) as executor:
+        futures = {
+            executor.submit(_phase_partition, partition, dict(parameters), seed): index
+            for index, seed in enumerate(seeds)
+            for partition in partitions
+        }
+        report_progress(ProgressStage.Chains, 0, len(futures))
+        for done, future in enumerate(as_completed(futures), 1):
+            chains[futures[future]].extend(future.result())
+            report_progress(ProgressStage.Chains, done, len(futures))
+
+    return chains
+
+
+def get_chain_seeds(chains: int, seed: int | None = None) -> list[int]:
+    if seed is None:
+        seed = randrange(1, 2**31 - chains)
+    return [seed + index for index in range(chains)]
+
+
+def _get_aligned_pair(
+    line: PhasedSequence, reference: PhasedSequence
+) -> tuple[str, str]:
+    # haplotype order is arbitrary, match it to the reference before comparing
+    direct = sum(x == y for x, y in zip(line.data_a, reference.data_a))
+    direct += sum(x == y for x, y in zip(line.data_b, reference.data_b))
+    swapped = sum(x == y for x, y in zip(line.data_b, reference.data_a))
+    swapped += sum(x == y for x, y in zip(line.data_a, reference.data_b))
+    if swapped > direct:
+        return line.data_b, line.data_a
+    return line.data_a, line.data_b
+
+
+def merge_phased_chains(
+    chains: list[list[PhasedSequence]], seeds: list[int]
+) -> tuple[list[PhasedSequence], ChainAgreement]:
+    """
+    Keep the most frequent haplotype pair of each individual across chains,
+    ties go to the earliest chain. Agreement is the fraction of chains that
+    match the consensus, for each individual and for each site.
+    """
+    lines_by_id: dict[str, list[PhasedSequence]] = {}
+    for chain in chains:
+        for line in chain:
+            lines_by_id.setdefault(line.id, []).append(line)
+
+    consensus = []
+    individuals = {}
+    site_matches = []
+    site_totals = []
+    for id, lines in lines_by_id.items():
+        pairs = [tuple(sorted((line.data_a, line.data_b))) for line in lines]
+        counts = Counter(pairs)
+        best = max(pairs, key=lambda pair: counts[pair])
+        reference = lines[pairs.index(best)]
+        consensus.append(reference)
+        individuals[id] = counts[best] / len(chains)
+
+        for line in lines:
+            data_a, data_b = _get_aligned_pair(line, reference)
+            alleles = zip(data_a, data_b, reference.data_a, reference.data_b)
+            for site, (a, b, ref_a, ref_b) in enumerate(alleles):
+                if site >= len(site_totals):
+                    site_matches.append(0)
+                    site_totals.append(0)
+                site_totals[site] += 1
+                site_matches[site] += a == ref_a and b == ref_b
+
+    sites = [matches / total for matches, total in zip(site_matches, site_totals)]
+    return consensus, ChainAgreement(seeds, individuals, sites)
+
+
+def iter_written_sequences(
+    file: SequenceHandler,
+    sequences: iter[Sequence],
+    info: OutputInfoBuilder | None = None,
+) -> iter[Sequence]:
+    for sequence in sequences:
+        file.write(sequence)
+        if info is not None:
+            info.add(sequence)
+        yield sequence
+
+
+def _get_output_file_config(
     output_options: dict,
     input_sequences: AttrDict,
-) -> SequenceHandler:
+) -> tuple[type[SequenceHandler], dict]:
     match output_options.format:
         case OutputFormat.Mimic:
             match input_sequences.info.format:
                 case FileFormat.Fasta:
-                    return SequenceHandler.Fasta(
-                        output_path,
-                        "w",
+                    return SequenceHandler.Fasta, dict(
                         write_organism=input_sequences.info.has_subsets,
                         concatenate_extras=["allele"],
                         organism_separator=input_sequences.info.subset_separator,
@@ -118,9 +388,7 @@ def get_output_file_handler(
 
                 case FileFormat.Tabfile:
                     headers = input_sequences.info.headers
-                    return SequenceHandler.Tabfile(
-                        output_path,
-                        "w",
+                    return SequenceHandler.Tabfile, dict(
                         idHeader=headers[input_sequences.index_column],
                         seqHeader=headers[input_sequences.sequence_column],
                     )
@@ -148,9 +416,7 @@ def get_output_file_handler(
                     concatenate_extras = [x for x in info.headers if x not in keys]
                     concatenate_extras += ["allele"]
 
-            return SequenceHandler.Fasta(
-                output_path,
-                "w",
+            return SequenceHandler.Fasta, dict(
                 write_organism=write_organism,
                 concatenate_extras=concatenate_extras,
                 organism_separator=output_options.fasta_separator,
@@ -158,14 +424,39 @@ def get_output_file_handler(
             )
 
         case OutputFormat.Tabfile:
-            return SequenceHandler.Tabfile(
-                output_path,
-                "w",
+            return SequenceHandler.Tabfile, dict(
                 idHeader="seqid",
                 seqHeader="sequence",
             )
 
 
+def get_output_file_handler(
+    output_path: Path,
+    output_options: dict,
+    input_sequences: AttrDict,
+) -> SequenceHandler:
+    handler, kwargs = _get_output_file_config(output_options, input_sequences)
+    compression = output_options.get("compression", None)
+    if compression is not None:
+        handler = {
+            SequenceHandler.Fasta: CompressedFasta,
+            SequenceHandler.Tabfile: CompressedTabfile,
+        }[handler]
+        kwargs.update(compression=compression, level=output_options.compression_level)
+    return handler(output_path, "w", **kwargs)
+
+
+def get_output_info_builder(
+    output_path: Path,
+    output_options: dict,
+    input_sequences: AttrDict,
+) -> OutputInfoBuilder:
+    handler, kwargs = _get_output_file_config(output_options, input_sequences)
+    if handler is SequenceHandler.Fasta:
+        return OutputInfoBuilder.Fasta(output_path, **kwargs)
+    return OutputInfoBuilder.Tabfile(output_path, **kwargs)
+
+
 def _get_output_format(
     output_options: dict,
     input_sequences: AttrDict,
@@ -187,18 +478,28 @@ def get_output_file_name(
 ) -> str:
     format = _get_output_format(output_options, input_sequences)
     path = input_sequences.info.path
-    return f"{path.stem}_phased{format.extension}"
+    name = f"{get_stem(path)}_phased{format.extension}"
+    if compression := output_options.get("compression", None):
+        name += compression.extension
+    return name
+
+
+def get_output_ambiguity_index(sequences: iter[Sequence]) -> AmbiguityIndex:
+    return scan_output_ambiguity(sequences)
+
+
+def get_output_ambiguity_warning(index: AmbiguityIndex) -> str:
+    if not index:
+        return ""
+    warning = PhaseWarning.Ambiguity(index.characters, index.identifiers)
+    return "WARNING: " + str(warning)
 
 
-def get_file_info(path: Path):
-    return get_info(path)
+def get_output_sequence_ambiguity(sequences: iter[Sequence]) -> tuple[bool, str]:
+    index = get_output_ambiguity_index(sequences)
+    return bool(index), get_output_ambiguity_warning(index)
 
 
-def get_output_sequence_ambiguity(sequences: Sequences) -> tuple[bool, str]:
-    ambiguous = False
-    warning = ""
-    for warning in scan_output_sequences(sequences):
-        if isinstance(warning, PhaseWarning.Ambiguity):
-            ambiguous = True
-            warning = "WARNING: " + str(warning)
-    return ambiguous, warning
+def get_output_sequence_ambiguity_count(sequences: iter[Sequence]) -> int:
+    """Number of identifiers with ambiguity codes left after phasing"""
+    return len(get_output_ambiguity_index(sequences).identifiers)
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from itaxotools.convphase.types import PhasedSequence
+from itaxotools.convphase_gui.cli import get_parser
+from itaxotools.convphase_gui.task.cache import PhasedCache
+from itaxotools.taxi2.sequences import Sequence
+
+
+def get_phased_lines(ids: list[str]) -> list[PhasedSequence]:
+    return [PhasedSequence(id, id + "_a", id + "_b") for id in ids]
+
+
+def test_cache_key():
+    cache = PhasedCache("unused")
+    sequences = [Sequence("x", "ACGT", {"species": "a"})]
+    parameters = dict(burn_in=1, phase_threshold=0.9)
+
+    key = cache.get_key(sequences, parameters)
+    assert key == cache.get_key(sequences, dict(reversed(parameters.items())))
+    assert key != cache.get_key(sequences, dict(parameters, burn_in=2))
+    assert key != cache.get_key(sequences, parameters, "species")
+    assert key != cache.get_key([Sequence("x", "ACGA", {})], parameters)
+
+
+def test_cache_round_trip(tmp_path):
+    cache = PhasedCache(tmp_path)
+    phased = get_phased_lines(["x", "y"])
+
+    assert cache.load("abcd") is None
+    cache.store("abcd", phased)
+    assert cache.load("abcd") == phased
+
+
+def test_cache_round_trip_special_identifiers(tmp_path):
+    cache = PhasedCache(tmp_path)
+    phased = get_phased_lines(["x\ty", "x\ny", "x\\ty", "x\udcffy", '"x"'])
+
+    cache.store("abcd", phased)
+    assert cache.load("abcd") == phased
+    assert cache.get_path("abcd").exists()
+
+
+def test_cache_key_separates_fields():
+    cache = PhasedCache("unused")
+    parameters = dict(burn_in=1)
+
+    key = cache.get_key([Sequence("x\tA", "CGT", {})], parameters)
+    assert key != cache.get_key([Sequence("x", "A\tCGT", {})], parameters)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = PhasedCache(tmp_path)
+    for age, key in enumerate(["aa", "bb", "cc"]):
+        cache.store(key, get_phased_lines(["x"] * 100))
+        os.utime(cache.get_path(key), (age, age))
+    cache.load("aa")
+
+    cache.max_size = 2 * cache.get_path("aa").stat().st_size
+    cache.evict()
+
+    assert cache.load("aa") is not None
+    assert cache.load("bb") is None
+    assert cache.load("cc") is not None
+
+
+def test_cache_corrupt_entry_is_a_miss(tmp_path):
+    cache = PhasedCache(tmp_path)
+    cache.store("abcd", get_phased_lines(["x"]))
+    path = cache.get_path("abcd")
+    path.write_bytes(path.read_bytes()[:10] + b"corrupt" * 10)
+
+    assert cache.load("abcd") is None
+    assert not path.exists()
+
+
+def test_cache_size_zero_disables_eviction(tmp_path):
+    cache = PhasedCache(tmp_path, max_size=0)
+    for key in ["aa", "bb"]:
+        cache.store(key, get_phased_lines(["x"] * 100))
+    assert cache.load("aa") is not None
+    assert cache.load("bb") is not None
+
+
+def test_cache_size_argument():
+    parser = get_parser()
+    assert parser.parse_args(["x", "--cache-size", "0"]).cache_size == 0
+    with pytest.raises(SystemExit):
+        parser.parse_args(["x", "--cache-size", "-1"])
@@ -0,0 +1,88 @@
+import bz2
+import gzip
+import lzma
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from itaxotools.common.utility import AttrDict
+from itaxotools.convphase_gui.task.compression import (
+    get_compression,
+    get_file_info,
+    get_stem,
+    open_text,
+)
+from itaxotools.convphase_gui.task.types import Compression, OutputFormat
+from itaxotools.convphase_gui.task.work import (
+    get_output_file_handler,
+    get_output_file_name,
+    get_sequences_from_model,
+)
+from itaxotools.taxi2.files import get_info
+from itaxotools.taxi2.sequences import Sequence
+
+examples = Path(__file__).parents[1] / "examples"
+
+compressors = {
+    ".gz": gzip.compress,
+    ".bz2": bz2.compress,
+    ".xz": lzma.compress,
+}
+
+
+def get_input(info):
+    from itaxotools.convphase_gui.task import headless
+
+    return AttrDict(headless.get_input_sequences(info))
+
+
+@pytest.mark.parametrize("extension", compressors)
+@pytest.mark.parametrize("path", sorted(examples.iterdir()), ids=lambda x: x.name)
+def test_compressed_input(tmp_path, path, extension):
+    compressed = tmp_path / (path.name + extension)
+    compressed.write_bytes(compressors[extension](path.read_bytes()))
+    assert get_compression(compressed).extension == extension
+
+    expected = asdict(get_info(path))
+    info = get_file_info(compressed)
+    assert {**asdict(info), "path": path, "size": None} == {**expected, "size": None}
+
+    assert list(get_sequences_from_model(get_input(info))) == list(
+        get_sequences_from_model(get_input(get_info(path)))
+    )
+
+
+def test_get_stem():
+    assert get_stem(Path("a/file.tsv")) == "file"
+    assert get_stem(Path("a/file.tsv.gz")) == "file"
+    assert get_stem(Path("a/file.fas.ZST")) == "file"
+    assert get_stem(Path("a/file.v2.fas")) == "file.v2"
+
+
+@pytest.mark.parametrize("compression", [Compression.Gzip, Compression.Xz])
+@pytest.mark.parametrize("format", [OutputFormat.Tabfile, OutputFormat.Fasta])
+def test_compressed_output(tmp_path, format, compression):
+    from itaxotools.convphase_gui.task import headless
+
+    path = examples / "ConvPhase_examplefile1.tsv"
+    input = get_input(get_info(path))
+    sequences = [
+        Sequence(sequence.id, sequence.seq, {**sequence.extras, "allele": allele})
+        for sequence in get_sequences_from_model(input)
+        for allele in "ab"
+    ]
+
+    plain = headless.get_output_options(input, format=format)
+    packed = headless.get_output_options(input, format=format, compression=compression)
+    name = get_output_file_name(packed, input)
+    assert name == get_output_file_name(plain, input) + compression.extension
+
+    for options, target in [(plain, tmp_path / "plain"), (packed, tmp_path / name)]:
+        with get_output_file_handler(target, options, input) as file:
+            for sequence in sequences:
+                file.write(sequence)
+
+    assert get_compression(tmp_path / name) is compression
+    with open_text(tmp_path / name) as file:
+        assert file.read() == (tmp_path / "plain").read_text()
@@ -0,0 +1,187 @@
+import json
+import os
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+import itaxotools
+from itaxotools.convphase_gui.cli import count_sweep_failures
+from itaxotools.convphase_gui.task import headless, progress
+from itaxotools.convphase_gui.task.headless import (
+    configure_handlers,
+    get_input_sequences,
+    get_output_options,
+    get_parameters,
+    get_sweep_combinations,
+)
+from itaxotools.convphase_gui.task.types import OutputFormat, Parameter
+from itaxotools.taxi2.files import get_info
+
+examples = Path(__file__).parents[1] / "examples"
+
+
+def test_tabfile_input_sequences():
+    info = get_info(examples / "ConvPhase_examplefile1.tsv")
+    input = get_input_sequences(info)
+    assert input.index_column == 0
+    assert input.subset_column == 1
+    assert input.sequence_column == 2
+    assert input.has_subsets
+    assert not input.has_extras
+
+
+def test_fasta_input_sequences():
+    info = get_info(examples / "Convphase_examplefile1_HapViewformat_fasta.fas")
+    input = get_input_sequences(info)
+    assert input.parse_organism
+    assert input.subset_separator == "."
+
+    options = get_output_options(input, OutputFormat.Fasta)
+    assert options.fasta_separator == "."
+
+
+def test_parameters_defaults():
+    parameters = get_parameters(burn_in=5)
+    assert parameters.burn_in == 5
+    assert parameters.phase_threshold == Parameter.PhaseThreshold.default
+
+
+def test_sweep_combinations():
+    parameters = get_parameters()
+    grid = dict(burn_in=[10, 100], phase_threshold=[0.5, 0.7, 0.9])
+    combinations = get_sweep_combinations(parameters, grid)
+    assert len(combinations) == 6
+    assert combinations[1].burn_in == 10
+    assert combinations[1].phase_threshold == 0.7
+    assert combinations[-1].burn_in == 100
+    assert all(
+        x.number_of_iterations == parameters.number_of_iterations for x in combinations
+    )
+
+
+def test_progress_reports_time_left(monkeypatch):
+    for name in ["progress_handler", "get_feedback", "abort"]:
+        monkeypatch.setattr(itaxotools, name, None, raising=False)
+    clock = [0]
+    monkeypatch.setattr(headless, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(progress, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(headless, "stderr", StringIO())
+    configure_handlers(report_interval=5)
+
+    for clock[0] in range(11):
+        itaxotools.progress_handler("Phasing files", clock[0], maximum=20)
+    itaxotools.progress_handler("Phasing files", 20, maximum=20)
+
+    assert headless.stderr.getvalue().splitlines() == [
+        "Phasing files: 0/20",
+        "Phasing files: 5/20 (1 it/s, 15s left)",
+        "Phasing files: 10/20 (1 it/s, 10s left)",
+        "Phasing files: 20/20 (2 it/s)",
+    ]
+
+
+def crash_on_second(index: int) -> int:
+    if index == 2:
+        os._exit(1)
+    return index
+
+
+def test_crashed_process_fails_only_its_call():
+    calls = [(crash_on_second, (index,), {}) for index in range(6)]
+    reports = []
+    outcomes = headless.execute_isolating_crashes(
+        calls, 3, report=lambda index, *outcome: reports.append(index)
+    )
+
+    assert [result for result, _ in outcomes] == [0, 1, None, 3, 4, 5]
+    failed = [index for index, (_, exception) in enumerate(outcomes) if exception]
+    assert failed == [2]
+    assert isinstance(outcomes[2][1], BrokenProcessPool)
+    assert sorted(reports) == list(range(6))
+
+
+def test_output_collisions_are_refused(tmp_path):
+    paths = [
+        tmp_path / "a" / "x.tsv",
+        tmp_path / "b" / "x.tsv",
+        tmp_path / "a" / "y.tsv.gz",
+        tmp_path / "a" / "y.tsv.bz2",
+        tmp_path / "a" / "z.tsv",
+    ]
+    assert headless.get_output_collisions(paths) == [paths[2:4]]
+    assert headless.get_output_collisions(paths, tmp_path) == [paths[0:2], paths[2:4]]
+
+    with pytest.raises(Exception, match="overwrite"):
+        headless.execute_paths(paths, tmp_path)
+
+
+def test_run_log_is_kept_per_stage(monkeypatch, tmp_path):
+    from itaxotools.convphase_gui.task import work
+
+    def fail(*args):
+        raise MemoryError("out of memory")
+
+    monkeypatch.setattr(work, "get_output_ambiguity_index", fail)
+    monkeypatch.setattr(headless, "stderr", StringIO())
+    configure_handlers(quiet=True)
+
+    path = examples / "ConvPhase_examplefile1.tsv"
+    with pytest.raises(MemoryError):
+        headless.execute_path(path, tmp_path)
+
+    log = json.loads((tmp_path / "ConvPhase_examplefile1_phased.log.json").read_text())
+    assert not log["completed"]
+    assert log["last_stage"] == "ambiguity"
+    assert log["error"] == "MemoryError: out of memory"
+    assert {"parse", "scan", "mcmc"} <= set(log["timings"])
+
+    monkeypatch.undo()
+    configure_handlers(quiet=True)
+    headless.execute_path(path, tmp_path)
+    log = json.loads((tmp_path / "ConvPhase_examplefile1_phased.log.json").read_text())
+    assert log["completed"]
+    assert sorted(os.listdir(tmp_path)) == [
+        "ConvPhase_examplefile1_phased.log.json",
+        "ConvPhase_examplefile1_phased.tsv",
+    ]
+
+
+def test_batch_survives_crashed_process(monkeypatch, tmp_path):
+    execute_path = headless.execute_path
+
+    def crash_on_broken(path, *args, **kwargs):
+        if path.name == "broken.tsv":
+            os._exit(1)
+        return execute_path(path, *args, **kwargs)
+
+    monkeypatch.setattr(headless, "execute_path", crash_on_broken)
+    monkeypatch.setattr(headless, "stderr", StringIO())
+    configure_handlers(quiet=True)
+
+    paths = [
+        examples / "ConvPhase_examplefile1.tsv",
+        tmp_path / "broken.tsv",
+        examples / "Convphase_examplefile1_MolDformat_fasta.fas",
+    ]
+    metrics = headless.execute_paths(paths, jobs=2, output_dir=tmp_path)
+    assert [row["success"] for row in metrics] == [True, False, True]
+    assert "BrokenProcessPool" in metrics[1]["error"]
+
+
+def test_sweep_records_failed_combination(monkeypatch, tmp_path):
+    monkeypatch.setattr(headless, "stderr", StringIO())
+    configure_handlers(quiet=True)
+
+    # the backend exits the process on a negative number of iterations
+    grid = dict(number_of_iterations=[10, -5])
+    rows = headless.sweep_path(
+        examples / "ConvPhase_examplefile1.tsv", grid, tmp_path, jobs=1
+    )
+    assert rows[0]["error"] is None
+    assert Path(rows[0]["output"]).exists()
+    assert rows[1]["error"]
+    assert rows[1]["output"] is None
+    sweeps = [dict(error=None, combinations=rows), dict(error="x", combinations=[])]
+    assert count_sweep_failures(sweeps) == 2
@@ -0,0 +1,59 @@
+import pytest
+
+from itaxotools.convphase_gui.task.lines import LineIndex
+
+
+@pytest.fixture
+def write_text(tmp_path):
+    def write(text: str, name: str = "file.txt"):
+        path = tmp_path / name
+        path.write_bytes(text.encode())
+        return path
+
+    return write
+
+
+@pytest.mark.parametrize(
+    "text, lines",
+    [
+        ("", []),
+        ("\n", [""]),
+        ("a", ["a"]),
+        ("a\nbc\n", ["a", "bc"]),
+        ("a\r\n\r\nbc", ["a", "", "bc"]),
+    ],
+)
+def test_line_index(write_text, text, lines):
+    with LineIndex(write_text(text)) as index:
+        assert len(index) == len(lines)
+        assert [index.get_line(i) for i in range(len(index))] == lines
+
+
+def test_line_index_chunks(write_text, monkeypatch):
+    monkeypatch.setattr(LineIndex, "chunk_size", 3)
+    lines = [f"line{i}" for i in range(20)]
+    with LineIndex(write_text("\n".join(lines))) as index:
+        assert [index.get_line(i) for i in range(len(index))] == lines
+
+
+def test_line_index_find(write_text):
+    text = "seqid\tsequence\nx\tACGT\ny\tAGGT\nz\tACGT\n"
+    with LineIndex(write_text(text)) as index:
+        assert index.find("ACGT") == 1
+        assert index.find("ACGT", 2) == 3
+        assert index.find("AGG", 3) == 2
+        assert index.find("TTTT") is None
+
+
+def test_line_index_find_id(write_text):
+    tabfile = "seqid\tsequence\nab\tACGT\na\tAGGT\n"
+    with LineIndex(write_text(tabfile)) as index:
+        assert index.find_id("a") == 2
+        assert index.find_id("ab") == 1
+        assert index.find_id("b") is None
+
+    fasta = ">ab_a\nACGT\n>a_a\nAGGT\n>a_b\nAGGT\n"
+    with LineIndex(write_text(fasta, "file.fas")) as index:
+        assert index.find_id("a") == 2
+        assert index.find_id("a_b") == 4
+        assert index.find_id("ab") == 0
@@ -0,0 +1,95 @@
+import os
+from time import sleep, time
+
+import pytest
+
+import itaxotools
+from itaxotools.convphase_gui.task.pool import WarmWorker
+
+warmed_at = None
+
+
+def warm_up():
+    global warmed_at
+    warmed_at = time()
+
+
+def get_state():
+    return os.getpid(), warmed_at
+
+
+def wait_forever():
+    itaxotools.progress_handler("Waiting...")
+    sleep(60)
+
+
+@pytest.fixture
+def worker(qapp):
+    worker = WarmWorker(name="Test", initializer=warm_up, check_interval=0.05)
+    yield worker
+    # the worker closes the streams it wrapped unless they are still
+    # sys.stdout and sys.stderr, which pytest swaps between phases
+    worker.streamOut.streams.clear()
+    worker.streamErr.streams.clear()
+    worker.quit()
+
+
+def execute(qtbot, worker, function):
+    with qtbot.waitSignal(worker.done, timeout=10000) as blocker:
+        worker.exec(1, function)
+    return blocker.args[0].result
+
+
+def has_warm_spare(worker):
+    spares = list(worker.spares)
+    return len(spares) == 1 and spares[0].warm
+
+
+def test_runs_warm(qtbot, worker):
+    pid, warmed = execute(qtbot, worker, get_state)
+    assert warmed is not None
+    assert execute(qtbot, worker, get_state) == (pid, warmed)
+
+
+def test_stop_hands_over_spare(qtbot, worker):
+    pid, _ = execute(qtbot, worker, get_state)
+    qtbot.waitUntil(lambda: has_warm_spare(worker))
+
+    with qtbot.waitSignal(worker.progress, timeout=10000):
+        worker.exec(1, wait_forever)
+    with qtbot.waitSignal(worker.stop, timeout=10000):
+        worker.reset()
+    stopped = time()
+
+    new_pid, warmed = execute(qtbot, worker, get_state)
+    assert new_pid != pid
+    assert warmed < stopped
+
+
+def test_dead_spare_is_replaced(qtbot, worker):
+    qtbot.waitUntil(lambda: has_warm_spare(worker))
+    spare = worker.spares[0]
+    spare.process.kill()
+
+    qtbot.waitUntil(lambda: has_warm_spare(worker) and worker.spares[0] is not spare)
+    assert not spare.process.is_alive()
+
+
+def test_task_model_gets_warm_worker(qapp):
+    # taxi_gui has to be imported through the app, or its imports are circular
+    import itaxotools.taxi_gui.app  # noqa: F401
+    from itaxotools.convphase_gui.task import process
+    from itaxotools.convphase_gui.task.model import Model
+    from itaxotools.taxi_gui.model.tasks import TaskModel
+
+    model = Model()
+    other = TaskModel()
+    assert isinstance(model.worker, WarmWorker)
+    assert model.worker.initializer is process.initialize
+    assert not isinstance(other.worker, WarmWorker)
+
+    # as for the queue, the log files must stay until the end
+    for task in [model, other]:
+        task.worker.streamOut.streams.pop(0)
+        task.worker.streamErr.streams.pop(0)
+        task.close()
@@ -0,0 +1,146 @@
+import pickle
+
+import pytest
+
+from itaxotools.convphase_gui.task import progress
+from itaxotools.convphase_gui.task.progress import (
+    ProgressThrottle,
+    RateTracker,
+    format_duration,
+)
+from itaxotools.convphase_gui.task.types import ProgressStage
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(progress, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+def send_all(throttle, clock, stage, maximum, step=0.01):
+    for value in range(maximum + 1):
+        throttle(stage, value, maximum)
+        clock.advance(step)
+
+
+def test_rate_is_limited(clock, sent):
+    throttle = ProgressThrottle(lambda *args: sent.append(args), rate=10)
+    send_all(throttle, clock, ProgressStage.Mcmc, 100)
+
+    assert len(sent) == 11
+    assert sent[0] == (ProgressStage.Mcmc, 0, 100)
+    assert sent[-1] == (ProgressStage.Mcmc, 100, 100)
+
+
+def test_final_value_is_always_sent(clock, sent):
+    throttle = ProgressThrottle(lambda *args: sent.append(args), rate=1)
+    send_all(throttle, clock, ProgressStage.Matrix, 3)
+
+    assert sent == [(ProgressStage.Matrix, 0, 3), (ProgressStage.Matrix, 3, 3)]
+
+
+def test_stages_are_limited_separately(clock, sent):
+    throttle = ProgressThrottle(lambda *args: sent.append(args), rate=1)
+    throttle(ProgressStage.Matrix, 0, 1)
+    throttle(ProgressStage.Mcmc, 0, 1)
+    throttle(ProgressStage.Matrix, 0, 7)
+    throttle(ProgressStage.Mcmc, 0, 1)
+
+    assert sent == [
+        (ProgressStage.Matrix, 0, 1),
+        (ProgressStage.Mcmc, 0, 1),
+        (ProgressStage.Matrix, 0, 7),
+    ]
+
+
+def test_no_rate_sends_everything(clock, sent):
+    throttle = ProgressThrottle(lambda *args: sent.append(args), rate=None)
+    send_all(throttle, clock, ProgressStage.Chains, 10, step=0)
+
+    assert len(sent) == 11
+
+
+@pytest.mark.parametrize(
+    "text, stage",
+    [
+        ("Computing matrix Q", ProgressStage.Matrix),
+        ("MCMC resolution", ProgressStage.Mcmc),
+        ("MCMC resolution (subsets)", ProgressStage.Subsets),
+        ("MCMC something new", ProgressStage.Mcmc),
+    ],
+)
+def test_stage_from_text(text, stage):
+    assert ProgressStage.from_text(text) is stage
+
+
+def test_stage_survives_the_pipe():
+    stage = pickle.loads(pickle.dumps(ProgressStage.Chains))
+    assert stage is ProgressStage.Chains
+    assert f"{stage}: 1/2" == "MCMC resolution (chains): 1/2"
+
+
+def test_rate_and_time_left():
+    tracker = RateTracker(window=10)
+    assert tracker.rate is None
+    assert tracker.summary() == ""
+
+    for second in range(5):
+        tracker.update(second * 4, 100, now=second)
+
+    assert tracker.rate == 4
+    assert tracker.remaining == 21
+    assert tracker.summary() == "4 it/s, 21s left"
+
+
+def test_rate_follows_the_window():
+    tracker = RateTracker(window=10)
+    for second in range(21):
+        tracker.update(second, 1000, now=second)
+    for second in range(21, 31):
+        tracker.update(second * 3 - 40, 1000, now=second)
+
+    assert tracker.rate == 3
+
+
+def test_tracker_starts_over():
+    tracker = RateTracker()
+    tracker.update(0, 10, now=0)
+    tracker.update(5, 10, now=1)
+    tracker.update(0, 20, now=2)
+    assert tracker.rate is None
+
+    tracker.update(10, 20, now=3)
+    tracker.update(2, 20, now=4)
+    assert tracker.rate is None
+
+
+def test_finished_stage_has_no_time_left():
+    tracker = RateTracker()
+    tracker.update(0, 2, now=0)
+    tracker.update(2, 2, now=4)
+    assert tracker.summary() == "0.5 it/s"
+
+
+@pytest.mark.parametrize(
+    "seconds, text",
+    [(0.4, "0s"), (42, "42s"), (187, "3:07"), (3727, "1:02:07")],
+)
+def test_format_duration(seconds, text):
+    assert format_duration(seconds) == text
@@ -0,0 +1,166 @@
+from pathlib import Path
+
+import pytest
+
+# taxi_gui has to be imported through the app, or its imports are circular
+import itaxotools.taxi_gui.app  # noqa: F401
+from itaxotools.common.utility import AttrDict
+from itaxotools.convphase_gui.task import transfer
+from itaxotools.convphase_gui.task.model import JobModel, JobQueueModel
+from itaxotools.convphase_gui.task.storage import WorkStorage
+from itaxotools.convphase_gui.task.types import Compression, JobStatus, OutputFormat
+from itaxotools.convphase_gui.task.view import get_results_filter
+
+examples = Path(__file__).parents[1] / "examples"
+
+
+def fail(*args):
+    raise OSError(18, "Invalid cross-device link")
+
+
+@pytest.fixture
+def queue(qapp, tmp_path):
+    task = AttrDict(
+        name="Test",
+        temporary_path=tmp_path,
+        cache_path=None,
+        progress_rate=10.0,
+        storage=WorkStorage(tmp_path),
+    )
+    queue = JobQueueModel(task)
+    yield queue
+    # same as for the pool, but the log files must stay until the end
+    for worker in queue.workers:
+        worker.streamOut.streams.pop(0)
+        worker.streamErr.streams.pop(0)
+    queue.close()
+
+
+def wait_for_queue(qtbot, queue):
+    qtbot.waitUntil(lambda: not queue.running, timeout=120000)
+
+
+def test_jobs_run_concurrently(qtbot, queue, tmp_path):
+    queue.max_workers = 2
+    for name in ["ConvPhase_examplefile1.tsv", "Convphase_examplefile2.tsv"]:
+        queue.add(JobModel(examples / name))
+    queue.start()
+    assert [job.status for job in queue.jobs] == [JobStatus.Running] * 2
+    wait_for_queue(qtbot, queue)
+
+    for job in queue.jobs:
+        assert job.status.has_results
+        assert job.seconds_taken > 0
+        assert job.timings
+        assert job.phased_path.exists()
+    assert len(queue.workers) == 2
+
+    output = tmp_path / "output"
+    output.mkdir()
+    assert queue.save_many(queue.jobs, output) == 2
+    assert sorted(path.name for path in output.iterdir()) == [
+        "ConvPhase_examplefile1_phased.tsv",
+        "Convphase_examplefile2_phased.tsv",
+    ]
+
+
+def test_failed_job_does_not_stop_queue(qtbot, queue, tmp_path):
+    broken = tmp_path / "broken.tsv"
+    broken.write_text("nothing\tto\tphase\n")
+    queue.add(JobModel(broken))
+    queue.add(JobModel(examples / "ConvPhase_examplefile1.tsv"))
+    queue.start()
+    wait_for_queue(qtbot, queue)
+
+    failed, done = queue.jobs
+    assert failed.status == JobStatus.Failed
+    assert failed.message
+    assert done.status.has_results
+
+
+def test_stop_keeps_pending_jobs(qtbot, queue):
+    for _ in range(2):
+        job = JobModel(examples / "ConvPhase_examplefile1.tsv")
+        job.parameters.number_of_iterations = 10**7
+        queue.add(job)
+    queue.start()
+    running, pending = queue.jobs
+    assert running.status == JobStatus.Running
+    assert pending.status == JobStatus.Pending
+
+    queue.stop()
+    qtbot.waitUntil(lambda: running.status == JobStatus.Cancelled, timeout=10000)
+    assert pending.status == JobStatus.Pending
+    assert not queue.running
+
+    queue.retry([running])
+    assert running.status == JobStatus.Pending
+
+
+def test_evicted_results_are_discarded(qtbot, queue):
+    queue.task.storage.on_evict = queue.discard
+    queue.add(JobModel(examples / "ConvPhase_examplefile1.tsv"))
+    queue.start()
+    wait_for_queue(qtbot, queue)
+
+    job = queue.jobs[0]
+    assert job.status.has_results
+    queue.task.storage.max_size = 1
+    queue.task.storage.evict()
+    assert job.status == JobStatus.Discarded
+    assert job.phased_path is None
+    assert not job.work_dir.exists()
+
+    queue.retry([job])
+    queue.start()
+    wait_for_queue(qtbot, queue)
+    assert job.status.has_results
+
+
+def test_evicted_saved_results_are_kept(qtbot, queue, tmp_path, monkeypatch):
+    queue.task.storage.on_evict = queue.discard
+    queue.add(JobModel(examples / "ConvPhase_examplefile1.tsv"))
+    queue.start()
+    wait_for_queue(qtbot, queue)
+
+    # saving by copy leaves the result in the work directory
+    monkeypatch.setattr(transfer, "_rename", fail)
+    output = tmp_path / "output"
+    output.mkdir()
+    job = queue.jobs[0]
+    status = job.status
+    queue.save(job, output / "first.tsv")
+    assert job.saved
+    assert job.phased_path.is_relative_to(job.work_dir)
+
+    queue.task.storage.max_size = 1
+    queue.task.storage.evict()
+    assert not job.work_dir.exists()
+    assert job.status == status
+    assert job.phased_path == output / "first.tsv"
+
+    queue.save(job, output / "second.tsv")
+    text = (output / "first.tsv").read_text()
+    assert (output / "second.tsv").read_text() == text
+
+
+def test_save_names_follow_written_output(qtbot, queue, tmp_path):
+    job = JobModel(examples / "ConvPhase_examplefile1.tsv")
+    job.output_options.compression = Compression.Gzip
+    queue.add(job)
+    queue.start()
+    wait_for_queue(qtbot, queue)
+
+    # changing the options afterwards does not change what was written
+    job.output_options.compression = None
+    job.output_options.format = OutputFormat.Fasta
+    assert job.suggested_results.name == "ConvPhase_examplefile1_phased.tsv.gz"
+    filter = get_results_filter(job.phased_info, job.result_name)
+    assert filter.endswith("(*.tsv.gz)")
+
+    output = tmp_path / "output"
+    output.mkdir()
+    assert queue.save_many(queue.jobs, output) == 1
+    assert [path.name for path in output.iterdir()] == [
+        "ConvPhase_examplefile1_phased.tsv.gz"
+    ]
@@ -0,0 +1,116 @@
+from pathlib import Path
+
+import pytest
+
+from itaxotools.convphase.scan import scan_input_sequences, scan_output_sequences
+from itaxotools.convphase_gui.task.scan import (
+    Symbol,
+    scan_input_store,
+    scan_output_ambiguity,
+)
+from itaxotools.convphase_gui.task.store import SequenceStore
+from itaxotools.taxi2.sequences import Sequence
+
+examples = Path(__file__).parents[1] / "examples"
+
+
+@pytest.mark.parametrize(
+    "sequences",
+    [
+        [],
+        [Sequence("x", "ACGT", {}), Sequence("y", "ACGT", {})],
+        [Sequence("x", "ACGT", {}), Sequence("y", "ACG", {})],
+        [Sequence("x", "ACGT", {}), Sequence("y", "", {})],
+        [Sequence("x", "ACnT", {}), Sequence("y", "A?GT", {})],
+        [Sequence("x", "AC-T", {}), Sequence("x", "ACGT", {})],
+        [Sequence("x", "ACGT", {}), Sequence("y", "ACGT", {"allele": "a"})],
+        [Sequence("x", "ACGT", {"allele": None}), Sequence("y", "AC", {})],
+    ],
+)
+def test_scan_matches_convphase(sequences):
+    store = SequenceStore.from_sequences(sequences)
+    expected = [str(w) for w in scan_input_sequences(sequences)]
+    assert [str(w) for w in scan_input_store(store).get_warnings()] == expected
+
+
+@pytest.mark.parametrize("path", sorted(examples.iterdir()), ids=lambda x: x.name)
+def test_scan_matches_convphase_on_examples(path):
+    from itaxotools.convphase_gui.task import headless
+    from itaxotools.convphase_gui.task.work import get_sequence_store
+    from itaxotools.taxi2.files import get_info
+
+    store = get_sequence_store(headless.get_input_sequences(get_info(path)))
+    expected = [str(w) for w in scan_input_sequences(list(store))]
+    assert [str(w) for w in scan_input_store(store).get_warnings()] == expected
+
+
+def test_scan_counts():
+    sequences = [
+        Sequence("x", "ARN-", {}),
+        Sequence("y", "AYn*", {}),
+        Sequence("z", "ACGT", {}),
+    ]
+    scan = scan_input_store(SequenceStore.from_sequences(sequences))
+
+    assert scan.sample_counts[Symbol.Ambiguity].tolist() == [1, 1, 0]
+    assert scan.sample_counts[Symbol.Missing].tolist() == [2, 1, 0]
+    assert scan.sample_counts[Symbol.Illegal].tolist() == [0, 1, 0]
+    assert scan.column_counts[Symbol.Ambiguity].tolist() == [0, 2, 0, 0]
+    assert scan.column_counts[Symbol.Missing].tolist() == [0, 0, 2, 1]
+    assert scan.illegal_symbols == "*"
+
+
+def test_scan_counts_uneven_lengths():
+    sequences = [
+        Sequence("x", "", {}),
+        Sequence("y", "RN", {}),
+        Sequence("z", "", {}),
+        Sequence("w", "KKK", {}),
+    ]
+    scan = scan_input_store(SequenceStore.from_sequences(sequences))
+
+    assert not scan.is_uniform
+    assert scan.lengths.tolist() == [0, 2, 0, 3]
+    assert scan.sample_counts[Symbol.Ambiguity].tolist() == [0, 1, 0, 3]
+    assert scan.sample_counts[Symbol.Missing].tolist() == [0, 1, 0, 0]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1024])
+def test_output_ambiguity_index(chunk_size):
+    sequences = [
+        Sequence("x_a", "ACGT", {}),
+        Sequence("x_b", "ARGN", {}),
+        Sequence("y_a", "", {}),
+        Sequence("y_b", "aC-T", {}),
+        Sequence("z_a", "ACGY", {}),
+    ]
+    index = scan_output_ambiguity(sequences, chunk_size)
+
+    assert [(x.id, x.sites, x.characters) for x in index.sequences] == [
+        ("x_b", [1, 3], "RN"),
+        ("y_b", [0], "a"),
+        ("z_a", [3], "Y"),
+    ]
+    assert index.sites == [0, 1, 3]
+    assert index.count() == 4
+
+    [warning] = scan_output_sequences(sequences)
+    assert set(index.identifiers) == warning.identifiers
+    assert set(index.characters.upper()) == set(warning.characters)
+
+
+def test_output_ambiguity_index_alleles():
+    sequences = [
+        Sequence("x", "ARGT", {"allele": "a"}),
+        Sequence("x", "ARGT", {"allele": "b"}),
+    ]
+    index = scan_output_ambiguity(sequences)
+
+    assert [x.label for x in index.sequences] == ["x (a)", "x (b)"]
+    assert index.identifiers == ["x"]
+
+
+def test_output_ambiguity_index_empty():
+    index = scan_output_ambiguity([Sequence("x_a", "ACGT-", {})])
+    assert not index
+    assert not scan_output_sequences([Sequence("x_a", "ACGT-", {})])
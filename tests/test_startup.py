@@ -0,0 +1,24 @@
+import subprocess
+import sys
+
+lazy_modules = [
+    "itaxotools.convphase.phase",
+    "itaxotools.taxi2.sequences",
+    "itaxotools.taxi2.handlers",
+    "numpy",
+]
+
+
+def test_task_imports_are_lazy():
+    # a fresh interpreter, since the test session imports everything
+    code = (
+        "import sys\n"
+        "import itaxotools.taxi_gui.app\n"
+        "import itaxotools.convphase_gui.task.model\n"
+        "import itaxotools.convphase_gui.task.view\n"
+        f"print(*[m for m in {lazy_modules!r} if m in sys.modules])\n"
+    )
+    process = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert process.stdout.split() == []
@@ -0,0 +1,63 @@
+import os
+from time import time
+
+from itaxotools.convphase_gui.task.storage import WorkStorage
+
+
+def create_work_dir(storage: WorkStorage, age: float, size: int = 0):
+    path = storage.create("run")
+    (path / "phased.tsv").write_bytes(b"x" * size)
+    modified = time() - age
+    os.utime(path, (modified, modified))
+    storage.unpin(path)
+    return path
+
+
+def test_storage_names_are_unique(tmp_path):
+    storage = WorkStorage(tmp_path)
+    paths = [storage.create("run") for _ in range(10)]
+    assert len(set(paths)) == 10
+    assert all(path.is_dir() and path.parent == tmp_path for path in paths)
+
+
+def test_storage_evicts_oldest_over_size(tmp_path):
+    evicted = []
+    storage = WorkStorage(tmp_path, max_size=250, on_evict=evicted.append)
+    old, middle, new = [create_work_dir(storage, age, 100) for age in [30, 20, 10]]
+
+    assert storage.evict() == [old]
+    assert evicted == [old]
+    assert not old.exists()
+    assert middle.exists() and new.exists()
+
+
+def test_storage_evicts_over_age(tmp_path):
+    storage = WorkStorage(tmp_path, max_age=60)
+    expired = create_work_dir(storage, 120)
+    recent = create_work_dir(storage, 10)
+
+    storage.evict()
+    assert not expired.exists()
+    assert recent.exists()
+
+
+def test_storage_keeps_pinned(tmp_path):
+    storage = WorkStorage(tmp_path, max_size=50, max_age=60)
+    pinned = create_work_dir(storage, 120, 100)
+    storage.pin(pinned)
+    unpinned = create_work_dir(storage, 10, 100)
+
+    current = storage.create("run")
+    assert pinned.exists()
+    assert not unpinned.exists()
+    assert current.exists()
+
+
+def test_storage_ignores_other_files(tmp_path):
+    storage = WorkStorage(tmp_path, max_age=60)
+    other = tmp_path / "convphase.log"
+    other.write_text("log")
+    os.utime(other, (0, 0))
+
+    assert storage.evict() == []
+    assert other.exists()
@@ -0,0 +1,29 @@
+from itaxotools.convphase_gui.task.store import SequenceStore
+from itaxotools.taxi2.sequences import Sequence
+
+
+def test_store_round_trip():
+    sequences = [
+        Sequence("x", "ACGT", {"species": "a"}),
+        Sequence("y", "", {"species": None}),
+        Sequence("z", "RYKM-N", {"species": "b"}),
+    ]
+    store = SequenceStore.from_sequences(sequences)
+
+    assert len(store) == 3
+    assert list(store) == sequences
+    assert list(store) == sequences
+    assert store[2] == sequences[2]
+    assert list(store.iter_seqs()) == ["ACGT", "", "RYKM-N"]
+    assert bytes(store.data) == b"ACGTRYKM-N"
+    assert list(store.offsets) == [0, 4, 4, 10]
+
+
+def test_store_uneven_extras():
+    sequences = [
+        Sequence("x", "A", {}),
+        Sequence("y", "C", {"organism": "b"}),
+        Sequence("z", "G", {}),
+    ]
+    store = SequenceStore.from_sequences(sequences)
+    assert list(store) == sequences
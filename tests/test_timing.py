@@ -0,0 +1,106 @@
+import pytest
+
+from itaxotools.convphase_gui.task import timing
+from itaxotools.convphase_gui.task.timing import StageTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(timing, "perf_counter", clock)
+    return clock
+
+
+def test_nested_stages_are_exclusive(clock):
+    timer = StageTimer()
+
+    def produce():
+        for x in range(3):
+            clock.advance(1)
+            yield x
+
+    with timer.stage("consume"):
+        for _ in timer.iter("produce", produce()):
+            clock.advance(2)
+
+    assert timer.as_dict() == {"produce": 3, "consume": 6}
+
+
+def test_switch_stage(clock):
+    timer = StageTimer()
+    with timer.stage("matrix"):
+        clock.advance(1)
+        timer.switch("mcmc")
+        clock.advance(4)
+    clock.advance(8)
+
+    assert timer.as_dict() == {"matrix": 1, "mcmc": 4}
+    assert timer.current is None
+
+
+def test_memory_per_stage():
+    timer = StageTimer(trace_memory=True)
+    try:
+        with timer.stage("small"):
+            small = bytearray(1000)
+        with timer.stage("large"):
+            large = bytearray(10_000_000)
+            del large
+    finally:
+        timer.close()
+    del small
+
+    memory = timer.memory_as_dict()
+    assert memory["large"]["heap_peak"] >= 10_000_000
+    assert memory["small"]["heap_peak"] < 10_000_000
+
+
+def test_memory_is_opt_in():
+    timer = StageTimer()
+    with timer.stage("large"):
+        bytearray(1000)
+    assert timer.memory_as_dict() == {}
+
+
+def test_memory_per_streamed_stage():
+    def parse():
+        for _ in range(3):
+            buffer = bytearray(10_000_000)
+            del buffer
+            yield bytearray(1000)
+
+    timer = StageTimer(trace_memory=True)
+    try:
+        with timer.stage("write"):
+            for item in timer.iter("parse", parse()):
+                small = item * 2
+    finally:
+        timer.close()
+    del small
+
+    memory = timer.memory_as_dict()
+    assert memory["parse"]["heap_peak"] >= 10_000_000
+    assert memory["write"]["heap_peak"] < 10_000_000
+
+
+def test_on_exit_for_stages_only():
+    ended = []
+    timer = StageTimer(on_exit=ended.append)
+    with timer.stage("matrix"):
+        timer.switch("mcmc")
+    with timer.stage("write"):
+        for _ in timer.iter("join", range(3)):
+            pass
+
+    assert ended == ["matrix", "mcmc", "write"]
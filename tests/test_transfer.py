@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from itaxotools.convphase_gui.task import transfer
+from itaxotools.convphase_gui.task.transfer import transfer_file
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.tsv"
+    path.write_text("seqid\tsequence\nx\tACGT\n")
+    return path
+
+
+def test_transfer_rename(source, tmp_path):
+    destination = tmp_path / "destination.tsv"
+    assert transfer_file(source, destination, move=True) == "rename"
+    assert not source.exists()
+    assert destination.read_text() == "seqid\tsequence\nx\tACGT\n"
+
+
+def test_transfer_keeps_source(source, tmp_path):
+    destination = tmp_path / "destination.tsv"
+    destination.write_text("old")
+    method = transfer_file(source, destination)
+    assert method in ["reflink", "copy"]
+    assert source.exists()
+    assert destination.read_text() == source.read_text()
+    assert sorted(os.listdir(tmp_path)) == ["destination.tsv", "source.tsv"]
+
+
+def fail(*args):
+    raise OSError(18, "Invalid cross-device link")
+
+
+def test_transfer_never_shares_file(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(transfer, "_rename", fail)
+
+    first = tmp_path / "first.tsv"
+    second = tmp_path / "second.tsv"
+    assert transfer_file(source, first, move=True) in ["reflink", "copy"]
+    assert transfer_file(source, second, move=True) in ["reflink", "copy"]
+    assert not os.path.samefile(first, second)
+
+    first.write_text("edited")
+    assert second.read_text() == source.read_text()
+
+
+def test_transfer_falls_back_to_copy(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(transfer, "_rename", fail)
+    monkeypatch.setattr(transfer, "_reflink", fail)
+
+    destination = tmp_path / "destination.tsv"
+    assert transfer_file(source, destination, move=True) == "copy"
+    assert source.exists()
+    assert destination.read_text() == source.read_text()
+    assert sorted(os.listdir(tmp_path)) == ["destination.tsv", "source.tsv"]
+
+
+def test_transfer_failure_keeps_destination(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(transfer, "copyfile", fail)
+
+    destination = tmp_path / "destination.tsv"
+    destination.write_text("old")
+    with pytest.raises(OSError):
+        transfer_file(source, destination)
+    assert destination.read_text() == "old"
+    assert sorted(os.listdir(tmp_path)) == ["destination.tsv", "source.tsv"]
+
+
+@pytest.mark.parametrize("move", [True, False])
+def test_transfer_twice_to_same_path(source, tmp_path, move):
+    destination = tmp_path / "destination.tsv"
+    text = source.read_text()
+    transfer_file(source, destination, move=move)
+    if move:
+        source = destination
+    assert transfer_file(source, destination, move=move) in ["same", "reflink", "copy"]
+    assert transfer_file(destination, destination, move=move) == "same"
+    assert destination.read_text() == text
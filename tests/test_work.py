@@ -0,0 +1,224 @@
+from pathlib import Path
+
+import pytest
+
+from itaxotools.convphase.types import PhasedSequence, UnphasedSequence
+from itaxotools.convphase_gui.task import headless, work
+from itaxotools.convphase_gui.task.types import OutputFormat
+from itaxotools.convphase_gui.task.work import (
+    _get_partitions,
+    _get_sequences_from_phased_data,
+    _phase_partition,
+    get_output_file_handler,
+    get_output_file_name,
+    get_output_info_builder,
+    get_phased_chains,
+    get_phased_lines_by_subset,
+    get_sequences_from_model,
+    iter_written_sequences,
+    merge_phased_chains,
+)
+from itaxotools.taxi2.files import get_info
+from itaxotools.taxi2.sequences import Sequence
+
+examples = Path(__file__).parents[1] / "examples"
+
+
+def get_input_sequences(ids: list[str]) -> list[Sequence]:
+    return [Sequence(id, "ACGT", {}) for id in ids]
+
+
+def get_phased_lines(ids: list[str]) -> list[PhasedSequence]:
+    return [PhasedSequence(id, id + "_a", id + "_b") for id in ids]
+
+
+@pytest.mark.parametrize(
+    "phased_ids, lookaside_limit",
+    [
+        (["x", "y", "z", "w"], 1024),
+        (["w", "z", "y", "x"], 1024),
+        (["w", "z", "y", "x"], 3),
+        (["y", "x", "w", "z"], 1),
+        (["x", "y", "z", "w"], 0),
+    ],
+)
+def test_join_preserves_input_order(phased_ids, lookaside_limit):
+    input_ids = ["x", "y", "z", "w"]
+    sequences = get_input_sequences(input_ids)
+    phased = iter(get_phased_lines(phased_ids))
+
+    joined = list(_get_sequences_from_phased_data(sequences, phased, lookaside_limit))
+
+    assert [sequence.id for sequence in joined] == [
+        id for id in input_ids for _ in range(2)
+    ]
+    assert [sequence.seq for sequence in joined] == [
+        id + allele for id in input_ids for allele in ["_a", "_b"]
+    ]
+    assert [sequence.extras["allele"] for sequence in joined] == ["a", "b"] * 4
+
+
+def test_join_lookaside_is_bounded():
+    sequences = get_input_sequences(["x", "y", "z", "w"])
+    phased = iter(get_phased_lines(["w", "z", "y", "x"]))
+
+    with pytest.raises(Exception, match='more than 2 lines ahead of "x"'):
+        list(_get_sequences_from_phased_data(sequences, phased, 2))
+
+
+def test_join_lists_in_any_order():
+    sequences = get_input_sequences(["x", "y", "z", "w"])
+    phased = get_phased_lines(["w", "z", "y", "x"])
+
+    joined = list(_get_sequences_from_phased_data(sequences, phased, 0))
+    assert [sequence.id for sequence in joined[::2]] == ["x", "y", "z", "w"]
+
+
+def test_join_is_lazy_for_ordered_input():
+    sequences = get_input_sequences(["x", "y"])
+    consumed = []
+
+    def phased():
+        for line in get_phased_lines(["x", "y"]):
+            consumed.append(line.id)
+            yield line
+
+    joined = _get_sequences_from_phased_data(sequences, phased())
+    next(joined)
+    assert consumed == ["x"]
+
+
+def test_join_missing_identifier():
+    sequences = get_input_sequences(["x", "y"])
+    phased = get_phased_lines(["x"])
+
+    with pytest.raises(Exception, match='"y"'):
+        list(_get_sequences_from_phased_data(sequences, phased))
+
+
+@pytest.fixture
+def quiet_progress(monkeypatch):
+    monkeypatch.setattr(work, "report_progress", lambda *args: None)
+
+
+def test_chains_differ_by_seed(quiet_progress):
+    sequences = [
+        Sequence("s0", "GMAAATMAAGGAAAAAAAKAAMAYGRARKA", {}),
+        Sequence("s1", "ATAAAAAAYAAAARCMCGKAAAYAATACAA", {}),
+        Sequence("s2", "ARAAYAAMACAAATARAAKAKAAYCWACAA", {}),
+        Sequence("s3", "MYGYAKAAATAYKAYAAGTATATGACAGKK", {}),
+        Sequence("s4", "KKAKAAAMAAAYAAAATTAAACRAACRAAA", {}),
+        Sequence("s5", "TCRAAAKRKYAAAAAACTKAATAGAACAMA", {}),
+        Sequence("s6", "AAAYAAKTRAKGAARCAAAACAAATACAAA", {}),
+        Sequence("s7", "CCAAAAATCAYACGAKKAAATAGMKACMAA", {}),
+    ]
+    parameters = dict(number_of_iterations=10, thinning_interval=1, burn_in=10)
+
+    chains = get_phased_chains(sequences, parameters, [1, 2], max_workers=1)
+
+    assert [line.id for line in chains[0]] == [line.id for line in chains[1]]
+    assert chains[0] != chains[1]
+
+
+def get_subset_sequences() -> list[Sequence]:
+    return [
+        Sequence("a1", "ACGTACGTAC", {"subset": "A"}),
+        Sequence("b1", "GMAAATMAAGGAAAAAAAKAAMAYGRARKA", {"subset": "B"}),
+        Sequence("a2", "ACGTACGTAC", {"subset": "A"}),
+        Sequence("b2", "ATAAAAAAYAAAARCMCGKAAAYAATACAA", {"subset": "B"}),
+        Sequence("b3", "ARAAYAAMACAAATARAAKAKAAYCWACAA", {"subset": "B"}),
+        Sequence("x1", "CCAAAAATCAYACGAKKAAATAGMKACMAA", {}),
+    ]
+
+
+def test_partitions_missing_field():
+    partitions = _get_partitions(get_subset_sequences(), "subset")
+    assert [[x.id for x in partition] for partition in partitions] == [
+        ["a1", "a2"],
+        ["b1", "b2", "b3"],
+        ["x1"],
+    ]
+
+    partitions = _get_partitions(get_subset_sequences(), "missing")
+    assert len(partitions) == 1
+    assert [x.id for x in partitions[0]] == ["a1", "b1", "a2", "b2", "b3", "x1"]
+
+
+def test_monomorphic_partition_is_skipped(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("monomorphic partitions should not be phased")
+
+    monkeypatch.setattr(work, "iter_phase", fail)
+    unphased = [UnphasedSequence("x", "ACGT"), UnphasedSequence("y", "ACGT")]
+
+    phased = _phase_partition(unphased, {})
+    assert phased == [
+        PhasedSequence("x", "ACGT", "ACGT"),
+        PhasedSequence("y", "ACGT", "ACGT"),
+    ]
+
+
+def test_subsets_merged_in_input_order(quiet_progress):
+    sequences = get_subset_sequences()
+    parameters = dict(number_of_iterations=10, thinning_interval=1, burn_in=10)
+
+    phased = get_phased_lines_by_subset(sequences, parameters, "subset", 1)
+    joined = list(_get_sequences_from_phased_data(sequences, phased))
+
+    assert [x.id for x in joined[::2]] == ["a1", "b1", "a2", "b2", "b3", "x1"]
+    assert [x.seq for x in joined[0:2]] == ["ACGTACGTAC", "ACGTACGTAC"]
+    assert [x.seq for x in joined[4:6]] == ["ACGTACGTAC", "ACGTACGTAC"]
+    assert [x.extras.get("subset") for x in joined[::2]] == [
+        "A",
+        "B",
+        "A",
+        "B",
+        "B",
+        None,
+    ]
+
+
+def test_merge_chains_consensus():
+    chains = [
+        [PhasedSequence("x", "AC", "GT"), PhasedSequence("y", "AA", "AA")],
+        [PhasedSequence("x", "GT", "AC"), PhasedSequence("y", "AA", "AA")],
+        [PhasedSequence("x", "AT", "GC"), PhasedSequence("y", "AA", "AA")],
+    ]
+
+    consensus, agreement = merge_phased_chains(chains, [1, 2, 3])
+
+    assert consensus == [chains[0][0], chains[0][1]]
+    assert agreement.seeds == [1, 2, 3]
+    assert agreement.individuals == {"x": 2 / 3, "y": 1.0}
+    assert agreement.sites == [1.0, 5 / 6]
+    assert agreement.disputed_individuals == ["x"]
+    assert agreement.disputed_sites == [1]
+
+
+@pytest.mark.parametrize(
+    "format, concatenate",
+    [
+        (OutputFormat.Mimic, False),
+        (OutputFormat.Fasta, False),
+        (OutputFormat.Fasta, True),
+        (OutputFormat.Tabfile, False),
+    ],
+)
+@pytest.mark.parametrize("example", sorted(examples.iterdir()), ids=lambda x: x.name)
+def test_output_info_matches_get_info(tmp_path, example, format, concatenate):
+    input_sequences = headless.get_input_sequences(get_info(example))
+    output_options = headless.get_output_options(
+        input_sequences, format, None, concatenate
+    )
+    output_path = tmp_path / get_output_file_name(output_options, input_sequences)
+
+    sequences = get_sequences_from_model(input_sequences)
+    phased = [PhasedSequence(x.id, x.seq, x.seq) for x in sequences]
+    phased_sequences = _get_sequences_from_phased_data(sequences, phased)
+
+    info = get_output_info_builder(output_path, output_options, input_sequences)
+    with get_output_file_handler(output_path, output_options, input_sequences) as file:
+        for _ in iter_written_sequences(file, phased_sequences, info):
+            pass
+
+    assert info.get_info() == get_info(output_path)